@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
@@ -14,7 +14,69 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Hash de senha (bcrypt em pool de threads dedicado)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 32  # Requisições aguardando além dos workers
+    
+    # Cache do usuário autenticado (token verificado e dados do usuário)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    
+    # Sessões (revogação e limpeza das expiradas)
+    SESSION_SYNC_INTERVAL_SECONDS: int = 5  # Atraso máximo para outro processo ver uma revogação
+    SESSION_PURGE_INTERVAL_SECONDS: int = 3600
+    SESSION_PURGE_BATCH_SIZE: int = 5000
+    
+    # Cache de leitura das rotas GET (invalidado pelas escritas do usuário)
+    CACHE_BACKEND: str = "auto"  # auto, memory, redis ou none (auto: memory só com um processo escrevendo)
+    CACHE_URL: str = "redis://localhost:6379/0"  # memory:// usa um Redis simulado em memória
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_MAX_ITEMS: int = 10000  # Limites do backend memory
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    
+    # Perfil de SQL
+    SQL_ECHO: bool = False  # Loga todos os comandos (lento; só para depuração pontual)
+    SLOW_QUERY_MS: int = 200  # Comandos acima deste tempo são logados com a rota
+    QUERY_STATS_HEADER: bool = False  # Header X-Query-Stats (ignorado em produção)
+    
+    # Busca textual dos resumos (configuração de idioma do full-text search do PostgreSQL)
+    SEARCH_TEXT_CONFIG: str = "portuguese"
+    
+    # Fotos (armazenadas pelo conteúdo em disco local)
+    PHOTO_STORAGE_DIR: str = "storage/photos"
+    PHOTO_MAX_BYTES: int = 10 * 1024 * 1024
+    PHOTO_WORKERS: int = 2  # Processos que geram as miniaturas
+    
+    # Exportação da conta (a conexão fica reservada durante o download)
+    EXPORT_MAX_SECONDS: int = 900
+    EXPORT_IDLE_TIMEOUT_SECONDS: int = 60  # Cliente sem ler por mais que isso encerra a exportação
+    
+    # Geração automática de perguntas a partir dos resumos
+    QUESTION_WORKERS: int = 2  # Processos que geram as perguntas
+    QUESTION_GENERATION_MAX: int = 20  # Perguntas por resumo
+    
+    # Fila de jobs em segundo plano (tabela Job; worker: python -m app.worker)
+    JOB_WORKER_IN_APP: bool = True  # Executa um worker dentro de cada processo da API
+    JOB_QUEUES: Dict[str, int] = {"default": 4, "photos": 2, "reminders": 2}  # Fila -> jobs simultâneos por worker
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_TIMEOUT_SECONDS: int = 600
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: int = 10
+    JOB_RETRY_MAX_SECONDS: int = 3600
+    
+    # Lembretes diários de estudo (agendador roda junto com o worker de jobs)
+    REMINDERS_ENABLED: bool = True
+    REMINDER_DEFAULT_TIME: str = "19:00"  # HH:MM no horário do servidor
+    REMINDER_INTERVAL_SECONDS: int = 60
+    REMINDER_BATCH_SIZE: int = 5000
+    REMINDER_MAX_DELAY_MINUTES: int = 120  # Lembretes mais atrasados que isso são descartados
+    REMINDER_SINK: str = "log"  # log ou file
+    REMINDER_SINK_PATH: str = "reminders.ndjson"  # Destino do sink file
+    
     # API
+    ENVIRONMENT: str = "development"  # development ou production
+    API_WORKERS: int = int(os.environ.get("WEB_CONCURRENCY", "1"))  # Processos da API (uvicorn --workers)
     DEBUG: bool = True
     CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
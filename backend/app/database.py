@@ -1,28 +1,72 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+import time
+from typing import AsyncGenerator
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.metrics import DB_POOL_WAIT
+from app.query_profiler import install_query_profiler
+
+
+def get_async_database_url(url: str) -> str:
+    """Converte a DATABASE_URL para o driver assíncrono correspondente"""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = get_async_database_url(settings.DATABASE_URL)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Pool padrão do engine assíncrono, medindo o tempo para obter uma conexão"""
+    
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started_at)
 
-# Criar engine do SQLAlchemy
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
 
-# Criar session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Opções de pool não se aplicam ao SQLite (usado apenas em testes locais)
+# O echo loga todo comando de forma síncrona; prefira o log de consultas lentas
+engine_options = {"echo": settings.SQL_ECHO}
+if not ASYNC_DATABASE_URL.startswith("sqlite"):
+    engine_options.update(poolclass=TimedQueuePool, pool_pre_ping=True, pool_size=10, max_overflow=20)
+
+# Criar engine assíncrona do SQLAlchemy
+engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options)
+
+# Criar session factory assíncrona
+# expire_on_commit=False evita recarregar atributos (I/O implícito) após o commit
+SessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 # Base para os modelos ORM
 Base = declarative_base()
 
 
-def get_db() -> Session:
-    """Dependency para obter a sessão do banco de dados"""
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency para obter a sessão assíncrona do banco de dados"""
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def dialect_insert(db: AsyncSession, table):
+    """`insert` com suporte a ON CONFLICT para o banco da sessão (PostgreSQL ou SQLite)"""
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+# Perfil de consultas por requisição e log de consultas lentas (ver query_profiler.py)
+install_query_profiler(engine.sync_engine)
@@ -1,20 +1,60 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app import metrics
 from app.config import settings
+from app.database import engine
+from app.query_profiler import profile_queries
+from app.utils.photos import variant_pool
+from app.utils.read_cache import read_cache
+from app.utils.responses import FastJSONResponse
+from app.utils.security import password_hash_pool
+from app.utils.sessions import SessionMaintenance, revoked_sessions
+from app.worker import create_scheduler, create_worker
 from app.routes import (
     auth_router,
     challenges_router,
     summaries_router,
     questions_router,
     results_router,
-    dashboard_router
+    dashboard_router,
+    photos_router,
+    export_router,
+    reminders_router
 )
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """
+    Carrega as sessões revogadas antes de atender e inicia a manutenção das
+    sessões; com JOB_WORKER_IN_APP, também o worker da fila de jobs e o
+    agendador de lembretes.
+    """
+    sessions = SessionMaintenance()
+    await sessions.start()
+    worker = create_worker() if settings.JOB_WORKER_IN_APP else None
+    scheduler = create_scheduler() if settings.JOB_WORKER_IN_APP else None
+    if worker is not None:
+        worker.start()
+    if scheduler is not None:
+        scheduler.start()
+    yield
+    if scheduler is not None:
+        await scheduler.stop()
+    if worker is not None:
+        await worker.stop(timeout=settings.JOB_POLL_INTERVAL_SECONDS * 10)
+    await sessions.stop()
+
+
 # Criar aplicação FastAPI
 app = FastAPI(
     title="StudyBuddy API",
     description="API para o gerenciador de estudos StudyBuddy",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson em vez do json da stdlib para todas as respostas
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -26,6 +66,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def instrumentation_middleware(request: Request, call_next):
+    """
+    Mede latência, status e consultas SQL de cada requisição (ver /metrics).
+    
+    Em DEBUG, a quantidade de consultas também vai no header X-Query-Count; com
+    QUERY_STATS_HEADER (fora de produção), o resumo do perfil vai em X-Query-Stats.
+    """
+    metrics.HTTP_IN_FLIGHT.inc()
+    started_at = time.perf_counter()
+    try:
+        with profile_queries() as profile:
+            response = await call_next(request)
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
+    elapsed = time.perf_counter() - started_at
+    
+    # Rótulo pelo template da rota (ex: /api/summaries/{summary_id}) para limitar a cardinalidade
+    route = request.scope.get("route")
+    route_path = route.path if route is not None else "unmatched"
+    metrics.HTTP_REQUESTS.inc(request.method, route_path, str(response.status_code))
+    metrics.HTTP_LATENCY.observe(elapsed, request.method, route_path)
+    metrics.DB_QUERIES_PER_REQUEST.observe(profile.count, route_path)
+    metrics.DB_TIME_PER_REQUEST.observe(profile.time, route_path)
+    if profile.slow:
+        profile.log_slow(f"{request.method} {route_path}")
+    
+    request.state.query_count = profile.count
+    if settings.DEBUG:
+        response.headers["X-Query-Count"] = str(profile.count)
+    if settings.QUERY_STATS_HEADER and settings.ENVIRONMENT != "production":
+        response.headers["X-Query-Stats"] = profile.header_value()
+    
+    return response
+
+
+@metrics.registry.on_collect
+def _collect_state():
+    """Atualiza as métricas de estado (pool, bcrypt, cache, sessões, fotos) na hora da coleta"""
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        metrics.DB_POOL_SIZE.set(pool.size())
+        metrics.DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        metrics.DB_POOL_OVERFLOW.set(pool.overflow())
+    
+    hash_stats = password_hash_pool.stats()
+    metrics.PASSWORD_HASH_PENDING.set(hash_stats["pending"])
+    metrics.PASSWORD_HASH_REJECTED.set(hash_stats["rejected"])
+    
+    cache_stats = read_cache.stats()
+    for event in ("hits", "misses", "errors", "evictions"):
+        if event in cache_stats:
+            metrics.CACHE_EVENTS.set(cache_stats[event], event)
+    if "bytes" in cache_stats:
+        metrics.CACHE_SIZE.set(cache_stats["bytes"])
+    
+    metrics.SESSIONS_REVOKED.set(len(revoked_sessions))
+    metrics.PHOTO_VARIANTS_PENDING.set(variant_pool.stats()["pending"])
+
+
 # Incluir rotas
 app.include_router(auth_router)
 app.include_router(challenges_router)
@@ -33,6 +134,9 @@ app.include_router(summaries_router)
 app.include_router(questions_router)
 app.include_router(results_router)
 app.include_router(dashboard_router)
+app.include_router(photos_router)
+app.include_router(export_router)
+app.include_router(reminders_router)
 
 
 @app.get("/", tags=["Root"])
@@ -45,6 +149,12 @@ async def root():
     }
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics_endpoint():
+    """Métricas no formato de exposição em texto do Prometheus"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Verifica a saúde da API"""
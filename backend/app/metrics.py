@@ -0,0 +1,222 @@
+"""
+Métricas da aplicação no formato de exposição em texto do Prometheus.
+
+Implementação mínima (contadores, gauges e histogramas com labels), sem
+dependências externas. Todas as observações acontecem no event loop, então
+não há locks no caminho quente: `observe` é uma busca binária e dois
+incrementos. As métricas de estado (pool de conexões, fila do bcrypt, cache)
+são lidas só no momento da coleta, em `GET /metrics`.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# O Starlette acrescenta "; charset=utf-8" aos tipos text/*
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Limites padrão dos histogramas de latência, em segundos
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, *labels: str) -> None:
+        """Copia um total acumulado por outro componente (usado na coleta)"""
+        self._values[labels] = value
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinação de labels: [contagem por faixa (+Inf no fim), soma]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            suffix = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_number(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas e de funções chamadas antes de cada coleta"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def on_collect(self, func: Callable[[], None]) -> Callable[[], None]:
+        """Registra uma função que atualiza gauges de estado na hora da coleta"""
+        self._collectors.append(func)
+        return func
+
+    def render(self) -> bytes:
+        for collect in self._collectors:
+            collect()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+registry = Registry()
+
+# HTTP
+HTTP_REQUESTS = registry.register(Counter(
+    "studybuddy_http_requests_total", "Requisições HTTP por rota e status", ["method", "route", "status"]
+))
+HTTP_LATENCY = registry.register(Histogram(
+    "studybuddy_http_request_duration_seconds", "Latência das requisições HTTP", ["method", "route"]
+))
+HTTP_IN_FLIGHT = registry.register(Gauge(
+    "studybuddy_http_requests_in_flight", "Requisições HTTP em andamento"
+))
+
+# Banco de dados, por requisição
+DB_QUERIES_PER_REQUEST = registry.register(Histogram(
+    "studybuddy_db_queries_per_request", "Comandos SQL executados por requisição", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+))
+DB_TIME_PER_REQUEST = registry.register(Histogram(
+    "studybuddy_db_query_seconds_per_request", "Tempo total em SQL por requisição", ["route"]
+))
+
+# Pool de conexões
+DB_POOL_SIZE = registry.register(Gauge("studybuddy_db_pool_size", "Tamanho configurado do pool de conexões"))
+DB_POOL_CHECKED_OUT = registry.register(Gauge("studybuddy_db_pool_checked_out", "Conexões em uso"))
+DB_POOL_OVERFLOW = registry.register(Gauge("studybuddy_db_pool_overflow", "Conexões além do pool_size (negativo: ainda não abertas)"))
+DB_POOL_WAIT = registry.register(Histogram(
+    "studybuddy_db_pool_wait_seconds", "Tempo para obter uma conexão do pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+))
+
+# Hash de senha (bcrypt)
+PASSWORD_HASH_QUEUE_TIME = registry.register(Histogram(
+    "studybuddy_password_hash_queue_seconds", "Tempo na fila do pool de bcrypt antes de executar"
+))
+PASSWORD_HASH_PENDING = registry.register(Gauge(
+    "studybuddy_password_hash_pending", "Operações de bcrypt pendentes (executando ou na fila)"
+))
+PASSWORD_HASH_REJECTED = registry.register(Counter(
+    "studybuddy_password_hash_rejected_total", "Operações de bcrypt rejeitadas com a fila cheia"
+))
+
+# Cache de leitura
+CACHE_EVENTS = registry.register(Counter(
+    "studybuddy_read_cache_events_total", "Acertos, erros e falhas do cache de leitura", ["event"]
+))
+CACHE_SIZE = registry.register(Gauge("studybuddy_read_cache_bytes", "Bytes ocupados pelo cache em memória"))
+
+# Sessões
+SESSIONS_REVOKED = registry.register(Gauge(
+    "studybuddy_sessions_revoked", "Sessões revogadas ainda não expiradas na lista em memória"
+))
+
+# Fotos
+PHOTO_VARIANTS_PENDING = registry.register(Gauge(
+    "studybuddy_photo_variants_pending", "Fotos aguardando a geração das versões reduzidas"
+))
+
+# Fila de jobs (por worker)
+JOBS_RUNNING = registry.register(Gauge(
+    "studybuddy_jobs_running", "Jobs em execução neste processo", ["queue"]
+))
+JOBS_PROCESSED = registry.register(Counter(
+    "studybuddy_jobs_processed_total", "Jobs executados por resultado (done, retry, failed)", ["queue", "outcome"]
+))
+JOB_DURATION = registry.register(Histogram(
+    "studybuddy_job_duration_seconds", "Duração da execução dos jobs", ["queue"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+))
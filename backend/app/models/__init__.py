@@ -4,6 +4,12 @@ from .challenge import Challenge
 from .summary import Summary, SummaryObjective
 from .question import Question
 from .test_result import TestResult, Answer
+from .study_rollup import StudyRollup
+from .study_calendar import StudyCalendar
+from .summary_search import SummarySearch
+from .photo_asset import PhotoAsset, PhotoAssetUser
+from .job import Job
+from .study_reminder import StudyReminder
 
 __all__ = [
     "User",
@@ -14,4 +20,11 @@ __all__ = [
     "Question",
     "TestResult",
     "Answer",
+    "StudyRollup",
+    "StudyCalendar",
+    "SummarySearch",
+    "PhotoAsset",
+    "PhotoAssetUser",
+    "Job",
+    "StudyReminder",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -6,6 +6,10 @@ from datetime import datetime
 
 class Challenge(Base):
     __tablename__ = "Challenge"
+    __table_args__ = (
+        # Mesmo índice do script SQL (desafios de um usuário; meta diária dos lembretes)
+        Index("idx_challenge_user", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
@@ -15,6 +19,7 @@ class Challenge(Base):
     daily_time = Column(Integer, nullable=False)  # Tempo em minutos
     duration = Column(Integer, nullable=False)  # Duração em dias
     photo_url = Column(String(255), nullable=True)
+    photo_asset_id = Column(Integer, ForeignKey("PhotoAsset.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
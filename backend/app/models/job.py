@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, func, text
+from app.database import Base
+
+
+class Job(Base):
+    """Tarefa em segundo plano (fila durável, processada por app.worker)"""
+    __tablename__ = "Job"
+    __table_args__ = (
+        # Busca dos próximos jobs de uma fila: só as linhas aguardando entram no índice
+        Index(
+            "idx_job_claim", "queue", text("priority DESC"), "run_at",
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+        # Enfileirar de novo a mesma tarefa (mesma `key`) enquanto ela aguarda não duplica o job
+        Index(
+            "uq_job_queued_key", "key", unique=True,
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String(50), nullable=False)
+    task = Column(String(100), nullable=False)  # Nome registrado com @job_task
+    payload = Column(JSON, nullable=False)
+    key = Column(String(255), nullable=True)  # Deduplicação opcional
+    priority = Column(Integer, nullable=False, default=0)  # Maior = executa antes
+    status = Column(String(20), nullable=False, default="queued")  # queued, running ou failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Não executa antes disso
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    locked_by = Column(String(100), nullable=True)  # Worker que está executando
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, queue={self.queue}, task={self.task}, status={self.status})>"
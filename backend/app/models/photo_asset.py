@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, JSON, func
+from app.database import Base
+
+
+class PhotoAsset(Base):
+    """Foto armazenada pelo conteúdo (um registro por SHA-256, compartilhado entre usuários)"""
+    __tablename__ = "PhotoAsset"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True)
+    content_type = Column(String(50), nullable=False)
+    size = Column(Integer, nullable=False)  # Bytes do original
+    width = Column(Integer, nullable=True)  # Preenchidos ao gerar as versões reduzidas
+    height = Column(Integer, nullable=True)
+    variants = Column(JSON, nullable=True)  # Versões geradas, ex: ["thumb", "medium"]
+    created_by = Column(Integer, ForeignKey("User.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<PhotoAsset(id={self.id}, sha256={self.sha256[:12]})>"
+
+
+
+class PhotoAssetUser(Base):
+    """Usuário que enviou uma foto (só quem enviou o conteúdo pode referenciá-la)"""
+    __tablename__ = "PhotoAssetUser"
+    __table_args__ = (
+        # A PK (asset_id, user_id) atende a validação; este cobre o ON DELETE CASCADE do usuário
+        Index("idx_photoassetuser_user", "user_id"),
+    )
+    
+    asset_id = Column(Integer, ForeignKey("PhotoAsset.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<PhotoAssetUser(asset_id={self.asset_id}, user_id={self.user_id})>"
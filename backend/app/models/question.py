@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, func, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -6,12 +6,17 @@ from datetime import datetime
 
 class Question(Base):
     __tablename__ = "Question"
+    __table_args__ = (
+        UniqueConstraint("summary_id", "source_hash", name="uq_summary_question_source"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     summary_id = Column(Integer, ForeignKey("Summary.id", ondelete="CASCADE"), nullable=False)
     text = Column(Text, nullable=False)
     options = Column(JSON, nullable=False)  # Armazena as opções em formato JSON
     correct_answer = Column(String(1), nullable=False)  # 'a', 'b', 'c', 'd', 'e'
+    # Hash do trecho do resumo que originou a pergunta (NULL = criada manualmente)
+    source_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     def __repr__(self):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -6,14 +6,27 @@ from datetime import datetime
 
 class Session(Base):
     __tablename__ = "Session"
+    __table_args__ = (
+        # Sessões ativas de um usuário (GET /api/auth/sessions)
+        Index("idx_session_user", "user_id"),
+        # Limpeza das sessões expiradas, em lotes
+        Index("idx_session_expires_at", "expires_at"),
+        # Sincronização da lista de revogadas: só as sessões revogadas entram no índice
+        Index(
+            "idx_session_revoked", "expires_at",
+            postgresql_where=text("revoked_at IS NOT NULL"),
+            sqlite_where=text("revoked_at IS NOT NULL"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
-    token = Column(String(255), unique=True, nullable=False, index=True)
+    token = Column(String(255), unique=True, nullable=False, index=True)  # Identificador da sessão (claim `sid` do JWT)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     ip_address = Column(String(45), nullable=True)  # Suporta IPv4 e IPv6
     user_agent = Column(String(500), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)  # Logout ou revogação
     
     def __repr__(self):
         return f"<Session(id={self.id}, user_id={self.user_id}, token={self.token[:10]}...)>"
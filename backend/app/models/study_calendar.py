@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, LargeBinary, ForeignKey
+from app.database import Base
+
+# 366 dias por ano, 1 bit por dia
+YEAR_BITMAP_BYTES = 46
+
+
+class StudyCalendar(Base):
+    """Dias de estudo de um usuário em um ano, como bitmap (bit 0 = 1º de janeiro)"""
+    __tablename__ = "StudyCalendar"
+    
+    user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    days = Column(LargeBinary(YEAR_BITMAP_BYTES), nullable=False)
+    
+    def __repr__(self):
+        return f"<StudyCalendar(user_id={self.user_id}, year={self.year})>"
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Boolean, Date, DateTime, ForeignKey, Index
+from app.database import Base
+
+
+class StudyReminder(Base):
+    """Lembrete diário de estudo de um usuário (criado junto com o primeiro desafio)"""
+    __tablename__ = "StudyReminder"
+    __table_args__ = (
+        # O agendador lê só os lembretes vencidos, em ordem, sem percorrer todos os usuários
+        Index("idx_studyreminder_next_at", "next_at"),
+    )
+    
+    user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), primary_key=True)
+    remind_minute = Column(Integer, nullable=False)  # Minutos desde a meia-noite (horário do servidor)
+    enabled = Column(Boolean, nullable=False, default=True)
+    next_at = Column(DateTime(timezone=True), nullable=True)  # Próximo envio (NULL = desativado)
+    last_sent_on = Column(Date, nullable=True)
+    
+    def __repr__(self):
+        return f"<StudyReminder(user_id={self.user_id}, next_at={self.next_at})>"
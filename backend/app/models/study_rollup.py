@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, func
+from app.database import Base
+
+
+class StudyRollup(Base):
+    """Totais de estudo pré-agregados por usuário e período (dia, semana, mês)"""
+    __tablename__ = "StudyRollup"
+    
+    user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), primary_key=True)
+    period = Column(String(5), primary_key=True)  # 'day', 'week' ou 'month'
+    period_start = Column(Date, primary_key=True)  # Dia, segunda-feira da semana ou dia 1 do mês
+    study_time = Column(Integer, nullable=False, default=0)  # Tempo em minutos
+    study_sessions = Column(Integer, nullable=False, default=0)  # Resumos registrados
+    test_count = Column(Integer, nullable=False, default=0)
+    score_total = Column(Integer, nullable=False, default=0)  # Soma das pontuações (média = score_total / test_count)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<StudyRollup(user_id={self.user_id}, period={self.period}, period_start={self.period_start})>"
@@ -18,11 +18,15 @@ class Summary(Base):
     difficulty = Column(String(50), nullable=False)  # Mudar de Enum para String
     summary_text = Column(Text, nullable=False)
     photo_url = Column(String(255), nullable=True)
+    photo_asset_id = Column(Integer, ForeignKey("PhotoAsset.id", ondelete="SET NULL"), nullable=True)
+    # Hash do conteúdo na última geração automática de perguntas
+    questions_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     # Relacionamento com objetivos
-    objectives = relationship("SummaryObjective", back_populates="summary", cascade="all, delete-orphan")
+    # lazy="raise": as rotas devem carregar com selectinload (evita N+1)
+    objectives = relationship("SummaryObjective", back_populates="summary", cascade="all, delete-orphan", lazy="raise")
     
     def __repr__(self):
         return f"<Summary(id={self.id}, user_id={self.user_id}, study_date={self.study_date})>"
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Text, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from app.database import Base
+
+
+class SummarySearch(Base):
+    """Documento de busca textual de um resumo (texto do resumo + objetivos)"""
+    __tablename__ = "SummarySearch"
+    __table_args__ = (
+        Index("idx_summarysearch_document", "document", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+    
+    summary_id = Column(Integer, ForeignKey("Summary.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), nullable=False, index=True)
+    # tsvector no PostgreSQL; nos demais bancos, as palavras normalizadas (sem acentos, minúsculas)
+    document = Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=False)
+    
+    def __repr__(self):
+        return f"<SummarySearch(summary_id={self.summary_id}, user_id={self.user_id})>"
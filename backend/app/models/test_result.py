@@ -6,6 +6,9 @@ from datetime import datetime
 
 class TestResult(Base):
     __tablename__ = "TestResult"
+    __table_args__ = (
+        UniqueConstraint("user_id", "idempotency_key", name="uq_user_idempotency_key"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
@@ -14,10 +17,12 @@ class TestResult(Base):
     correct_count = Column(Integer, nullable=False)
     total_count = Column(Integer, nullable=False)
     time_spent = Column(Integer, nullable=True)  # Tempo em minutos
+    idempotency_key = Column(String(64), nullable=True)  # Header Idempotency-Key da submissão
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
     # Relacionamento com respostas
-    answers = relationship("Answer", back_populates="test_result", cascade="all, delete-orphan", foreign_keys="[Answer.test_result_id]")
+    # lazy="raise": as rotas devem carregar com selectinload (evita N+1)
+    answers = relationship("Answer", back_populates="test_result", cascade="all, delete-orphan", foreign_keys="[Answer.test_result_id]", lazy="raise")
     
     def __repr__(self):
         return f"<TestResult(id={self.id}, user_id={self.user_id}, score={self.score})>"
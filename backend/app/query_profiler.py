@@ -0,0 +1,152 @@
+"""
+Perfil das consultas SQL por requisição (substitui o `echo` do engine).
+
+Os eventos do engine acumulam, para cada bloco `profile_queries()` ativo (em
+geral, a requisição inteira, aberto pelo middleware em `main.py`), a
+impressão digital de cada comando (o SQL com parâmetros e literais
+normalizados), o número de execuções, o tempo e as linhas. Só os comandos
+acima de SLOW_QUERY_MS são logados, junto com a rota que os executou; fora de
+uma requisição (CLIs, workers) eles são logados na hora.
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger("app.sql")
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_NUMBERED_PARAMS = re.compile(r"\$\d+")
+_PARAM_CASTS = re.compile(r"\?::\w+(?:\(\?\))?")
+_PARAM_LISTS = re.compile(r"\(\?(?:, \?)*\)")
+_REPEATED_GROUPS = re.compile(r"\(\.\.\.\)(?:, \(\.\.\.\))+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Normaliza um comando SQL para agrupar execuções equivalentes.
+
+    Literais e parâmetros viram `?` e listas de parâmetros (IN, VALUES em
+    lote) viram `(...)`, de modo que o mesmo comando com 1 ou 500 ids tem a
+    mesma impressão digital.
+    """
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _NUMBERED_PARAMS.sub("?", sql)
+    sql = _LITERALS.sub("?", sql)
+    sql = _PARAM_CASTS.sub("?", sql)
+    sql = _PARAM_LISTS.sub("(...)", sql)
+    return _REPEATED_GROUPS.sub("(...)", sql)
+
+
+class QueryProfile:
+    """Comandos SQL executados enquanto o perfil está ativo"""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        # Impressão digital -> [execuções, tempo total, linhas]
+        self.statements: Dict[str, list] = {}
+        # (impressão digital, duração, linhas) dos comandos acima do limite
+        self.slow: List[Tuple[str, float, Optional[int]]] = []
+
+    def record(self, statement: str, elapsed: float, rowcount: Optional[int]) -> None:
+        self.count += 1
+        self.time += elapsed
+        stats = self.statements.get(statement)
+        if stats is None:
+            stats = self.statements[statement] = [0, 0.0, 0]
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] += rowcount or 0
+
+    def by_fingerprint(self) -> Dict[str, list]:
+        """Agrupa os comandos pela impressão digital (feito só quando necessário)"""
+        grouped: Dict[str, list] = {}
+        for statement, (calls, elapsed, rows) in self.statements.items():
+            stats = grouped.setdefault(fingerprint(statement), [0, 0.0, 0])
+            stats[0] += calls
+            stats[1] += elapsed
+            stats[2] += rows
+        return grouped
+
+    def header_value(self) -> str:
+        """Resumo para o header X-Query-Stats"""
+        grouped = self.by_fingerprint()
+        repeated = max((calls for calls, _, _ in grouped.values()), default=0)
+        slowest = max((elapsed / calls for calls, elapsed, _ in grouped.values()), default=0.0)
+        rows = sum(rows for _, _, rows in grouped.values())
+        return (
+            f"count={self.count}; distinct={len(grouped)}; max_repeat={repeated}; "
+            f"rows={rows}; time_ms={self.time * 1000:.2f}; slowest_avg_ms={slowest * 1000:.2f}"
+        )
+
+    def log_slow(self, route: str) -> None:
+        for statement, elapsed, rowcount in self.slow:
+            _log_slow(statement, elapsed, rowcount, route)
+
+
+# Perfis ativos no contexto atual (requisição, teste, etc.)
+_active_profiles: ContextVar[Tuple[QueryProfile, ...]] = ContextVar("active_query_profiles", default=())
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    """
+    Registra as consultas executadas dentro do bloco.
+
+    Os perfis podem ser aninhados: um teste pode envolver a requisição
+    inteira enquanto o middleware registra a mesma requisição.
+    """
+    profile = QueryProfile()
+    token = _active_profiles.set(_active_profiles.get() + (profile,))
+    try:
+        yield profile
+    finally:
+        _active_profiles.reset(token)
+
+
+def _log_slow(statement: str, elapsed: float, rowcount: Optional[int], route: str) -> None:
+    logger.warning(
+        "SQL lento: %.1f ms, %s linhas, rota %s: %s",
+        elapsed * 1000, "?" if rowcount is None else rowcount, route, fingerprint(statement)
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Comandos na mesma conexão são sequenciais: basta um único marcador
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info.pop("query_started_at", None)
+    if started_at is None:
+        return
+    elapsed = time.perf_counter() - started_at
+    # SELECTs costumam reportar -1 (quantidade desconhecida antes do fetch)
+    rowcount = cursor.rowcount if cursor.rowcount >= 0 else None
+
+    profiles = _active_profiles.get()
+    for profile in profiles:
+        profile.record(statement, elapsed, rowcount)
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        if profiles:
+            # Logado no fim da requisição, quando a rota é conhecida
+            for profile in profiles:
+                profile.slow.append((statement, elapsed, rowcount))
+        else:
+            _log_slow(statement, elapsed, rowcount, "-")
+
+
+def install_query_profiler(engine: Engine) -> None:
+    """Registra os eventos do profiler no engine (síncrono) informado"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -4,6 +4,9 @@ from .summaries import router as summaries_router
 from .questions import router as questions_router
 from .results import router as results_router
 from .dashboard import router as dashboard_router
+from .photos import router as photos_router
+from .export import router as export_router
+from .reminders import router as reminders_router
 
 __all__ = [
     "auth_router",
@@ -12,4 +15,7 @@ __all__ = [
     "questions_router",
     "results_router",
     "dashboard_router",
+    "photos_router",
+    "export_router",
+    "reminders_router",
 ]
@@ -1,18 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import timedelta
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 from app.database import get_db
-from app.models import User
-from app.schemas.user import UserCreate, UserLogin, TokenResponse, UserResponse
-from app.utils.security import hash_password, verify_password, create_access_token
-from app.utils.auth import get_current_user
+from app.models import Session, User
+from app.schemas.pagination import Page
+from app.schemas.user import UserCreate, UserLogin, TokenResponse, UserResponse, SessionResponse
+from app.utils.security import (
+    hash_password_async,
+    verify_password_async,
+    PasswordHashPoolFull
+)
+from app.utils.auth import get_current_user, get_current_session_id, UserSnapshot
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, build_page, decode_cursor
+from app.utils.sessions import create_session, revoke_session
 
 router = APIRouter(prefix="/api/auth", tags=["Autenticação"])
 
 
+def password_pool_busy() -> HTTPException:
+    """Resposta rápida quando o pool de bcrypt está saturado"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado. Tente novamente em instantes",
+        headers={"Retry-After": "1"}
+    )
+
+
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, request: Request, db: AsyncSession = Depends(get_db)):
     """
     Registra um novo usuário.
     
@@ -21,9 +38,12 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     - **password**: Senha (será criptografada)
     """
     # Verificar se o usuário já existe
-    existing_user = db.query(User).filter(
-        (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
+    result = await db.execute(
+        select(User).where(
+            (User.email == user_data.email) | (User.username == user_data.username)
+        )
+    )
+    existing_user = result.scalars().first()
     
     if existing_user:
         raise HTTPException(
@@ -33,7 +53,9 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     
     # Criar novo usuário
     try:
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
+    except PasswordHashPoolFull:
+        raise password_pool_busy()
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -46,14 +68,12 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.flush()
     
-    # Criar token de acesso
-    access_token = create_access_token(
-        data={"sub": str(new_user.id)},
-        expires_delta=timedelta(minutes=30)
-    )
+    # Criar token de acesso (a sessão é gravada no mesmo commit do usuário)
+    access_token = create_session(db, new_user.id, request, expires_delta=timedelta(minutes=30))
+    await db.commit()
+    await db.refresh(new_user)
     
     return {
         "access_token": access_token,
@@ -63,7 +83,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, request: Request, db: AsyncSession = Depends(get_db)):
     """
     Realiza login de um usuário.
     
@@ -71,19 +91,25 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     - **password**: Senha do usuário
     """
     # Buscar usuário por email
-    user = db.query(User).filter(User.email == credentials.email).first()
+    result = await db.execute(select(User).where(User.email == credentials.email))
+    user = result.scalar_one_or_none()
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    try:
+        valid_password = user is not None and await verify_password_async(
+            credentials.password, user.password_hash
+        )
+    except PasswordHashPoolFull:
+        raise password_pool_busy()
+    
+    if not valid_password:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos"
         )
     
-    # Criar token de acesso
-    access_token = create_access_token(
-        data={"sub": str(user.id)},
-        expires_delta=timedelta(minutes=30)
-    )
+    # Criar token de acesso e registrar a sessão
+    access_token = create_session(db, user.id, request, expires_delta=timedelta(minutes=30))
+    await db.commit()
     
     return {
         "access_token": access_token,
@@ -93,19 +119,79 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: UserSnapshot = Depends(get_current_user)):
     """Obtém informações do usuário atual (requer autenticação)"""
     return UserResponse.from_orm(current_user)
 
 
-@router.get("/admin/users", response_model=List[UserResponse])
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    current_user: UserSnapshot = Depends(get_current_user),
+    sid: Optional[str] = Depends(get_current_session_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Encerra a sessão do token atual (o token deixa de ser aceito)"""
+    # Tokens sem sessão registrada não podem ser revogados: apenas expiram
+    if sid is not None:
+        await revoke_session(db, current_user.id, sid=sid)
+
+
+@router.get("/sessions", response_model=List[SessionResponse])
+async def list_sessions(
+    current_user: UserSnapshot = Depends(get_current_user),
+    sid: Optional[str] = Depends(get_current_session_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Lista as sessões ativas (não expiradas nem revogadas) do usuário"""
+    result = await db.execute(
+        select(Session)
+        .where(
+            Session.user_id == current_user.id,
+            Session.revoked_at.is_(None),
+            Session.expires_at > datetime.now(timezone.utc)
+        )
+        .order_by(Session.created_at.desc(), Session.id.desc())
+    )
+    return [
+        SessionResponse(
+            id=session.id,
+            ip_address=session.ip_address,
+            user_agent=session.user_agent,
+            created_at=session.created_at,
+            expires_at=session.expires_at,
+            current=session.token == sid
+        )
+        for session in result.scalars().all()
+    ]
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_session(
+    session_id: int,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revoga uma sessão do usuário (ex: de outro dispositivo)"""
+    if not await revoke_session(db, current_user.id, session_id=session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sessão não encontrada"
+        )
+
+
+@router.get("/admin/users", response_model=Page[UserResponse])
 async def list_all_users(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Lista todos os usuários (apenas para admin).
+    Lista todos os usuários (apenas para admin), paginados por cursor.
     Requer autenticação.
+    
+    - **limit**: Quantidade máxima de usuários por página
+    - **cursor**: Valor de `next_cursor` da página anterior
     """
     # Verificar se o usuário é admin (ID 1 é o admin padrão)
     if current_user.id != 1:
@@ -114,7 +200,12 @@ async def list_all_users(
             detail="Acesso negado. Apenas administradores podem acessar esta rota."
         )
     
-    # Obter todos os usuários
-    users = db.query(User).all()
+    # Obter a página de usuários pela chave primária
+    query = select(User).order_by(User.id).limit(limit + 1)
+    
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(User.id > last_id)
     
-    return [UserResponse.from_orm(user) for user in users]
+    result = await db.execute(query)
+    return build_page(result.scalars().all(), limit, lambda u: [u.id])
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from app.database import get_db
-from app.models import User, Challenge
+from app.models import Challenge
 from app.schemas.challenge import ChallengeCreate, ChallengeUpdate, ChallengeResponse
-from app.utils.auth import get_current_user
+from app.schemas.pagination import Page
+from app.utils.auth import get_current_user, UserSnapshot
+from app.utils.conditional import has_conditional_headers, is_not_modified, make_etag, not_modified, set_cache_headers
+from app.utils.read_cache import invalidate_user_reads, read_cache
+from app.utils.reminders import ensure_reminder
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, build_page, decode_cursor
+from app.utils.photos import resolve_photo
+from app.utils.responses import row_dicts, schema_columns
 
 router = APIRouter(prefix="/api/challenges", tags=["Desafios"])
 
@@ -12,8 +20,8 @@ router = APIRouter(prefix="/api/challenges", tags=["Desafios"])
 @router.post("", response_model=ChallengeResponse, status_code=status.HTTP_201_CREATED)
 async def create_challenge(
     challenge_data: ChallengeCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Cria um novo desafio de estudo.
@@ -24,6 +32,7 @@ async def create_challenge(
     - **daily_time**: Tempo diário em minutos
     - **duration**: Duração em dias
     - **photo_url**: URL da foto (opcional)
+    - **photo_asset_id**: ID de uma foto enviada em POST /api/photos (opcional, define a photo_url)
     """
     new_challenge = Challenge(
         user_id=current_user.id,
@@ -32,37 +41,83 @@ async def create_challenge(
         description=challenge_data.description,
         daily_time=challenge_data.daily_time,
         duration=challenge_data.duration,
-        photo_url=challenge_data.photo_url
+        photo_url=await resolve_photo(db, challenge_data.photo_asset_id, current_user.id) or challenge_data.photo_url,
+        photo_asset_id=challenge_data.photo_asset_id
     )
     
     db.add(new_challenge)
-    db.commit()
-    db.refresh(new_challenge)
+    # Lembrete diário de estudo, no horário padrão (ajustável em PUT /api/reminders)
+    await ensure_reminder(db, current_user.id)
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
+    await db.refresh(new_challenge)
     
     return new_challenge
 
 
-@router.get("", response_model=List[ChallengeResponse])
+@router.get("", response_model=Page[ChallengeResponse])
 async def list_challenges(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Lista todos os desafios do usuário atual"""
-    challenges = db.query(Challenge).filter(Challenge.user_id == current_user.id).all()
-    return challenges
+    """
+    Lista os desafios do usuário atual, em ordem de criação.
+    
+    - **limit**: Quantidade máxima de desafios por página
+    - **cursor**: Valor de `next_cursor` da página anterior
+    """
+    entry = await read_cache.lookup(current_user.id, "challenges", "list", limit, cursor)
+    if entry.hit:
+        return entry.response()
+    
+    # Colunas do schema direto em tuplas: sem objetos ORM nem revalidação
+    query = (
+        select(*schema_columns(ChallengeResponse, Challenge))
+        .where(Challenge.user_id == current_user.id)
+        .order_by(Challenge.id)
+        .limit(limit + 1)
+    )
+    
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(Challenge.id > last_id)
+    
+    result = await db.execute(query)
+    return await entry.store(build_page(row_dicts(result), limit, lambda c: [c["id"]]))
 
 
 @router.get("/{challenge_id}", response_model=ChallengeResponse)
 async def get_challenge(
     challenge_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Obtém detalhes de um desafio específico"""
-    challenge = db.query(Challenge).filter(
-        Challenge.id == challenge_id,
-        Challenge.user_id == current_user.id
-    ).first()
+    """Obtém detalhes de um desafio específico (aceita If-None-Match / If-Modified-Since)"""
+    # Checagem barata da versão antes de carregar o desafio
+    if has_conditional_headers(request):
+        result = await db.execute(
+            select(Challenge.updated_at).where(
+                Challenge.id == challenge_id,
+                Challenge.user_id == current_user.id
+            )
+        )
+        updated_at = result.scalar_one_or_none()
+        if updated_at is not None:
+            etag = make_etag("challenge", challenge_id, updated_at)
+            if is_not_modified(request, etag, updated_at):
+                return not_modified(etag, updated_at)
+    
+    result = await db.execute(
+        select(Challenge).where(
+            Challenge.id == challenge_id,
+            Challenge.user_id == current_user.id
+        )
+    )
+    challenge = result.scalar_one_or_none()
     
     if not challenge:
         raise HTTPException(
@@ -70,6 +125,7 @@ async def get_challenge(
             detail="Desafio não encontrado"
         )
     
+    set_cache_headers(response, make_etag("challenge", challenge.id, challenge.updated_at), challenge.updated_at)
     return challenge
 
 
@@ -77,14 +133,17 @@ async def get_challenge(
 async def update_challenge(
     challenge_id: int,
     challenge_data: ChallengeUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Atualiza um desafio existente"""
-    challenge = db.query(Challenge).filter(
-        Challenge.id == challenge_id,
-        Challenge.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Challenge).where(
+            Challenge.id == challenge_id,
+            Challenge.user_id == current_user.id
+        )
+    )
+    challenge = result.scalar_one_or_none()
     
     if not challenge:
         raise HTTPException(
@@ -94,11 +153,15 @@ async def update_challenge(
     
     # Atualizar apenas os campos fornecidos
     update_data = challenge_data.dict(exclude_unset=True)
+    if "photo_asset_id" in update_data:
+        # A URL passa a apontar para a foto armazenada (ou é limpa junto com ela)
+        update_data["photo_url"] = await resolve_photo(db, update_data["photo_asset_id"], current_user.id) or update_data.get("photo_url")
     for field, value in update_data.items():
         setattr(challenge, field, value)
     
-    db.commit()
-    db.refresh(challenge)
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
+    await db.refresh(challenge)
     
     return challenge
 
@@ -106,14 +169,17 @@ async def update_challenge(
 @router.delete("/{challenge_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_challenge(
     challenge_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Deleta um desafio"""
-    challenge = db.query(Challenge).filter(
-        Challenge.id == challenge_id,
-        Challenge.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Challenge).where(
+            Challenge.id == challenge_id,
+            Challenge.user_id == current_user.id
+        )
+    )
+    challenge = result.scalar_one_or_none()
     
     if not challenge:
         raise HTTPException(
@@ -121,5 +187,6 @@ async def delete_challenge(
             detail="Desafio não encontrado"
         )
     
-    db.delete(challenge)
-    db.commit()
+    await db.delete(challenge)
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
@@ -1,40 +1,105 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import Date, DateTime, Integer, String, case, cast, func, literal_column, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.database import get_db
-from app.models import User, Summary, Challenge, TestResult
-from app.utils.auth import get_current_user
+from app.models import Summary, Challenge, TestResult, StudyRollup
+from app.utils.auth import get_current_user, UserSnapshot
+from app.utils.read_cache import read_cache
+from app.utils.streaks import current_streak, iter_days, load_study_days, longest_streak, pack_range
 
 router = APIRouter(prefix="/api", tags=["Dashboard"])
 
+# Intervalo máximo do calendário retornado em uma requisição
+MAX_CALENDAR_DAYS = 366
+
+
+def _calendar_range(start: Optional[date], end: Optional[date], default_start: date, default_end: date):
+    """Valida o intervalo do calendário, usando os padrões quando omitido"""
+    start = start or default_start
+    end = end or default_end
+    
+    if end < start or (end - start).days + 1 > MAX_CALENDAR_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Intervalo inválido. Use start <= end com no máximo {MAX_CALENDAR_DAYS} dias"
+        )
+    
+    return start, end
+
 
 @router.get("/streak-days", response_model=Dict[str, List[str]])
 async def get_streak_days(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Obtém as datas de estudo do usuário (para o calendário de streak).
     
+    - **start** / **end**: Intervalo das datas (opcional, padrão: os últimos 12 meses)
+    
     Retorna um dicionário com a chave 'dates' contendo uma lista de datas em formato ISO (YYYY-MM-DD).
     """
-    # Obter todos os resumos do usuário
-    summaries = db.query(Summary.study_date).filter(
-        Summary.user_id == current_user.id
-    ).distinct().all()
+    today = date.today()
+    start, end = _calendar_range(start, end, today - timedelta(days=MAX_CALENDAR_DAYS - 1), today)
     
-    # Converter para formato ISO
-    dates = [summary.study_date.isoformat() for summary in summaries]
+    entry = await read_cache.lookup(current_user.id, "streak-days", start, end)
+    if entry.hit:
+        return entry.response()
     
-    return {"dates": dates}
+    base, bits = await load_study_days(db, current_user.id)
+    dates = [day.isoformat() for day in iter_days(base, bits, start, end)]
+    
+    return await entry.store({"dates": dates})
+
+
+@router.get("/streak", response_model=Dict[str, Any])
+async def get_streak(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtém o streak atual, o maior streak e o calendário compactado do usuário.
+    
+    - **start** / **end**: Intervalo do calendário (opcional, padrão: mês atual)
+    
+    O calendário vem em `calendar.days`: bits em base64, little-endian, em que o
+    bit `i` indica se houve estudo no dia `start + i`.
+    """
+    today = date.today()
+    month_start = today.replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    start, end = _calendar_range(start, end, month_start, month_end)
+    
+    # O streak atual depende do dia, por isso `today` faz parte da chave
+    entry = await read_cache.lookup(current_user.id, "streak", today, start, end)
+    if entry.hit:
+        return entry.response()
+    
+    base, bits = await load_study_days(db, current_user.id)
+    
+    return await entry.store({
+        "currentStreak": current_streak(base, bits, today),
+        "longestStreak": longest_streak(bits),
+        "calendar": {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "days": pack_range(base, bits, start, end)
+        }
+    })
 
 
 @router.get("/day/{date_str}", response_model=Dict[str, Any])
 async def get_day_data(
     date_str: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Obtém os dados de um dia específico.
@@ -51,11 +116,20 @@ async def get_day_data(
             detail="Formato de data inválido. Use YYYY-MM-DD"
         )
     
+    entry = await read_cache.lookup(current_user.id, "day", study_date)
+    if entry.hit:
+        return entry.response()
+    
     # Obter o resumo do dia
-    summary = db.query(Summary).filter(
-        Summary.user_id == current_user.id,
-        Summary.study_date == study_date
-    ).first()
+    result = await db.execute(
+        select(Summary)
+        .options(selectinload(Summary.objectives))
+        .where(
+            Summary.user_id == current_user.id,
+            Summary.study_date == study_date
+        )
+    )
+    summary = result.scalar_one_or_none()
     
     if not summary:
         raise HTTPException(
@@ -66,7 +140,7 @@ async def get_day_data(
     # Obter informações do desafio associado (se houver)
     challenge_info = None
     if summary.challenge_id:
-        challenge = db.query(Challenge).filter(Challenge.id == summary.challenge_id).first()
+        challenge = await db.get(Challenge, summary.challenge_id)
         if challenge:
             challenge_info = {
                 "id": challenge.id,
@@ -74,7 +148,7 @@ async def get_day_data(
                 "subject": challenge.subject
             }
     
-    return {
+    return await entry.store({
         "date": study_date.isoformat(),
         "formattedDate": study_date.strftime("%d de %B, %Y"),
         "studyTime": f"{summary.study_time // 60}h {summary.study_time % 60}m",
@@ -84,13 +158,72 @@ async def get_day_data(
         "photo": summary.photo_url,
         "objectives": [obj.objective_text for obj in summary.objectives],
         "completed": True
-    }
+    })
+
+
+def _overview_statement(user_id: int, week_start: date, today: date):
+    """
+    Monta uma única consulta (UNION ALL) com todas as seções do dashboard.
+    
+    Cada linha traz o tipo (`kind`) e colunas genéricas preenchidas conforme o
+    tipo, para que desafios, resumos recentes, resultados recentes e o total
+    semanal venham em uma só ida ao banco.
+    """
+    def columns(kind, id=None, n1=None, n2=None, n3=None, n4=None, t1=None, t2=None, d=None, ts=None):
+        typed = [
+            (id, Integer, "id"), (n1, Integer, "n1"), (n2, Integer, "n2"), (n3, Integer, "n3"),
+            (n4, Integer, "n4"), (t1, String, "t1"), (t2, String, "t2"), (d, Date, "d"),
+            (ts, DateTime(timezone=True), "ts"),
+        ]
+        return [literal_column(f"'{kind}'", String).label("kind")] + [
+            (cast(null(), type_) if value is None else value).label(name)
+            for value, type_, name in typed
+        ]
+    
+    challenges = select(*columns(
+        "challenge", id=Challenge.id, n1=Challenge.daily_time, n2=Challenge.duration,
+        t1=Challenge.name, t2=Challenge.subject
+    )).where(Challenge.user_id == user_id)
+    
+    # Totais diários pré-agregados da última semana
+    weekly = select(*columns(
+        "week",
+        n1=func.coalesce(func.sum(StudyRollup.study_time), 0),
+        n2=func.coalesce(func.sum(case((StudyRollup.study_sessions > 0, 1), else_=0)), 0)
+    )).where(
+        StudyRollup.user_id == user_id,
+        StudyRollup.period == "day",
+        StudyRollup.period_start >= week_start,
+        StudyRollup.period_start <= today
+    )
+    
+    # Últimos 5 resumos (texto truncado já no banco)
+    recent = select(
+        Summary.id, Summary.study_time, Summary.difficulty, Summary.study_date,
+        func.substr(Summary.summary_text, 1, 101).label("summary_text")
+    ).where(Summary.user_id == user_id).order_by(Summary.study_date.desc()).limit(5).subquery()
+    summaries = select(*columns(
+        "summary", id=recent.c.id, n1=recent.c.study_time, t1=recent.c.difficulty,
+        t2=recent.c.summary_text, d=recent.c.study_date
+    ))
+    
+    # Últimos 5 resultados de testes
+    latest = select(
+        TestResult.id, TestResult.summary_id, TestResult.score, TestResult.correct_count,
+        TestResult.total_count, TestResult.created_at
+    ).where(TestResult.user_id == user_id).order_by(TestResult.created_at.desc()).limit(5).subquery()
+    results = select(*columns(
+        "result", id=latest.c.id, n1=latest.c.summary_id, n2=latest.c.score,
+        n3=latest.c.correct_count, n4=latest.c.total_count, ts=latest.c.created_at
+    ))
+    
+    return union_all(challenges, weekly, summaries, results)
 
 
 @router.get("/dashboard/overview", response_model=Dict[str, Any])
 async def get_dashboard_overview(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Obtém uma visão geral do dashboard do usuário.
@@ -101,62 +234,59 @@ async def get_dashboard_overview(
     - Metas do mês
     - Últimos resumos
     """
-    # Obter desafios ativos
-    challenges = db.query(Challenge).filter(Challenge.user_id == current_user.id).all()
-    
-    # Obter resumos da última semana
-    seven_days_ago = date.today() - timedelta(days=7)
-    weekly_summaries = db.query(Summary).filter(
-        Summary.user_id == current_user.id,
-        Summary.study_date >= seven_days_ago
-    ).all()
-    
-    # Calcular tempo total de estudo da semana
-    total_study_time = sum(s.study_time for s in weekly_summaries)
-    
-    # Obter últimos 5 resumos
-    recent_summaries = db.query(Summary).filter(
-        Summary.user_id == current_user.id
-    ).order_by(Summary.study_date.desc()).limit(5).all()
-    
-    # Obter resultados de testes
-    test_results = db.query(TestResult).filter(
-        TestResult.user_id == current_user.id
-    ).order_by(TestResult.created_at.desc()).limit(5).all()
-    
-    return {
+    today = date.today()
+    
+    # A resposta fica em cache por usuário até a próxima escrita (ou a virada do dia)
+    entry = await read_cache.lookup(current_user.id, "overview", today)
+    if entry.hit:
+        return entry.response()
+    
+    seven_days_ago = today - timedelta(days=7)
+    result = await db.execute(_overview_statement(current_user.id, seven_days_ago, today))
+    
+    challenges, summaries, results = [], [], []
+    total_study_time = total_study_days = 0
+    for row in result.all():
+        if row.kind == "challenge":
+            challenges.append({
+                "id": row.id,
+                "name": row.t1,
+                "subject": row.t2,
+                "dailyTime": row.n1,
+                "duration": row.n2
+            })
+        elif row.kind == "week":
+            total_study_time, total_study_days = row.n1, row.n2
+        elif row.kind == "summary":
+            summaries.append({
+                "id": row.id,
+                "date": row.d.isoformat(),
+                "studyTime": row.n1,
+                "difficulty": row.t1,
+                "summary": row.t2[:100] + "..." if len(row.t2) > 100 else row.t2
+            })
+        else:
+            results.append({
+                "id": row.id,
+                "summaryId": row.n1,
+                "score": row.n2,
+                "correctCount": row.n3,
+                "totalCount": row.n4,
+                "date": row.ts.isoformat()
+            })
+    
+    # UNION ALL não preserva a ordem de cada parte
+    challenges.sort(key=lambda c: c["id"])
+    summaries.sort(key=lambda s: s["date"], reverse=True)
+    results.sort(key=lambda r: r["date"], reverse=True)
+    
+    overview = {
         "activeChallenges": len(challenges),
         "weeklyStudyTime": f"{total_study_time // 60}h {total_study_time % 60}m",
-        "totalStudyDays": len(weekly_summaries),
-        "challenges": [
-            {
-                "id": c.id,
-                "name": c.name,
-                "subject": c.subject,
-                "dailyTime": c.daily_time,
-                "duration": c.duration
-            }
-            for c in challenges
-        ],
-        "recentSummaries": [
-            {
-                "id": s.id,
-                "date": s.study_date.isoformat(),
-                "studyTime": s.study_time,
-                "difficulty": s.difficulty,
-                "summary": s.summary_text[:100] + "..." if len(s.summary_text) > 100 else s.summary_text
-            }
-            for s in recent_summaries
-        ],
-        "recentResults": [
-            {
-                "id": r.id,
-                "summaryId": r.summary_id,
-                "score": r.score,
-                "correctCount": r.correct_count,
-                "totalCount": r.total_count,
-                "date": r.created_at.isoformat()
-            }
-            for r in test_results
-        ]
+        "totalStudyDays": total_study_days,
+        "challenges": challenges,
+        "recentSummaries": summaries,
+        "recentResults": results
     }
+    
+    return await entry.store(overview)
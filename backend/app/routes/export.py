@@ -0,0 +1,29 @@
+from datetime import date
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.utils.auth import get_current_user, UserSnapshot
+from app.utils.export import FORMATS, export_user
+
+router = APIRouter(prefix="/api/export", tags=["Exportação"])
+
+
+@router.get("", response_class=StreamingResponse)
+async def export_account(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """
+    Exporta todos os dados do usuário: desafios, resumos, objetivos, perguntas,
+    resultados e respostas.
+    
+    - **format**: `ndjson` (um registro JSON por linha, com o campo `type`) ou
+      `csv` (primeira coluna `type`; cada tabela começa com o seu cabeçalho)
+    
+    A resposta é enviada em streaming, à medida que as linhas são lidas do banco.
+    """
+    filename = f"studybuddy-export-{current_user.id}-{date.today().isoformat()}.{format}"
+    return StreamingResponse(
+        export_user(current_user.id, format),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,153 @@
+import os
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import dialect_insert, get_db
+from app.models import PhotoAsset, PhotoAssetUser
+from app.schemas.photo import PhotoAssetResponse
+from app.utils.auth import get_current_user, UserSnapshot
+from app.utils.photos import (
+    CACHE_CONTROL,
+    VARIANTS,
+    asset_path,
+    asset_urls,
+    file_chunks,
+    is_sha256,
+    parse_range,
+    photo_url,
+    receive_photo,
+    store_upload,
+)
+from app.utils.jobs import enqueue
+
+router = APIRouter(prefix="/api/photos", tags=["Fotos"])
+
+
+def _asset_response(asset: PhotoAsset) -> dict:
+    return {
+        "id": asset.id,
+        "sha256": asset.sha256,
+        "content_type": asset.content_type,
+        "size": asset.size,
+        "width": asset.width,
+        "height": asset.height,
+        "url": photo_url(asset.sha256),
+        "variants": asset_urls(asset.sha256, asset.variants),
+        "created_at": asset.created_at,
+    }
+
+
+async def _link_owner(db: AsyncSession, asset_id: int, user_id: int) -> None:
+    """Registra o usuário como dono da foto (idempotente)"""
+    await db.execute(
+        dialect_insert(db, PhotoAssetUser)
+        .values(asset_id=asset_id, user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["asset_id", "user_id"])
+    )
+
+
+@router.post("", response_model=PhotoAssetResponse, status_code=status.HTTP_201_CREATED)
+async def upload_photo(
+    request: Request,
+    response: Response,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Envia uma foto (multipart/form-data, campo **file**; JPEG, PNG, GIF ou WebP).
+    
+    O arquivo é gravado em streaming e identificado pelo SHA-256: reenviar o
+    mesmo conteúdo retorna a foto já existente (200). As versões reduzidas
+    aparecem em `variants` depois de geradas em segundo plano.
+    
+    Só quem enviou o conteúdo pode usar o `id` em desafios e resumos.
+    """
+    upload = await receive_photo(request)
+    
+    result = await db.execute(select(PhotoAsset).where(PhotoAsset.sha256 == upload.sha256))
+    asset = result.scalar_one_or_none()
+    if asset is not None:
+        await anyio.to_thread.run_sync(upload.discard)
+        await _link_owner(db, asset.id, current_user.id)
+        await db.commit()
+        response.status_code = status.HTTP_200_OK
+        return _asset_response(asset)
+    
+    await anyio.to_thread.run_sync(store_upload, upload)
+    # Envio concorrente do mesmo conteúdo: o primeiro registro prevalece
+    result = await db.execute(
+        dialect_insert(db, PhotoAsset)
+        .values(sha256=upload.sha256, content_type=upload.content_type, size=upload.size, created_by=current_user.id)
+        .on_conflict_do_nothing(index_elements=["sha256"])
+        .returning(PhotoAsset.id)
+    )
+    asset_id = result.scalar_one_or_none()
+    # Versões geradas pela fila de jobs, enfileiradas na mesma transação do registro
+    if asset_id is not None:
+        await enqueue(db, "photo_variants", {"asset_id": asset_id, "sha256": upload.sha256}, queue="photos")
+    
+    result = await db.execute(select(PhotoAsset).where(PhotoAsset.sha256 == upload.sha256))
+    asset = result.scalar_one()
+    await _link_owner(db, asset.id, current_user.id)
+    await db.commit()
+    return _asset_response(asset)
+
+
+async def _serve(request: Request, path: str, content_type: str, etag: str) -> Response:
+    """Serve o arquivo com cache imutável, ETag e suporte a Range"""
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": etag, "Accept-Ranges": "bytes"}
+    if request.headers.get("if-none-match") in (etag, f"W/{etag}"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    try:
+        size = (await anyio.to_thread.run_sync(os.stat, path)).st_size
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada")
+    
+    # If-Range diferente do ETag atual: o cliente precisa do arquivo inteiro
+    if_range = request.headers.get("if-range")
+    byte_range = parse_range(request.headers.get("range"), size) if if_range in (None, etag) else None
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(file_chunks(path, 0, size - 1), media_type=content_type, headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        file_chunks(path, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=content_type,
+        headers=headers,
+    )
+
+
+@router.get("/{sha256}", response_class=Response)
+async def get_photo(sha256: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Serve a foto original.
+    
+    A URL é derivada do conteúdo, então pode ser usada direto em `<img>` sem
+    autenticação e guardada em cache indefinidamente.
+    """
+    if not is_sha256(sha256):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada")
+    
+    # Só o tipo é necessário; o arquivo vem do disco
+    result = await db.execute(select(PhotoAsset.content_type).where(PhotoAsset.sha256 == sha256))
+    content_type = result.scalar_one_or_none()
+    if content_type is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada")
+    
+    return await _serve(request, asset_path(sha256), content_type, f'"{sha256}"')
+
+
+@router.get("/{sha256}/{variant}", response_class=Response)
+async def get_photo_variant(sha256: str, variant: str, request: Request):
+    """Serve uma versão reduzida da foto (thumb ou medium), em JPEG"""
+    if not is_sha256(sha256) or variant not in VARIANTS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada")
+    
+    return await _serve(request, asset_path(sha256, variant), "image/jpeg", f'"{sha256}-{variant}"')
@@ -1,19 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from email.utils import parsedate_to_datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.database import get_db
-from app.models import User, Question, Summary
-from app.schemas.question import QuestionCreate, QuestionResponse
-from app.utils.auth import get_current_user
+from app.models import Question, Summary
+from app.schemas.question import QuestionCreate, QuestionBulkCreate, QuestionGenerationReport, QuestionResponse
+from app.utils.auth import get_current_user, UserSnapshot
+from app.utils.conditional import cache_headers, is_not_modified, make_etag, not_modified
+from app.utils.question_generator import generate_summary_questions
+from app.utils.read_cache import invalidate_user_reads, read_cache
+from app.utils.responses import row_dicts, schema_columns
 
 router = APIRouter(prefix="/api/questions", tags=["Perguntas"])
 
 
+async def _touch_summaries(db: AsyncSession, user_id: int, summary_ids) -> None:
+    """Atualiza `updated_at` dos resumos do usuário, que versiona (ETag) a lista de perguntas"""
+    await db.execute(
+        update(Summary)
+        .where(Summary.id.in_(set(summary_ids)), Summary.user_id == user_id)
+        .values(updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
 @router.post("", response_model=QuestionResponse, status_code=status.HTTP_201_CREATED)
 async def create_question(
     question_data: QuestionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Cria uma nova pergunta para um resumo.
@@ -24,10 +40,13 @@ async def create_question(
     - **correct_answer**: Resposta correta (a, b, c, d ou e)
     """
     # Verificar se o resumo existe e pertence ao usuário
-    summary = db.query(Summary).filter(
-        Summary.id == question_data.summary_id,
-        Summary.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Summary.id).where(
+            Summary.id == question_data.summary_id,
+            Summary.user_id == current_user.id
+        )
+    )
+    summary = result.first()
     
     if not summary:
         raise HTTPException(
@@ -44,24 +63,117 @@ async def create_question(
     )
     
     db.add(new_question)
-    db.commit()
-    db.refresh(new_question)
+    await _touch_summaries(db, current_user.id, [question_data.summary_id])
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
+    await db.refresh(new_question)
     
     return new_question
 
 
+@router.post("/bulk", response_model=List[QuestionResponse], status_code=status.HTTP_201_CREATED)
+async def create_questions_bulk(
+    bulk_data: QuestionBulkCreate,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Cria várias perguntas de uma vez, para um ou mais resumos.
+    
+    - **questions**: Lista de perguntas no mesmo formato de `POST /api/questions`
+    
+    A posse dos resumos é verificada em uma única consulta e as perguntas são
+    inseridas com INSERT multi-linha + RETURNING. Se algum resumo não pertencer
+    ao usuário, nada é inserido.
+    """
+    # Verificar de uma vez se todos os resumos existem e pertencem ao usuário
+    summary_ids = {question.summary_id for question in bulk_data.questions}
+    result = await db.execute(
+        select(Summary.id).where(
+            Summary.id.in_(summary_ids),
+            Summary.user_id == current_user.id
+        )
+    )
+    missing = summary_ids - set(result.scalars().all())
+    
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Resumo não encontrado: {', '.join(str(i) for i in sorted(missing))}"
+        )
+    
+    # INSERT ... VALUES (...), (...) RETURNING, em lotes automáticos do SQLAlchemy
+    result = await db.scalars(
+        insert(Question).returning(Question, sort_by_parameter_order=True),
+        [question.model_dump() for question in bulk_data.questions]
+    )
+    questions = result.all()
+    await _touch_summaries(db, current_user.id, summary_ids)
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
+    
+    return questions
+
+
+@router.post("/generate/{summary_id}", response_model=QuestionGenerationReport)
+async def generate_questions(
+    summary_id: int,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Gera perguntas automaticamente a partir do texto e dos objetivos de um resumo.
+    
+    Perguntas de lacuna (termos-chave do texto) e de múltipla escolha (qual
+    trecho trata de cada objetivo), sempre com quatro alternativas. A geração é
+    local e determinística: chamar de novo sem editar o resumo não recalcula
+    nada; depois de uma edição, só os trechos alterados geram perguntas novas e
+    as perguntas de trechos removidos são apagadas (as já respondidas são
+    mantidas). Perguntas criadas manualmente não são afetadas.
+    """
+    report = await generate_summary_questions(db, current_user.id, summary_id)
+    
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resumo não encontrado"
+        )
+    if not report["unchanged"]:
+        await invalidate_user_reads(current_user.id)
+    
+    result = await db.execute(
+        select(*schema_columns(QuestionResponse, Question))
+        .where(Question.summary_id == summary_id, Question.source_hash.isnot(None))
+        .order_by(Question.id)
+    )
+    return {**report, "questions": row_dicts(result)}
+
+
 @router.get("/summary/{summary_id}", response_model=List[QuestionResponse])
 async def list_questions_by_summary(
     summary_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Lista todas as perguntas de um resumo específico"""
-    # Verificar se o resumo existe e pertence ao usuário
-    summary = db.query(Summary).filter(
-        Summary.id == summary_id,
-        Summary.user_id == current_user.id
-    ).first()
+    """Lista todas as perguntas de um resumo específico (aceita If-None-Match / If-Modified-Since)"""
+    # O ETag e o Last-Modified ficam no cache junto com o corpo
+    entry = await read_cache.lookup(current_user.id, "questions", "summary", summary_id)
+    if entry.hit:
+        headers = entry.headers
+        last_modified = parsedate_to_datetime(headers["Last-Modified"])
+        if is_not_modified(request, headers["ETag"], last_modified):
+            return not_modified(headers["ETag"], last_modified)
+        return entry.response()
+    
+    # Verificar se o resumo existe e pertence ao usuário; o updated_at versiona a lista
+    result = await db.execute(
+        select(Summary.updated_at).where(
+            Summary.id == summary_id,
+            Summary.user_id == current_user.id
+        )
+    )
+    summary = result.first()
     
     if not summary:
         raise HTTPException(
@@ -69,21 +181,33 @@ async def list_questions_by_summary(
             detail="Resumo não encontrado"
         )
     
-    questions = db.query(Question).filter(Question.summary_id == summary_id).all()
-    return questions
+    etag = make_etag("questions", summary_id, summary.updated_at)
+    if is_not_modified(request, etag, summary.updated_at):
+        return not_modified(etag, summary.updated_at)
+    
+    # Colunas do schema direto em tuplas: sem objetos ORM nem revalidação
+    result = await db.execute(
+        select(*schema_columns(QuestionResponse, Question))
+        .where(Question.summary_id == summary_id)
+        .order_by(Question.id)
+    )
+    return await entry.store(row_dicts(result), headers=cache_headers(etag, summary.updated_at))
 
 
 @router.get("/{question_id}", response_model=QuestionResponse)
 async def get_question(
     question_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Obtém detalhes de uma pergunta específica"""
-    question = db.query(Question).join(Summary).filter(
-        Question.id == question_id,
-        Summary.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Question).join(Summary).where(
+            Question.id == question_id,
+            Summary.user_id == current_user.id
+        )
+    )
+    question = result.scalar_one_or_none()
     
     if not question:
         raise HTTPException(
@@ -98,14 +222,17 @@ async def get_question(
 async def update_question(
     question_id: int,
     question_data: QuestionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Atualiza uma pergunta existente"""
-    question = db.query(Question).join(Summary).filter(
-        Question.id == question_id,
-        Summary.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Question).join(Summary).where(
+            Question.id == question_id,
+            Summary.user_id == current_user.id
+        )
+    )
+    question = result.scalar_one_or_none()
     
     if not question:
         raise HTTPException(
@@ -113,14 +240,33 @@ async def update_question(
             detail="Pergunta não encontrada"
         )
     
+    # Movida para outro resumo: o destino também precisa ser do usuário
+    if question.summary_id != question_data.summary_id:
+        result = await db.execute(
+            select(Summary.id).where(
+                Summary.id == question_data.summary_id,
+                Summary.user_id == current_user.id
+            )
+        )
+        if not result.first():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Resumo não encontrado"
+            )
+        # Deixa de ser tratada como gerada
+        question.source_hash = None
+    
+    await _touch_summaries(db, current_user.id, [question.summary_id, question_data.summary_id])
+    
     # Atualizar campos
     question.summary_id = question_data.summary_id
     question.text = question_data.text
     question.options = question_data.options
     question.correct_answer = question_data.correct_answer
     
-    db.commit()
-    db.refresh(question)
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
+    await db.refresh(question)
     
     return question
 
@@ -128,14 +274,17 @@ async def update_question(
 @router.delete("/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_question(
     question_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Deleta uma pergunta"""
-    question = db.query(Question).join(Summary).filter(
-        Question.id == question_id,
-        Summary.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Question).join(Summary).where(
+            Question.id == question_id,
+            Summary.user_id == current_user.id
+        )
+    )
+    question = result.scalar_one_or_none()
     
     if not question:
         raise HTTPException(
@@ -143,5 +292,7 @@ async def delete_question(
             detail="Pergunta não encontrada"
         )
     
-    db.delete(question)
-    db.commit()
+    await _touch_summaries(db, current_user.id, [question.summary_id])
+    await db.delete(question)
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
@@ -0,0 +1,65 @@
+from datetime import datetime, time
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import dialect_insert, get_db
+from app.models import StudyReminder
+from app.schemas.reminder import ReminderResponse, ReminderUpdate
+from app.utils.auth import get_current_user, UserSnapshot
+from app.utils.reminders import next_occurrence
+
+router = APIRouter(prefix="/api/reminders", tags=["Lembretes"])
+
+
+def _reminder_response(reminder: StudyReminder) -> dict:
+    return {
+        "time": time(reminder.remind_minute // 60, reminder.remind_minute % 60),
+        "enabled": reminder.enabled,
+        "next_at": reminder.next_at,
+        "last_sent_on": reminder.last_sent_on,
+    }
+
+
+@router.get("", response_model=ReminderResponse)
+async def get_reminder(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtém o lembrete diário de estudo (criado junto com o primeiro desafio)"""
+    result = await db.execute(select(StudyReminder).where(StudyReminder.user_id == current_user.id))
+    reminder = result.scalar_one_or_none()
+    
+    if not reminder:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lembrete não encontrado"
+        )
+    
+    return _reminder_response(reminder)
+
+
+@router.put("", response_model=ReminderResponse)
+async def update_reminder(
+    reminder_data: ReminderUpdate,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Define o horário do lembrete diário ou o desativa.
+    
+    - **time**: Horário (HH:MM). O lembrete só é enviado nos dias sem resumo registrado
+    - **enabled**: `false` desativa os lembretes
+    """
+    result = await db.execute(select(StudyReminder.last_sent_on).where(StudyReminder.user_id == current_user.id))
+    last_sent_on = result.scalar_one_or_none()
+    
+    minute = reminder_data.time.hour * 60 + reminder_data.time.minute
+    # Quem já recebeu o lembrete hoje só volta a receber amanhã
+    next_at = next_occurrence(minute, datetime.now().astimezone(), skip_day=last_sent_on) if reminder_data.enabled else None
+    values = {"remind_minute": minute, "enabled": reminder_data.enabled, "next_at": next_at}
+    stmt = dialect_insert(db, StudyReminder).values(user_id=current_user.id, **values)
+    await db.execute(stmt.on_conflict_do_update(index_elements=["user_id"], set_=values))
+    await db.commit()
+    
+    result = await db.execute(select(StudyReminder).where(StudyReminder.user_id == current_user.id))
+    return _reminder_response(result.scalar_one())
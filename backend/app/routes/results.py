@@ -1,23 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.models import User, TestResult, Answer, Question, Summary
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Optional
+from app.database import dialect_insert, get_db
+from app.models import TestResult, Answer, Question, Summary
 from app.schemas.test_result import (
     TestResultResponse,
     SubmitAnswersRequest,
     AnswerResponse
 )
-from app.utils.auth import get_current_user
+from app.schemas.pagination import Page
+from app.utils.auth import get_current_user, UserSnapshot
+from app.utils.read_cache import invalidate_user_reads, read_cache
+from app.utils.rollups import TEST_DAY, add_test_stats
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, build_page, decode_cursor
+from app.utils.responses import load_children, row_dicts, schema_columns
 
 router = APIRouter(prefix="/api/results", tags=["Resultados"])
 
 
+async def _get_user_result(db: AsyncSession, user_id: int, result_id: int) -> Optional[TestResult]:
+    """Carrega um resultado do usuário já com as respostas (sem lazy load)"""
+    result = await db.execute(
+        select(TestResult)
+        .options(selectinload(TestResult.answers))
+        .where(TestResult.id == result_id, TestResult.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
 @router.post("/submit", response_model=TestResultResponse, status_code=status.HTTP_201_CREATED)
 async def submit_answers(
     request: SubmitAnswersRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=64),
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Submete as respostas de um teste e calcula o resultado.
@@ -25,99 +44,137 @@ async def submit_answers(
     - **summary_id**: ID do resumo
     - **answers**: Dicionário com as respostas (ex: {"q1": "a", "q2": "b", ...})
     - **time_spent**: Tempo gasto no teste em minutos (opcional)
+    
+    Envie o header `Idempotency-Key` para que novas tentativas do cliente
+    retornem o resultado já registrado em vez de corrigir e gravar de novo.
     """
-    # Verificar se o resumo existe e pertence ao usuário
-    summary = db.query(Summary).filter(
-        Summary.id == request.summary_id,
-        Summary.user_id == current_user.id
-    ).first()
+    # Repetição de uma submissão já registrada
+    if idempotency_key:
+        result = await db.execute(
+            select(TestResult.id).where(
+                TestResult.user_id == current_user.id,
+                TestResult.idempotency_key == idempotency_key
+            )
+        )
+        existing_id = result.scalar_one_or_none()
+        if existing_id is not None:
+            return await _get_user_result(db, current_user.id, existing_id)
     
-    if not summary:
+    # Verificar o resumo e obter o gabarito em uma única consulta
+    # (outer join: o resumo aparece mesmo sem perguntas)
+    result = await db.execute(
+        select(Summary.id, Question.id, Question.correct_answer)
+        .outerjoin(Question, Question.summary_id == Summary.id)
+        .where(
+            Summary.id == request.summary_id,
+            Summary.user_id == current_user.id
+        )
+    )
+    rows = result.all()
+    
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Resumo não encontrado"
         )
     
-    # Obter todas as perguntas do resumo
-    questions = db.query(Question).filter(Question.summary_id == request.summary_id).all()
+    answer_key = {question_id: correct_answer for _, question_id, correct_answer in rows if question_id is not None}
     
-    if not questions:
+    if not answer_key:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Este resumo não possui perguntas"
         )
     
     # Calcular o resultado
-    correct_count = 0
-    total_count = len(questions)
     answers_list = []
     
-    for question in questions:
+    for question_id, correct_answer in answer_key.items():
         # Obter a resposta do usuário
-        question_key = f"q{question.id}"
-        user_answer = request.answers.get(question_key)
+        user_answer = request.answers.get(f"q{question_id}")
         
         if user_answer is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Resposta faltando para a pergunta {question.id}"
+                detail=f"Resposta faltando para a pergunta {question_id}"
             )
         
-        # Verificar se a resposta está correta
-        is_correct = user_answer == question.correct_answer
-        
-        if is_correct:
-            correct_count += 1
-        
         answers_list.append({
-            "question_id": question.id,
+            "question_id": question_id,
             "user_answer": user_answer,
-            "is_correct": is_correct
+            "is_correct": user_answer == correct_answer
         })
     
     # Calcular a pontuação
+    total_count = len(answers_list)
+    correct_count = sum(1 for answer in answers_list if answer["is_correct"])
     score = int((correct_count / total_count) * 100)
     
-    # Criar o resultado do teste
-    test_result = TestResult(
-        user_id=current_user.id,
-        summary_id=request.summary_id,
-        score=score,
-        correct_count=correct_count,
-        total_count=total_count,
-        time_spent=request.time_spent
+    # Criar o resultado do teste (ON CONFLICT: outra tentativa com a mesma chave venceu)
+    result = await db.execute(
+        dialect_insert(db, TestResult)
+        .values(
+            user_id=current_user.id,
+            summary_id=request.summary_id,
+            score=score,
+            correct_count=correct_count,
+            total_count=total_count,
+            time_spent=request.time_spent,
+            idempotency_key=idempotency_key
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "idempotency_key"])
+        .returning(TestResult.id, TestResult.created_at, TEST_DAY.label("test_day"))
     )
+    inserted = result.first()
     
-    db.add(test_result)
-    db.flush()  # Para obter o ID do resultado
-    
-    # Adicionar as respostas
-    for answer_data in answers_list:
-        answer = Answer(
-            test_result_id=test_result.id,
-            question_id=answer_data["question_id"],
-            user_answer=answer_data["user_answer"],
-            is_correct=answer_data["is_correct"]
+    if inserted is None:
+        await db.rollback()
+        result = await db.execute(
+            select(TestResult.id).where(
+                TestResult.user_id == current_user.id,
+                TestResult.idempotency_key == idempotency_key
+            )
         )
-        db.add(answer)
+        return await _get_user_result(db, current_user.id, result.scalar_one())
+    
+    # Adicionar as respostas em um único INSERT multi-linha
+    for answer in answers_list:
+        answer["test_result_id"] = inserted.id
+    result = await db.execute(
+        insert(Answer).returning(Answer.id, Answer.created_at, sort_by_parameter_order=True),
+        answers_list
+    )
+    for answer, (answer_id, created_at) in zip(answers_list, result.all()):
+        answer["id"] = answer_id
+        answer["created_at"] = created_at
     
-    db.commit()
-    db.refresh(test_result)
+    # Mesmo dia que a remoção e a reconstrução dos totais calculam para este teste
+    await add_test_stats(db, current_user.id, inserted.test_day, score)
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
     
-    return test_result
+    # Resposta montada com os valores já conhecidos, sem reler o banco
+    return {
+        "id": inserted.id,
+        "user_id": current_user.id,
+        "summary_id": request.summary_id,
+        "score": score,
+        "correct_count": correct_count,
+        "total_count": total_count,
+        "time_spent": request.time_spent,
+        "answers": answers_list,
+        "created_at": inserted.created_at
+    }
 
 
 @router.get("/{result_id}", response_model=TestResultResponse)
 async def get_result(
     result_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Obtém detalhes de um resultado de teste específico"""
-    result = db.query(TestResult).filter(
-        TestResult.id == result_id,
-        TestResult.user_id == current_user.id
-    ).first()
+    result = await _get_user_result(db, current_user.id, result_id)
     
     if not result:
         raise HTTPException(
@@ -128,18 +185,32 @@ async def get_result(
     return result
 
 
-@router.get("/summary/{summary_id}", response_model=List[TestResultResponse])
+@router.get("/summary/{summary_id}", response_model=Page[TestResultResponse])
 async def list_results_by_summary(
     summary_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Lista todos os resultados de um resumo específico"""
+    """
+    Lista os resultados de um resumo específico, do mais recente para o mais antigo.
+    
+    - **limit**: Quantidade máxima de resultados por página
+    - **cursor**: Valor de `next_cursor` da página anterior
+    """
+    entry = await read_cache.lookup(current_user.id, "results", "summary", summary_id, limit, cursor)
+    if entry.hit:
+        return entry.response()
+    
     # Verificar se o resumo existe
-    summary = db.query(Summary).filter(
-        Summary.id == summary_id,
-        Summary.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Summary.id).where(
+            Summary.id == summary_id,
+            Summary.user_id == current_user.id
+        )
+    )
+    summary = result.first()
     
     if not summary:
         raise HTTPException(
@@ -147,19 +218,58 @@ async def list_results_by_summary(
             detail="Resumo não encontrado"
         )
     
-    results = db.query(TestResult).filter(
-        TestResult.summary_id == summary_id,
-        TestResult.user_id == current_user.id
-    ).all()
+    # Colunas do schema direto em tuplas: sem objetos ORM nem revalidação
+    query = (
+        select(*schema_columns(TestResultResponse, TestResult, exclude=["answers"]))
+        .where(
+            TestResult.summary_id == summary_id,
+            TestResult.user_id == current_user.id
+        )
+        .order_by(TestResult.id.desc())
+        .limit(limit + 1)
+    )
+    
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(TestResult.id < last_id)
     
-    return results
+    result = await db.execute(query)
+    page = build_page(row_dicts(result), limit, lambda r: [r["id"]])
+    await load_children(db, page["items"], "answers", AnswerResponse, Answer, Answer.test_result_id)
+    return await entry.store(page)
 
 
-@router.get("", response_model=List[TestResultResponse])
+@router.get("", response_model=Page[TestResultResponse])
 async def list_all_results(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Lista todos os resultados do usuário atual"""
-    results = db.query(TestResult).filter(TestResult.user_id == current_user.id).all()
-    return results
+    """
+    Lista os resultados do usuário atual, do mais recente para o mais antigo.
+    
+    - **limit**: Quantidade máxima de resultados por página
+    - **cursor**: Valor de `next_cursor` da página anterior
+    """
+    entry = await read_cache.lookup(current_user.id, "results", "list", limit, cursor)
+    if entry.hit:
+        return entry.response()
+    
+    # Ordenação pelo índice (user_id, id)
+    # Colunas do schema direto em tuplas: sem objetos ORM nem revalidação
+    query = (
+        select(*schema_columns(TestResultResponse, TestResult, exclude=["answers"]))
+        .where(TestResult.user_id == current_user.id)
+        .order_by(TestResult.id.desc())
+        .limit(limit + 1)
+    )
+    
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(TestResult.id < last_id)
+    
+    result = await db.execute(query)
+    page = build_page(row_dicts(result), limit, lambda r: [r["id"]])
+    await load_children(db, page["items"], "answers", AnswerResponse, Answer, Answer.test_result_id)
+    return await entry.store(page)
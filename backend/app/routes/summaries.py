@@ -1,20 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import Optional
 from datetime import date
 from app.database import get_db
-from app.models import User, Summary, SummaryObjective
-from app.schemas.summary import SummaryCreate, SummaryResponse
-from app.utils.auth import get_current_user
+from app.models import Summary, SummaryObjective
+from app.schemas.pagination import Page
+from app.schemas.summary import (
+    SummaryCreate,
+    SummaryImportReport,
+    SummaryObjectiveResponse,
+    SummaryResponse,
+    SummarySearchResult,
+)
+from app.utils.auth import get_current_user, UserSnapshot
+from app.utils.conditional import has_conditional_headers, is_not_modified, make_etag, not_modified, set_cache_headers
+from app.utils.jobs import enqueue
+from app.utils.read_cache import invalidate_user_reads, read_cache
+from app.utils.rollups import add_summary_stats, remove_summary_tests
+from app.utils.search import index_summary, search_summaries, unindex_summary
+from app.utils.streaks import mark_study_day
+from app.utils.summary_import import IMPORT_FORMATS, import_summaries
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, build_page, decode_cursor
+from app.utils.photos import resolve_photo
+from app.utils.responses import load_children, row_dicts, schema_columns
 
 router = APIRouter(prefix="/api/summaries", tags=["Resumos"])
 
 
+async def _get_user_summary(db: AsyncSession, user_id: int, summary_id: int) -> Optional[Summary]:
+    """Carrega um resumo do usuário já com os objetivos (sem lazy load)"""
+    result = await db.execute(
+        select(Summary)
+        .options(selectinload(Summary.objectives))
+        .where(Summary.id == summary_id, Summary.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
 @router.post("", response_model=SummaryResponse, status_code=status.HTTP_201_CREATED)
 async def create_summary(
     summary_data: SummaryCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Cria um novo resumo de estudo.
@@ -25,13 +55,17 @@ async def create_summary(
     - **difficulty**: Nível de dificuldade (Fácil, Médio, Difícil)
     - **summary_text**: Texto do resumo
     - **photo_url**: URL da foto (opcional)
+    - **photo_asset_id**: ID de uma foto enviada em POST /api/photos (opcional, define a photo_url)
     - **objectives**: Lista de objetivos alcançados (opcional)
     """
     # Verificar se já existe um resumo para este dia
-    existing_summary = db.query(Summary).filter(
-        Summary.user_id == current_user.id,
-        Summary.study_date == summary_data.study_date
-    ).first()
+    result = await db.execute(
+        select(Summary.id).where(
+            Summary.user_id == current_user.id,
+            Summary.study_date == summary_data.study_date
+        )
+    )
+    existing_summary = result.first()
     
     if existing_summary:
         raise HTTPException(
@@ -47,48 +81,126 @@ async def create_summary(
         study_time=summary_data.study_time,
         difficulty=summary_data.difficulty,
         summary_text=summary_data.summary_text,
-        photo_url=summary_data.photo_url
+        photo_url=await resolve_photo(db, summary_data.photo_asset_id, current_user.id) or summary_data.photo_url,
+        photo_asset_id=summary_data.photo_asset_id,
+        # Adicionar objetivos se fornecidos
+        objectives=[
+            SummaryObjective(objective_text=objective_text)
+            for objective_text in summary_data.objectives or []
+        ]
     )
     
     db.add(new_summary)
-    db.flush()  # Para obter o ID do resumo
-    
-    # Adicionar objetivos se fornecidos
-    if summary_data.objectives:
-        for objective_text in summary_data.objectives:
-            objective = SummaryObjective(
-                summary_id=new_summary.id,
-                objective_text=objective_text
-            )
-            db.add(objective)
+    await db.flush()
+    await index_summary(db, new_summary.id, current_user.id, summary_data.summary_text, summary_data.objectives or [])
+    await add_summary_stats(db, current_user.id, new_summary.study_date, new_summary.study_time)
+    await mark_study_day(db, current_user.id, new_summary.study_date)
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
+    
+    return await _get_user_summary(db, current_user.id, new_summary.id)
+
+
+@router.post("/import", response_model=SummaryImportReport)
+async def import_user_summaries(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    on_conflict: str = Query("skip", pattern="^(skip|update)$"),
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Importa resumos em lote a partir de um arquivo CSV ou NDJSON enviado como corpo.
     
-    db.commit()
-    db.refresh(new_summary)
+    - **format**: `csv` ou `ndjson` (padrão: pelo Content-Type)
+    - **on_conflict**: `skip` ignora datas já registradas; `update` substitui o resumo e os objetivos
     
-    return new_summary
+    Linhas inválidas são reportadas em `errors` sem interromper as demais.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        format = IMPORT_FORMATS.get(content_type)
+        if format is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Envie text/csv ou application/x-ndjson (ou informe ?format=)"
+            )
+    
+    try:
+        report = await import_summaries(db, current_user.id, request.stream(), format, on_conflict)
+    finally:
+        await invalidate_user_reads(current_user.id)
+    return report
 
 
-@router.get("", response_model=List[SummaryResponse])
+@router.get("", response_model=Page[SummaryResponse])
 async def list_summaries(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Lista todos os resumos do usuário atual"""
-    summaries = db.query(Summary).filter(Summary.user_id == current_user.id).all()
-    return summaries
+    """
+    Lista os resumos do usuário atual, do mais recente para o mais antigo.
+    
+    - **limit**: Quantidade máxima de resumos por página
+    - **cursor**: Valor de `next_cursor` da página anterior
+    """
+    entry = await read_cache.lookup(current_user.id, "summaries", "list", limit, cursor)
+    if entry.hit:
+        return entry.response()
+    
+    # Ordenação pelo índice (user_id, study_date): páginas profundas custam o mesmo
+    # Colunas do schema direto em tuplas: sem objetos ORM nem revalidação
+    query = (
+        select(*schema_columns(SummaryResponse, Summary, exclude=["objectives"]))
+        .where(Summary.user_id == current_user.id)
+        .order_by(Summary.study_date.desc())
+        .limit(limit + 1)
+    )
+    
+    if cursor:
+        (last_date,) = decode_cursor(cursor, date.fromisoformat)
+        query = query.where(Summary.study_date < last_date)
+    
+    result = await db.execute(query)
+    page = build_page(row_dicts(result), limit, lambda s: [s["study_date"].isoformat()])
+    await load_children(db, page["items"], "objectives", SummaryObjectiveResponse, SummaryObjective, SummaryObjective.summary_id)
+    return await entry.store(page)
 
 
 @router.get("/by-date/{study_date}", response_model=SummaryResponse)
 async def get_summary_by_date(
     study_date: date,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Obtém o resumo de um dia específico"""
-    summary = db.query(Summary).filter(
-        Summary.user_id == current_user.id,
-        Summary.study_date == study_date
-    ).first()
+    """Obtém o resumo de um dia específico (aceita If-None-Match / If-Modified-Since)"""
+    # Checagem barata da versão antes de carregar o resumo
+    if has_conditional_headers(request):
+        result = await db.execute(
+            select(Summary.id, Summary.updated_at).where(
+                Summary.user_id == current_user.id,
+                Summary.study_date == study_date
+            )
+        )
+        version = result.first()
+        if version is not None:
+            etag = make_etag("summary", version.id, version.updated_at)
+            if is_not_modified(request, etag, version.updated_at):
+                return not_modified(etag, version.updated_at)
+    
+    result = await db.execute(
+        select(Summary)
+        .options(selectinload(Summary.objectives))
+        .where(
+            Summary.user_id == current_user.id,
+            Summary.study_date == study_date
+        )
+    )
+    summary = result.scalar_one_or_none()
     
     if not summary:
         raise HTTPException(
@@ -96,20 +208,58 @@ async def get_summary_by_date(
             detail="Resumo não encontrado para esta data"
         )
     
+    set_cache_headers(response, make_etag("summary", summary.id, summary.updated_at), summary.updated_at)
     return summary
 
 
+@router.get("/search", response_model=Page[SummarySearchResult])
+async def search_user_summaries(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Busca textual nos resumos e objetivos do usuário, dos mais relevantes aos menos.
+    
+    - **q**: Termos da busca (todos devem aparecer; aceita "frase exata" e -exclusão no PostgreSQL)
+    - **limit**: Quantidade máxima de resultados por página
+    - **cursor**: Valor de `next_cursor` da página anterior
+    """
+    entry = await read_cache.lookup(current_user.id, "summaries", "search", limit, cursor, q)
+    if entry.hit:
+        return entry.response()
+    
+    after = tuple(decode_cursor(cursor, float, int)) if cursor else None
+    hits = await search_summaries(db, current_user.id, q, limit + 1, after)
+    return await entry.store(build_page(hits, limit, lambda hit: [hit["rank"], hit["id"]]))
+
+
 @router.get("/{summary_id}", response_model=SummaryResponse)
 async def get_summary(
     summary_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Obtém detalhes de um resumo específico"""
-    summary = db.query(Summary).filter(
-        Summary.id == summary_id,
-        Summary.user_id == current_user.id
-    ).first()
+    """Obtém detalhes de um resumo específico (aceita If-None-Match / If-Modified-Since)"""
+    # Checagem barata da versão antes de carregar o resumo
+    if has_conditional_headers(request):
+        result = await db.execute(
+            select(Summary.updated_at).where(
+                Summary.id == summary_id,
+                Summary.user_id == current_user.id
+            )
+        )
+        updated_at = result.scalar_one_or_none()
+        if updated_at is not None:
+            etag = make_etag("summary", summary_id, updated_at)
+            if is_not_modified(request, etag, updated_at):
+                return not_modified(etag, updated_at)
+    
+    summary = await _get_user_summary(db, current_user.id, summary_id)
     
     if not summary:
         raise HTTPException(
@@ -117,6 +267,7 @@ async def get_summary(
             detail="Resumo não encontrado"
         )
     
+    set_cache_headers(response, make_etag("summary", summary.id, summary.updated_at), summary.updated_at)
     return summary
 
 
@@ -124,14 +275,11 @@ async def get_summary(
 async def update_summary(
     summary_id: int,
     summary_data: SummaryCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Atualiza um resumo existente"""
-    summary = db.query(Summary).filter(
-        Summary.id == summary_id,
-        Summary.user_id == current_user.id
-    ).first()
+    summary = await _get_user_summary(db, current_user.id, summary_id)
     
     if not summary:
         raise HTTPException(
@@ -139,42 +287,55 @@ async def update_summary(
             detail="Resumo não encontrado"
         )
     
+    # Atualizar os totais agregados (remove o valor antigo, soma o novo)
+    if (summary.study_date, summary.study_time) != (summary_data.study_date, summary_data.study_time):
+        await add_summary_stats(db, current_user.id, summary.study_date, summary.study_time, sign=-1)
+        await add_summary_stats(db, current_user.id, summary_data.study_date, summary_data.study_time)
+    
+    # Mover o dia no calendário de streak
+    if summary.study_date != summary_data.study_date:
+        await mark_study_day(db, current_user.id, summary.study_date, studied=False)
+        await mark_study_day(db, current_user.id, summary_data.study_date)
+    
     # Atualizar campos
     summary.challenge_id = summary_data.challenge_id
     summary.study_date = summary_data.study_date
     summary.study_time = summary_data.study_time
     summary.difficulty = summary_data.difficulty
     summary.summary_text = summary_data.summary_text
-    summary.photo_url = summary_data.photo_url
+    summary.photo_url = await resolve_photo(db, summary_data.photo_asset_id, current_user.id) or summary_data.photo_url
+    summary.photo_asset_id = summary_data.photo_asset_id
+    # Força nova versão (ETag) mesmo quando só os objetivos mudam
+    summary.updated_at = func.now()
     
-    # Atualizar objetivos
-    db.query(SummaryObjective).filter(SummaryObjective.summary_id == summary_id).delete()
+    # Atualizar objetivos (delete-orphan remove os antigos)
+    summary.objectives = [
+        SummaryObjective(objective_text=objective_text)
+        for objective_text in summary_data.objectives or []
+    ]
+    await index_summary(db, summary_id, current_user.id, summary_data.summary_text, summary_data.objectives or [])
     
-    if summary_data.objectives:
-        for objective_text in summary_data.objectives:
-            objective = SummaryObjective(
-                summary_id=summary_id,
-                objective_text=objective_text
-            )
-            db.add(objective)
+    # Resumo com perguntas geradas: atualiza as perguntas em segundo plano
+    if summary.questions_hash is not None:
+        await enqueue(
+            db, "generate_questions", {"user_id": current_user.id, "summary_id": summary_id},
+            key=f"generate_questions:{summary_id}"
+        )
     
-    db.commit()
-    db.refresh(summary)
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
     
-    return summary
+    return await _get_user_summary(db, current_user.id, summary_id)
 
 
 @router.delete("/{summary_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_summary(
     summary_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Deleta um resumo"""
-    summary = db.query(Summary).filter(
-        Summary.id == summary_id,
-        Summary.user_id == current_user.id
-    ).first()
+    summary = await _get_user_summary(db, current_user.id, summary_id)
     
     if not summary:
         raise HTTPException(
@@ -182,5 +343,12 @@ async def delete_summary(
             detail="Resumo não encontrado"
         )
     
-    db.delete(summary)
-    db.commit()
+    # Os testes do resumo são apagados em cascata: retirar dos totais também
+    await remove_summary_tests(db, current_user.id, summary_id)
+    await add_summary_stats(db, current_user.id, summary.study_date, summary.study_time, sign=-1)
+    await mark_study_day(db, current_user.id, summary.study_date, studied=False)
+    await unindex_summary(db, summary_id)
+    
+    await db.delete(summary)
+    await db.commit()
+    await invalidate_user_reads(current_user.id)
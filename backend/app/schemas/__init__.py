@@ -1,7 +1,8 @@
+from .pagination import Page
 from .user import UserCreate, UserLogin, UserResponse
 from .challenge import ChallengeCreate, ChallengeUpdate, ChallengeResponse
 from .summary import SummaryCreate, SummaryResponse, SummaryObjectiveResponse
-from .question import QuestionCreate, QuestionResponse
+from .question import QuestionCreate, QuestionBulkCreate, QuestionResponse
 from .test_result import (
     TestResultCreate, 
     TestResultResponse, 
@@ -10,6 +11,7 @@ from .test_result import (
 )
 
 __all__ = [
+    "Page",
     "UserCreate",
     "UserLogin",
     "UserResponse",
@@ -20,6 +22,7 @@ __all__ = [
     "SummaryResponse",
     "SummaryObjectiveResponse",
     "QuestionCreate",
+    "QuestionBulkCreate",
     "QuestionResponse",
     "TestResultCreate",
     "TestResultResponse",
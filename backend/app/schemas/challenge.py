@@ -11,6 +11,7 @@ class ChallengeCreate(BaseModel):
     daily_time: int  # Minutos
     duration: int  # Dias
     photo_url: Optional[str] = None
+    photo_asset_id: Optional[int] = None  # ID retornado por POST /api/photos
 
 
 class ChallengeUpdate(BaseModel):
@@ -21,6 +22,7 @@ class ChallengeUpdate(BaseModel):
     daily_time: Optional[int] = None
     duration: Optional[int] = None
     photo_url: Optional[str] = None
+    photo_asset_id: Optional[int] = None  # ID retornado por POST /api/photos
 
 
 class ChallengeResponse(BaseModel):
@@ -33,6 +35,7 @@ class ChallengeResponse(BaseModel):
     daily_time: int
     duration: int
     photo_url: Optional[str]
+    photo_asset_id: Optional[int]
     created_at: datetime
     updated_at: datetime
     
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Schema para resposta paginada por cursor"""
+    items: List[T]
+    next_cursor: Optional[str]  # None quando não há mais páginas
+    limit: int
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class PhotoAssetResponse(BaseModel):
+    """Schema para resposta de foto armazenada"""
+    id: int  # Usar em photo_asset_id de desafios e resumos
+    sha256: str
+    content_type: str
+    size: int
+    width: Optional[int]
+    height: Optional[int]
+    url: str
+    variants: Dict[str, str]  # Versões reduzidas já geradas (nome -> URL)
+    created_at: datetime
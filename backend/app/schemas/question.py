@@ -1,6 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List
+
+# Máximo de perguntas por requisição em lote
+MAX_BULK_QUESTIONS = 10000
 
 
 class QuestionCreate(BaseModel):
@@ -11,6 +14,11 @@ class QuestionCreate(BaseModel):
     correct_answer: str  # 'a', 'b', 'c', 'd', 'e'
 
 
+class QuestionBulkCreate(BaseModel):
+    """Schema para criar várias perguntas de uma vez (um ou mais resumos)"""
+    questions: List[QuestionCreate] = Field(..., min_length=1, max_length=MAX_BULK_QUESTIONS)
+
+
 class QuestionResponse(BaseModel):
     """Schema para resposta de pergunta"""
     id: int
@@ -22,3 +30,11 @@ class QuestionResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class QuestionGenerationReport(BaseModel):
+    """Resultado da geração automática de perguntas de um resumo"""
+    created: int
+    kept: int
+    removed: int
+    questions: List[QuestionResponse]  # Todas as perguntas geradas do resumo
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from datetime import date, datetime, time
+from typing import Optional
+
+
+class ReminderUpdate(BaseModel):
+    """Schema para configurar o lembrete diário de estudo"""
+    time: time  # Horário do lembrete (HH:MM, horário do servidor)
+    enabled: bool = True
+
+
+class ReminderResponse(BaseModel):
+    """Schema para resposta do lembrete diário"""
+    time: time
+    enabled: bool
+    next_at: Optional[datetime] = None  # Próximo envio (se ainda não tiver estudado no dia)
+    last_sent_on: Optional[date] = None
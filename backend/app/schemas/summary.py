@@ -20,6 +20,7 @@ class SummaryCreate(BaseModel):
     difficulty: str
     summary_text: str
     photo_url: Optional[str] = None
+    photo_asset_id: Optional[int] = None  # ID retornado por POST /api/photos
     objectives: Optional[List[str]] = None
     
     @field_validator('difficulty')
@@ -41,9 +42,36 @@ class SummaryResponse(BaseModel):
     difficulty: str
     summary_text: str
     photo_url: Optional[str]
+    photo_asset_id: Optional[int]
     objectives: List[SummaryObjectiveResponse]
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
+
+
+class SummarySearchResult(BaseModel):
+    """Schema para resultado da busca textual de resumos"""
+    id: int
+    challenge_id: Optional[int]
+    study_date: date
+    difficulty: str
+    rank: float
+    snippet: str  # Trecho do resumo, HTML escapado, com os termos entre <mark>
+    objectives: List[str]  # Objetivos que contêm os termos, também destacados
+
+
+class SummaryImportError(BaseModel):
+    """Erro de uma linha da importação"""
+    line: int  # Linha do arquivo (início do registro, no CSV); 0 para erros gerais
+    errors: List[str]
+
+
+class SummaryImportReport(BaseModel):
+    """Schema para o relatório da importação de resumos"""
+    inserted: int
+    updated: int
+    skipped: int  # Datas já registradas (com on_conflict=skip)
+    failed: int
+    errors: List[SummaryImportError]  # Até 1000 erros detalhados
@@ -42,3 +42,16 @@ class TokenResponse(BaseModel):
     access_token: str
     token_type: str
     user: UserResponse
+
+
+class SessionResponse(BaseModel):
+    """Schema para resposta de sessão de login ativa"""
+    id: int
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    created_at: datetime
+    expires_at: datetime
+    current: bool = False  # Sessão do token usado na requisição
+    
+    class Config:
+        from_attributes = True
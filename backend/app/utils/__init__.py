@@ -1,9 +1,18 @@
-from .security import hash_password, verify_password, create_access_token, decode_token
+from .security import (
+    hash_password,
+    verify_password,
+    hash_password_async,
+    verify_password_async,
+    create_access_token,
+    decode_token,
+)
 from .auth import get_current_user
 
 __all__ = [
     "hash_password",
     "verify_password",
+    "hash_password_async",
+    "verify_password_async",
     "create_access_token",
     "decode_token",
     "get_current_user",
@@ -1,47 +1,152 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
 from app.database import get_db
 from app.models import User
+from app.utils.lru_cache import LRUCache
 from app.utils.security import decode_token
+from app.utils.sessions import revoked_sessions
 
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Obtém o usuário atual a partir do token JWT"""
-    token = credentials.credentials
-    
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Cópia leve e imutável do usuário autenticado (sem sessão do ORM)"""
+    id: int
+    username: str
+    email: str
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            created_at=user.created_at,
+            updated_at=user.updated_at
+        )
+
+
+# Cache de token verificado -> (id do usuário, sid) (evita checar a assinatura do JWT)
+token_cache = LRUCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+# Cache de id do usuário -> UserSnapshot (evita a consulta na tabela User)
+user_cache = LRUCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_cache(mapper, connection, target):
+    """Remove o usuário do cache sempre que a linha muda"""
+    user_cache.pop(target.id)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Invalida o cache de um usuário (para alterações feitas fora do ORM)"""
+    user_cache.pop(user_id)
+
+
+def principal_cache_stats() -> dict:
+    """Contadores de acerto/erro dos caches de autenticação"""
+    return {
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats(),
+        "revoked_sessions": revoked_sessions.stats(),
+    }
+
+
+def _resolve_token(token: str) -> Tuple[int, Optional[str]]:
+    """Valida o JWT (ou usa o cache) e retorna o id do usuário e o id da sessão"""
+    principal = token_cache.get(token)
+    if principal is not None:
+        return principal
+
     # Decodificar o token
     payload = decode_token(token)
-    
+
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido ou expirado",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     user_id = payload.get("sub")
-    
-    if user_id is None:
+
+    if user_id is None or not str(user_id).isdigit():
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    # O token nunca fica no cache além da própria expiração
+    principal = (int(user_id), payload.get("sid"))
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    token_cache.set(token, principal, ttl=expires_in)
+
+    return principal
+
+
+def _check_session(sid: Optional[str]) -> None:
+    """Rejeita tokens de sessões revogadas (consulta só a lista em memória, sem banco)"""
+    # Tokens emitidos antes do registro de sessões não têm `sid` e valem até expirar
+    if sid is not None and revoked_sessions.is_revoked(sid):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sessão encerrada",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+async def get_current_user(
+    credentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> UserSnapshot:
+    """Obtém o usuário atual a partir do token JWT"""
+    user_id, sid = _resolve_token(credentials.credentials)
+    _check_session(sid)
+
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
     # Buscar o usuário no banco de dados
-    user = db.query(User).filter(User.id == user_id).first()
-    
-    if user is None:
+    result = await db.execute(select(User).where(User.id == user_id))
+    db_user = result.scalar_one_or_none()
+
+    if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário não encontrado",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    user = UserSnapshot.from_user(db_user)
+    user_cache.set(user_id, user)
+
     return user
+
+
+async def get_current_session_id(
+    credentials = Depends(security),
+    current_user: UserSnapshot = Depends(get_current_user)
+) -> Optional[str]:
+    """Id (`sid`) da sessão do token atual, já validado por `get_current_user`"""
+    _, sid = _resolve_token(credentials.credentials)
+    return sid
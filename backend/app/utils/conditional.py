@@ -0,0 +1,66 @@
+"""
+GET condicional (ETag / Last-Modified) a partir do `updated_at` das linhas.
+
+As rotas consultam apenas a versão da linha quando o cliente envia
+`If-None-Match` ou `If-Modified-Since`; se nada mudou, respondem 304 sem
+carregar nem serializar o corpo.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devolve datas sem fuso; o PostgreSQL, com fuso
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def make_etag(kind: str, key, version: datetime) -> str:
+    """ETag forte derivada do tipo do recurso, da chave e do `updated_at`"""
+    micros = int(_as_utc(version).timestamp() * 1_000_000)
+    return f'"{kind}-{key}-{micros:x}"'
+
+
+def has_conditional_headers(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Avalia If-None-Match (prioritário) ou If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # Comparação fraca, como pede a RFC 9110 para If-None-Match
+        return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # Last-Modified tem precisão de segundos
+        return _as_utc(last_modified).replace(microsecond=0) <= since
+
+    return False
+
+
+def cache_headers(etag: str, last_modified: datetime) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(_as_utc(last_modified), usegmt=True),
+        # O navegador pode guardar, mas deve revalidar sempre
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def not_modified(etag: str, last_modified: datetime) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, last_modified))
+
+
+def set_cache_headers(response: Response, etag: str, last_modified: datetime) -> None:
+    response.headers.update(cache_headers(etag, last_modified))
@@ -0,0 +1,196 @@
+"""
+Exportação completa da conta em streaming (NDJSON ou CSV).
+
+Cada tabela é lida com cursor no servidor (`AsyncSession.stream` com
+`yield_per`) e as linhas são codificadas e enviadas em blocos à medida que
+chegam, de modo que a memória usada não depende do tamanho da conta e o
+primeiro byte sai antes de a consulta terminar.
+
+Formato NDJSON: uma linha por registro, com o tipo em `"type"`:
+
+    {"type":"summary","id":1,"study_date":"2025-01-07",...}
+
+Formato CSV: a primeira coluna é o tipo do registro; cada tabela começa com a
+sua própria linha de cabeçalho (`type,id,study_date,...`).
+
+No PostgreSQL, todas as tabelas são lidas em uma única transação REPEATABLE
+READ: a exportação é um retrato consistente mesmo com escritas concorrentes
+(nenhuma resposta sem o seu resultado ou resumo). A conexão fica reservada
+durante todo o download, então ele é limitado: a transação é encerrada pelo
+banco se o cliente parar de ler por EXPORT_IDLE_TIMEOUT_SECONDS, e a
+exportação é interrompida depois de EXPORT_MAX_SECONDS.
+"""
+import csv
+import io
+import json
+import logging
+import time
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Sequence, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Answer, Challenge, Question, Summary, SummaryObjective, TestResult, User
+from app.utils.responses import orjson
+
+logger = logging.getLogger(__name__)
+
+# Linhas buscadas por vez no cursor do servidor
+EXPORT_YIELD_PER = 1000
+# Bytes acumulados antes de enviar um bloco da resposta
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _columns(model, exclude: Sequence[str] = ()) -> List[Any]:
+    return [column for column in model.__table__.columns if column.name not in exclude]
+
+
+def _export_tables(user_id: int) -> List[Tuple[str, Any]]:
+    """(tipo do registro, consulta) de cada tabela, na ordem de exportação"""
+    return [
+        ("user", select(*_columns(User, exclude=["password_hash"])).where(User.id == user_id)),
+        ("challenge", select(*_columns(Challenge)).where(Challenge.user_id == user_id).order_by(Challenge.id)),
+        ("summary", select(*_columns(Summary)).where(Summary.user_id == user_id).order_by(Summary.id)),
+        (
+            "summary_objective",
+            select(*_columns(SummaryObjective))
+            .join(Summary, Summary.id == SummaryObjective.summary_id)
+            .where(Summary.user_id == user_id)
+            .order_by(SummaryObjective.id),
+        ),
+        (
+            "question",
+            select(*_columns(Question))
+            .join(Summary, Summary.id == Question.summary_id)
+            .where(Summary.user_id == user_id)
+            .order_by(Question.id),
+        ),
+        ("test_result", select(*_columns(TestResult)).where(TestResult.user_id == user_id).order_by(TestResult.id)),
+        (
+            "answer",
+            select(*_columns(Answer))
+            .join(TestResult, TestResult.id == Answer.test_result_id)
+            .where(TestResult.user_id == user_id)
+            .order_by(Answer.id),
+        ),
+    ]
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+class NDJSONEncoder:
+    def __init__(self):
+        self._prefix = {}
+
+    def header(self, record_type: str, keys: Sequence[str]) -> bytes:
+        self._prefix = {"type": record_type}
+        return b""
+
+    def rows(self, keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+        records = [{**self._prefix, **dict(zip(keys, row))} for row in rows]
+        if orjson is not None:
+            return b"".join(orjson.dumps(record, option=orjson.OPT_UTC_Z) + b"\n" for record in records)
+        return "".join(
+            json.dumps(record, ensure_ascii=False, default=_json_default, separators=(",", ":")) + "\n"
+            for record in records
+        ).encode("utf-8")
+
+
+class CSVEncoder:
+    def __init__(self):
+        self._record_type = ""
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def _flush(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self, record_type: str, keys: Sequence[str]) -> bytes:
+        self._record_type = record_type
+        self._writer.writerow(["type", *keys])
+        return self._flush()
+
+    def rows(self, keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+        for row in rows:
+            self._writer.writerow([self._record_type, *(_csv_value(value) for value in row)])
+        return self._flush()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return value
+
+
+ENCODERS: Dict[str, Callable[[], Any]] = {"ndjson": NDJSONEncoder, "csv": CSVEncoder}
+
+
+async def _begin_snapshot(db: AsyncSession) -> None:
+    """Abre a transação da exportação: um único snapshot e limites de tempo (PostgreSQL)"""
+    if db.bind.dialect.name != "postgresql":
+        return
+    await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    # Valores locais à transação: a conexão volta ao pool com os padrões
+    await db.execute(select(
+        func.set_config("statement_timeout", f"{settings.EXPORT_MAX_SECONDS * 1000}", True),
+        func.set_config("idle_in_transaction_session_timeout", f"{settings.EXPORT_IDLE_TIMEOUT_SECONDS * 1000}", True),
+    ))
+
+
+async def export_user(user_id: int, fmt: str) -> AsyncIterator[bytes]:
+    """
+    Gera a exportação do usuário em blocos de ~EXPORT_CHUNK_BYTES.
+
+    Usa uma sessão própria: o gerador roda enquanto a resposta é enviada,
+    depois que a rota já retornou. Levanta TimeoutError depois de
+    EXPORT_MAX_SECONDS, liberando a conexão.
+    """
+    encoder = ENCODERS[fmt]()
+    pending: List[bytes] = []
+    pending_size = 0
+    # O primeiro bloco sai sem esperar o limite: o download começa na hora
+    started = False
+    deadline = time.monotonic() + settings.EXPORT_MAX_SECONDS
+
+    async with SessionLocal() as db:
+        try:
+            await _begin_snapshot(db)
+            for record_type, query in _export_tables(user_id):
+                result = await db.stream(query.execution_options(yield_per=EXPORT_YIELD_PER))
+                keys = list(result.keys())
+                pending.append(encoder.header(record_type, keys))
+                async for partition in result.partitions():
+                    data = encoder.rows(keys, partition)
+                    pending.append(data)
+                    pending_size += len(data)
+                    if pending_size >= EXPORT_CHUNK_BYTES or not started:
+                        if time.monotonic() > deadline:
+                            raise TimeoutError(f"Exportação passou de {settings.EXPORT_MAX_SECONDS}s")
+                        yield b"".join(pending)
+                        pending.clear()
+                        pending_size = 0
+                        started = True
+        except Exception:
+            # O status 200 já foi enviado: resta registrar e encerrar a resposta
+            logger.error("Falha na exportação do usuário %s", user_id, exc_info=True)
+            raise
+
+    if pending:
+        yield b"".join(pending)
@@ -0,0 +1,279 @@
+"""
+Fila de tarefas em segundo plano, durável, na própria base de dados (tabela Job).
+
+As rotas enfileiram com `enqueue(db, ...)` antes do seu commit: o job só passa
+a existir se a transação da rota for confirmada, e some junto com ela num
+rollback. Os workers (`python -m app.worker`, ou dentro da API com
+JOB_WORKER_IN_APP) reservam os jobs com `SELECT ... FOR UPDATE SKIP LOCKED`, de
+modo que vários processos dividem a fila sem disputar as mesmas linhas.
+
+- prioridade: na mesma fila, `priority` maior executa antes;
+- concorrência: cada worker executa no máximo N jobs de cada fila ao mesmo tempo
+  (JOB_QUEUES, ex: {"default": 4, "photos": 2, "reminders": 2});
+- novas tentativas: um job que falha volta para a fila com espera exponencial
+  (JOB_RETRY_BASE_SECONDS * 2^(tentativa-1), até JOB_RETRY_MAX_SECONDS) e fica
+  com status `failed` depois de `max_attempts` tentativas;
+- jobs de um worker que morreu voltam para a fila depois do dobro de
+  JOB_TIMEOUT_SECONDS (o limite de execução de cada job).
+
+Um job concluído é apagado; os que falharam de vez ficam na tabela com o último erro.
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.config import settings
+from app.database import SessionLocal, dialect_insert
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Tamanho máximo do erro gravado em `last_error`
+MAX_ERROR_LENGTH = 4000
+
+TaskHandler = Callable[[dict], Awaitable[Any]]
+TASKS: Dict[str, TaskHandler] = {}
+
+
+def job_task(name: str) -> Callable[[TaskHandler], TaskHandler]:
+    """Registra a função assíncrona `handler(payload)` que executa a tarefa `name`"""
+    def register(handler: TaskHandler) -> TaskHandler:
+        TASKS[name] = handler
+        return handler
+    return register
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def enqueue(
+    db: AsyncSession,
+    task: str,
+    payload: Optional[dict] = None,
+    queue: str = "default",
+    priority: int = 0,
+    delay: float = 0,
+    key: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+) -> None:
+    """
+    Enfileira uma tarefa na transação de `db` (não faz commit).
+
+    Com `key`, se já houver um job aguardando com a mesma chave, nada é
+    enfileirado (ex: várias edições seguidas do mesmo resumo geram um job só).
+    """
+    values = {
+        "queue": queue,
+        "task": task,
+        "payload": payload or {},
+        "key": key,
+        "priority": priority,
+        "status": "queued",
+        "max_attempts": max_attempts or settings.JOB_MAX_ATTEMPTS,
+    }
+    if delay:
+        values["run_at"] = _utcnow() + timedelta(seconds=delay)
+    stmt = dialect_insert(db, Job).values(**values)
+    if key is not None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["key"], index_where=Job.status == "queued")
+    await db.execute(stmt)
+
+
+def retry_delay(attempts: int) -> float:
+    """Espera antes da próxima tentativa (exponencial, com variação de até 10%)"""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.9, 1.0)
+
+
+async def claim_jobs(db: AsyncSession, queue: str, limit: int, worker_id: str) -> list:
+    """Reserva até `limit` jobs prontos da fila (mais prioritários e mais antigos primeiro)"""
+    ready = (
+        select(Job.id)
+        .where(Job.queue == queue, Job.status == "queued", Job.run_at <= _utcnow())
+        .order_by(Job.priority.desc(), Job.run_at, Job.id)
+        .limit(limit)
+        # Linhas já reservadas por outra transação são puladas, sem esperar
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(Job)
+        .where(Job.id.in_(ready.scalar_subquery()))
+        .values(status="running", locked_at=_utcnow(), locked_by=worker_id, attempts=Job.attempts + 1)
+        .returning(Job.id, Job.task, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    )
+    jobs = result.all()
+    await db.commit()
+    return jobs
+
+
+async def recover_stale_jobs(db: AsyncSession) -> int:
+    """Devolve à fila (ou marca como falhos) os jobs de workers que pararam de responder"""
+    expired = _utcnow() - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS * 2)
+    stale = (Job.status == "running", Job.locked_at < expired)
+    result = await db.execute(
+        update(Job)
+        .where(*stale, Job.attempts >= Job.max_attempts)
+        .values(status="failed", locked_by=None, last_error="Worker parou de responder")
+        .execution_options(synchronize_session=False)
+    )
+    failed = result.rowcount
+    # Já existe outro job aguardando com a mesma chave: ele substitui o job perdido
+    queued_keys = select(Job.key).where(Job.status == "queued", Job.key.isnot(None)).scalar_subquery()
+    await db.execute(
+        delete(Job)
+        .where(*stale, Job.key.in_(queued_keys))
+        .execution_options(synchronize_session=False)
+    )
+    # Vários jobs perdidos com a mesma chave: só o mais antigo volta para a fila
+    # (uq_job_queued_key não aceita dois aguardando com a mesma chave)
+    survivors = select(func.min(Job.id)).where(*stale, Job.key.isnot(None)).group_by(Job.key).scalar_subquery()
+    await db.execute(
+        delete(Job)
+        .where(*stale, Job.key.isnot(None), Job.id.notin_(survivors))
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(
+        update(Job)
+        .where(*stale)
+        .values(status="queued", locked_by=None, run_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return failed + result.rowcount
+
+
+class Worker:
+    """
+    Executa jobs das filas configuradas no event loop atual.
+
+    `queues` define as filas atendidas e quantos jobs de cada uma podem
+    executar ao mesmo tempo neste worker.
+    """
+
+    def __init__(self, queues: Dict[str, int], poll_interval: Optional[float] = None):
+        self.queues = dict(queues)
+        self.poll_interval = settings.JOB_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._running: Dict[str, Set[asyncio.Task]] = {queue: set() for queue in self.queues}
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Inicia o worker em segundo plano (ex: junto com a API)"""
+        self._loop_task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Para de reservar jobs e espera os que estão executando (até `timeout`)"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._loop_task is not None:
+            await self._loop_task
+        running = [task for tasks in self._running.values() for task in tasks]
+        if running:
+            await asyncio.wait(running, timeout=timeout)
+
+    async def run(self) -> None:
+        logger.info("Worker %s atendendo as filas %s", self.worker_id, self.queues)
+        next_recovery = 0.0
+        while not self._stopping:
+            self._wakeup.clear()
+            claimed = 0
+            if time.monotonic() >= next_recovery:
+                # Uma falha aqui não pode impedir a reserva: tenta de novo no próximo intervalo
+                next_recovery = time.monotonic() + settings.JOB_TIMEOUT_SECONDS
+                try:
+                    async with SessionLocal() as db:
+                        recovered = await recover_stale_jobs(db)
+                    if recovered:
+                        logger.warning("%s jobs de workers parados voltaram para a fila", recovered)
+                except Exception:
+                    logger.error("Falha ao recuperar jobs de workers parados", exc_info=True)
+            try:
+                for queue, limit in self.queues.items():
+                    free = limit - len(self._running[queue])
+                    if free <= 0:
+                        continue
+                    async with SessionLocal() as db:
+                        jobs = await claim_jobs(db, queue, free, self.worker_id)
+                    for job in jobs:
+                        self._spawn(queue, job)
+                    claimed += len(jobs)
+            except Exception:
+                logger.error("Falha ao buscar jobs", exc_info=True)
+
+            # Fila vazia: espera o intervalo (ou a conclusão de um job, que libera vaga)
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _spawn(self, queue: str, job) -> None:
+        task = asyncio.get_running_loop().create_task(self._execute(queue, job))
+        self._running[queue].add(task)
+        metrics.JOBS_RUNNING.set(len(self._running[queue]), queue)
+
+        def done(finished: asyncio.Task) -> None:
+            self._running[queue].discard(finished)
+            metrics.JOBS_RUNNING.set(len(self._running[queue]), queue)
+            self._wakeup.set()
+
+        task.add_done_callback(done)
+
+    async def _execute(self, queue: str, job) -> None:
+        started_at = time.perf_counter()
+        handler = TASKS.get(job.task)
+        try:
+            if handler is None:
+                raise LookupError(f"Tarefa não registrada: {job.task}")
+            await asyncio.wait_for(handler(job.payload), settings.JOB_TIMEOUT_SECONDS)
+        except Exception as exc:
+            # Tarefa desconhecida não adianta repetir
+            retry = handler is not None and job.attempts < job.max_attempts
+            await self._finish_failed(job, exc, retry)
+            metrics.JOBS_PROCESSED.inc(queue, "retry" if retry else "failed")
+        else:
+            async with SessionLocal() as db:
+                await db.execute(delete(Job).where(Job.id == job.id))
+                await db.commit()
+            metrics.JOBS_PROCESSED.inc(queue, "done")
+        finally:
+            metrics.JOB_DURATION.observe(time.perf_counter() - started_at, queue)
+
+    async def _finish_failed(self, job, exc: Exception, retry: bool) -> None:
+        error = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))[-MAX_ERROR_LENGTH:]
+        if retry:
+            delay = retry_delay(job.attempts)
+            logger.warning("Job %s (%s) falhou na tentativa %s; nova tentativa em %.0fs: %r",
+                           job.id, job.task, job.attempts, delay, exc)
+            values = {"status": "queued", "run_at": _utcnow() + timedelta(seconds=delay)}
+        else:
+            logger.error("Job %s (%s) falhou definitivamente após %s tentativas: %r",
+                         job.id, job.task, job.attempts, exc)
+            values = {"status": "failed"}
+        async with SessionLocal() as db:
+            try:
+                await db.execute(
+                    update(Job)
+                    .where(Job.id == job.id)
+                    .values(locked_by=None, last_error=error, **values)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+            except IntegrityError:
+                # Outro job com a mesma chave foi enfileirado enquanto este executava
+                await db.rollback()
+                await db.execute(delete(Job).where(Job.id == job.id))
+                await db.commit()
@@ -0,0 +1,45 @@
+import base64
+import json
+from typing import Any, Callable, List, Sequence
+from fastapi import HTTPException, status
+
+# Tamanho padrão e máximo das páginas das listagens
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Codifica a chave de ordenação da última linha em um cursor opaco"""
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> List[Any]:
+    """
+    Decodifica um cursor gerado por `encode_cursor`.
+    
+    Cada valor é convertido pelo parser correspondente (ex: `date.fromisoformat`).
+    Cursores malformados resultam em 400.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("cursor com formato inesperado")
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
+
+
+def build_page(rows: Sequence[Any], limit: int, cursor_of: Callable[[Any], List[Any]]) -> dict:
+    """
+    Monta a resposta paginada a partir de `limit + 1` linhas.
+    
+    A linha extra só indica se existe próxima página; ela não é retornada.
+    """
+    items = list(rows[:limit])
+    next_cursor = encode_cursor(cursor_of(items[-1])) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor, "limit": limit}
@@ -0,0 +1,356 @@
+"""
+Armazenamento de fotos endereçado por conteúdo.
+
+O upload (multipart) é gravado em disco à medida que chega, em blocos, com o
+SHA-256 calculado no caminho; o corpo nunca fica inteiro em memória. O arquivo
+final fica em `PHOTO_STORAGE_DIR/ab/<sha256>/original`, de modo que o mesmo
+conteúdo enviado duas vezes (por qualquer usuário) é guardado uma vez só.
+
+Miniaturas e versões reduzidas são geradas depois da resposta, por um job da
+fila `photos`, em um pool de processos (a decodificação de imagens é CPU-bound
+e segura o GIL). Elas exigem
+o Pillow (pip install Pillow); sem ele, só o original é servido.
+
+Como o conteúdo de uma URL nunca muda, as fotos são servidas com cache de longa
+duração (`immutable`) e suporte a Range.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import anyio
+from fastapi import HTTPException, Request, status
+from multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import SessionLocal
+from app.models import PhotoAsset, PhotoAssetUser
+
+logger = logging.getLogger(__name__)
+
+# Versões geradas: nome -> maior lado em pixels
+VARIANTS = {"thumb": 256, "medium": 1024}
+VARIANT_QUALITY = 85
+CHUNK_SIZE = 64 * 1024
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Assinaturas (magic bytes) dos formatos aceitos
+_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Tipo da imagem pelos primeiros bytes (não confia no Content-Type do cliente)"""
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def is_sha256(value: str) -> bool:
+    return bool(_SHA256.match(value))
+
+
+def asset_dir(sha256: str) -> str:
+    return os.path.join(settings.PHOTO_STORAGE_DIR, sha256[:2], sha256)
+
+
+def asset_path(sha256: str, variant: str = "original") -> str:
+    name = "original" if variant == "original" else f"{variant}.jpg"
+    return os.path.join(asset_dir(sha256), name)
+
+
+def photo_url(sha256: str, variant: Optional[str] = None) -> str:
+    return f"/api/photos/{sha256}" + (f"/{variant}" if variant else "")
+
+
+class PhotoUpload:
+    """Arquivo recebido: caminho temporário, hash, tamanho e tipo detectado"""
+
+    def __init__(self):
+        self.temp_path: Optional[str] = None
+        self.sha256: Optional[str] = None
+        self.size = 0
+        self.content_type: Optional[str] = None
+
+    def discard(self) -> None:
+        if self.temp_path and os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+
+
+class _UploadParser:
+    """
+    Callbacks do parser multipart: grava o campo `file` direto no disco.
+
+    Os callbacks só acumulam os pedaços; a escrita (bloqueante) acontece em
+    `receive_photo`, em uma thread, uma vez por bloco recebido da rede.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.found = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._in_file = False
+        self.pending: List[bytes] = []
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._in_file = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        # Só o primeiro arquivo do campo esperado; os demais campos são ignorados
+        if not self.found and options.get(b"name") == self.field.encode() and b"filename" in options:
+            self.found = self._in_file = True
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        self._in_file = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+
+async def receive_photo(request: Request, field: str = "file") -> PhotoUpload:
+    """
+    Lê o corpo multipart em streaming, gravando o arquivo em um temporário.
+
+    Erros: 400 (corpo inválido ou sem o campo), 413 (acima de PHOTO_MAX_BYTES)
+    e 415 (não é JPEG, PNG, GIF ou WebP).
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Envie a foto como multipart/form-data")
+
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > settings.PHOTO_MAX_BYTES + 64 * 1024:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Foto maior que o limite permitido")
+
+    os.makedirs(settings.PHOTO_STORAGE_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".upload-", dir=settings.PHOTO_STORAGE_DIR)
+    upload = PhotoUpload()
+    upload.temp_path = temp_path
+    digest = hashlib.sha256()
+    head = b""
+    handler = _UploadParser(field)
+    parser = MultipartParser(params[b"boundary"], handler.callbacks())
+
+    try:
+        with os.fdopen(fd, "wb") as file:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if not handler.pending:
+                    continue
+                data = b"".join(handler.pending)
+                handler.pending.clear()
+
+                if len(head) < 16:
+                    head += data[:16 - len(head)]
+                    if len(head) >= 16 and sniff_content_type(head) is None:
+                        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Formato de imagem não suportado")
+                upload.size += len(data)
+                if upload.size > settings.PHOTO_MAX_BYTES:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Foto maior que o limite permitido")
+                digest.update(data)
+                await anyio.to_thread.run_sync(file.write, data)
+            parser.finalize()
+
+        if not handler.found or upload.size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Campo '{field}' com a foto não encontrado")
+        upload.content_type = sniff_content_type(head)
+        if upload.content_type is None:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Formato de imagem não suportado")
+    except HTTPException:
+        upload.discard()
+        raise
+    except Exception:
+        upload.discard()
+        logger.warning("Upload multipart inválido", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Corpo multipart inválido")
+
+    upload.sha256 = digest.hexdigest()
+    return upload
+
+
+def store_upload(upload: PhotoUpload) -> str:
+    """Move o temporário para o caminho definitivo (bloqueante; rodar em thread)"""
+    path = asset_path(upload.sha256)
+    if os.path.exists(path):
+        # Mesmo conteúdo já armazenado (ex: envio concorrente)
+        upload.discard()
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(upload.temp_path, path)
+    return path
+
+
+def generate_variants(sha256: str) -> Tuple[Optional[int], Optional[int], List[str]]:
+    """
+    Gera as versões reduzidas da foto (executado no pool de processos).
+
+    Retorna (largura, altura, versões geradas). Sem o Pillow, nenhuma versão é
+    gerada e as dimensões ficam desconhecidas.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None, None, []
+
+    generated = []
+    with Image.open(asset_path(sha256)) as image:
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        for name, size in VARIANTS.items():
+            variant = image.copy()
+            variant.thumbnail((size, size))
+            target = asset_path(sha256, name)
+            partial = target + ".part"
+            variant.save(partial, "JPEG", quality=VARIANT_QUALITY, optimize=True)
+            os.replace(partial, target)
+            generated.append(name)
+    return width, height, generated
+
+
+class VariantPool:
+    """Pool de processos para as versões reduzidas, criado no primeiro uso"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def process(self, asset_id: int, sha256: str) -> None:
+        """Gera as versões e grava no PhotoAsset (executada pelo job `photo_variants`)"""
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            width, height, variants = await loop.run_in_executor(self._get_executor(), generate_variants, sha256)
+        finally:
+            self.pending -= 1
+
+        async with SessionLocal() as db:
+            await db.execute(
+                update(PhotoAsset)
+                .where(PhotoAsset.id == asset_id)
+                .values(width=width, height=height, variants=variants)
+            )
+            await db.commit()
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "pending": self.pending}
+
+
+variant_pool = VariantPool(settings.PHOTO_WORKERS)
+
+
+async def resolve_photo(db: AsyncSession, asset_id: Optional[int], user_id: int) -> Optional[str]:
+    """URL da foto referenciada por `photo_asset_id` (400 se o id não existir ou não foi enviado pelo usuário)"""
+    if asset_id is None:
+        return None
+    result = await db.execute(
+        select(PhotoAsset.sha256)
+        .join(PhotoAssetUser, PhotoAssetUser.asset_id == PhotoAsset.id)
+        .where(PhotoAsset.id == asset_id, PhotoAssetUser.user_id == user_id)
+    )
+    sha256 = result.scalar_one_or_none()
+    if sha256 is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Foto não encontrada")
+    return photo_url(sha256)
+
+
+def asset_urls(sha256: str, variants: Optional[List[str]]) -> Dict[str, str]:
+    return {name: photo_url(sha256, name) for name in variants or []}
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Intervalo (início, fim inclusivo) de um header `Range: bytes=...`.
+
+    Retorna None para servir o arquivo inteiro (sem header, ou com vários
+    intervalos, que são opcionais) e levanta 416 se o intervalo for inválido.
+    """
+    if not header or "," in header:
+        return None
+    match = _RANGE.match(header.strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        # Sufixo: os últimos N bytes
+        start = max(0, size - int(last))
+        end = size - 1
+    else:
+        return None
+
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Intervalo inválido",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+async def file_chunks(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    """Lê `path` de `start` a `end` (inclusive) em blocos, em thread"""
+    file = await anyio.to_thread.run_sync(open, path, "rb")
+    try:
+        await anyio.to_thread.run_sync(file.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            data = await anyio.to_thread.run_sync(file.read, min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        await anyio.to_thread.run_sync(file.close)
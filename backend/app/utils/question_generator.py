@@ -0,0 +1,329 @@
+"""
+Geração local (determinística, sem serviço externo) de perguntas a partir dos resumos.
+
+Dois tipos de pergunta, ambos com quatro alternativas:
+
+- lacuna: uma frase do resumo com o termo-chave mais relevante trocado por
+  "_____"; as alternativas erradas são outros termos-chave do mesmo resumo;
+- objetivo: qual frase do resumo trata de um dos objetivos; as alternativas
+  erradas são outras frases do resumo.
+
+Os termos-chave são as palavras mais frequentes do texto (sem stopwords),
+com peso extra para as que aparecem nos objetivos.
+
+Cada pergunta nasce de um trecho (frase + termo, ou objetivo + frase) e guarda
+o hash desse trecho em `Question.source_hash`. Ao gerar de novo, só os trechos
+novos viram perguntas; as perguntas de trechos que sumiram do resumo são
+removidas (menos as já respondidas, que os resultados gravados referenciam) e
+as demais ficam como estão. O hash do conteúdo inteiro fica em
+`Summary.questions_hash`: com o resumo inalterado, nada é recalculado.
+
+A geração roda em um pool de processos (é CPU-bound e seguraria o event loop).
+"""
+import asyncio
+import hashlib
+import random
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import dialect_insert
+from app.models import Answer, Question, Summary, SummaryObjective
+from app.utils.search import fold
+
+# Muda quando as regras de geração mudam (invalida os hashes anteriores)
+GENERATOR_VERSION = "1"
+BLANK = "_____"
+OPTION_LETTERS = "abcd"
+MIN_TERM_LENGTH = 4
+MAX_TERMS = 40
+MIN_SENTENCE_WORDS = 5
+MAX_SENTENCE_WORDS = 60
+MAX_OPTION_LENGTH = 300
+# Peso de uma ocorrência nos objetivos em relação a uma no texto
+OBJECTIVE_TERM_WEIGHT = 2
+
+_WORD = re.compile(r"\w+(?:-\w+)*")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+STOPWORDS = frozenset("""
+    alem alga algo alguem algum alguma algumas alguns ainda antes apenas aquela aquelas aquele aqueles
+    aquilo aqui assim atraves cada coisa coisas como contra cerca dela delas dele deles depois desde
+    dessa dessas desse desses desta destas deste destes deve devem durante enquanto entao entre essa
+    essas esse esses esta estao estas estava estavam este estes estou estudar estudei aprendi revisei
+    fazer feito foram forma hoje isso isto mais menos mesma mesmas mesmo mesmos minha minhas muita
+    muitas muito muitos nenhum nenhuma nossa nossas nosso nossos numa onde ontem outra outras outro
+    outros para parte pela pelas pelo pelos pode podem pois porque possui possuem qual quais quando
+    quanto sendo seja sejam segundo sobre somente suas seus tambem tanto temos tinha tinham toda todas
+    todo todos vezes existe existem
+""".split())
+
+
+def content_hash(summary_text: str, objectives: Sequence[str]) -> str:
+    """Hash do conteúdo usado na geração (texto, objetivos e versão do gerador)"""
+    data = "\0".join([GENERATOR_VERSION, summary_text, *objectives])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _unit_hash(*parts: str) -> str:
+    return hashlib.sha256("\0".join([GENERATOR_VERSION, *parts]).encode("utf-8")).hexdigest()
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = " ".join(sentence.split())
+        if MIN_SENTENCE_WORDS <= len(_WORD.findall(sentence)) <= MAX_SENTENCE_WORDS:
+            sentences.append(sentence)
+    return sentences
+
+
+def _is_term(key: str) -> bool:
+    return len(key) >= MIN_TERM_LENGTH and key not in STOPWORDS and not any(char.isdigit() for char in key)
+
+
+def key_terms(summary_text: str, objectives: Sequence[str]) -> Dict[str, str]:
+    """Termos-chave (forma normalizada -> forma mais comum no texto), do mais relevante ao menos"""
+    scores: Counter = Counter()
+    forms: Dict[str, Counter] = {}
+    first: Dict[str, int] = {}
+    for position, match in enumerate(_WORD.finditer(summary_text)):
+        key = fold(match.group())
+        if not _is_term(key):
+            continue
+        scores[key] += 1
+        forms.setdefault(key, Counter())[match.group()] += 1
+        first.setdefault(key, position)
+    # Os objetivos só reforçam termos do texto ("Entender", "Revisar"... não viram termos)
+    for objective in objectives:
+        for key in _sentence_keys(objective):
+            if key in scores:
+                scores[key] += OBJECTIVE_TERM_WEIGHT
+
+    ranked = sorted(scores, key=lambda key: (-scores[key], first[key]))[:MAX_TERMS]
+    # Forma exibida: a mais frequente; no empate, a minúscula (evita "Mitocôndria" no meio da frase)
+    return {key: max(forms[key], key=lambda form: (forms[key][form], form.islower())) for key in ranked}
+
+
+def _sentence_keys(sentence: str) -> Set[str]:
+    return {fold(word) for word in _WORD.findall(sentence)}
+
+
+def plan_units(summary_text: str, objectives: Sequence[str]) -> Tuple[Dict[str, str], List[dict]]:
+    """
+    Trechos que originam perguntas, cada um com o seu hash.
+
+    Retorna os termos-chave e os trechos (no máximo QUESTION_GENERATION_MAX),
+    primeiro os dos objetivos e depois as lacunas, na ordem do texto.
+    """
+    terms = key_terms(summary_text, objectives)
+    rank = {key: index for index, key in enumerate(terms)}
+    sentences = split_sentences(summary_text)
+    units = []
+
+    if len(sentences) >= len(OPTION_LETTERS):
+        sentence_keys = [_sentence_keys(sentence) for sentence in sentences]
+        for objective in objectives:
+            wanted = {key for key in _sentence_keys(objective) if key in rank}
+            # Frase com mais termos-chave do objetivo (no empate, a primeira)
+            best = max(range(len(sentences)), key=lambda index: (len(wanted & sentence_keys[index]), -index))
+            if wanted & sentence_keys[best]:
+                sentence = sentences[best]
+                units.append({
+                    "kind": "objective",
+                    "hash": _unit_hash("objective", objective, sentence),
+                    "objective": objective,
+                    "sentence": sentence,
+                })
+
+    used: Set[str] = set()
+    for sentence in sentences:
+        candidates = sorted((key for key in _sentence_keys(sentence) if key in rank), key=rank.get)
+        # Prefere um termo ainda não usado como resposta, para variar as lacunas
+        answer = next((key for key in candidates if key not in used), None)
+        if answer is None:
+            continue
+        used.add(answer)
+        units.append({
+            "kind": "cloze",
+            "hash": _unit_hash("cloze", sentence, answer),
+            "sentence": sentence,
+            "answer": answer,
+        })
+
+    return terms, units[:settings.QUESTION_GENERATION_MAX]
+
+
+def _clip(text: str) -> str:
+    return text if len(text) <= MAX_OPTION_LENGTH else text[:MAX_OPTION_LENGTH - 1].rstrip() + "…"
+
+
+def _with_options(rng: random.Random, text: str, correct: str, wrong: List[str]) -> dict:
+    choices = [correct] + wrong
+    rng.shuffle(choices)
+    options = {letter: _clip(choice) for letter, choice in zip(OPTION_LETTERS, choices)}
+    return {"text": text, "options": options, "correct_answer": OPTION_LETTERS[choices.index(correct)]}
+
+
+def _cloze_question(rng: random.Random, unit: dict, terms: Dict[str, str]) -> Optional[dict]:
+    sentence, answer = unit["sentence"], unit["answer"]
+    match = next(match for match in _WORD.finditer(sentence) if fold(match.group()) == answer)
+    present = _sentence_keys(sentence)
+    # Distratores: termos fora da frase, de tamanho parecido com o da resposta
+    candidates = sorted(
+        (key for key in terms if key not in present),
+        key=lambda key: abs(len(key) - len(answer))
+    )[:len(OPTION_LETTERS) * 2]
+    if len(candidates) < len(OPTION_LETTERS) - 1:
+        return None
+    wrong = [terms[key] for key in rng.sample(candidates, len(OPTION_LETTERS) - 1)]
+    text = f"Complete a lacuna: {sentence[:match.start()]}{BLANK}{sentence[match.end():]}"
+    # Resposta na mesma forma dos distratores (a maiúscula do início da frase entregaria a resposta)
+    return _with_options(rng, text, terms[answer], wrong)
+
+
+def _objective_question(rng: random.Random, unit: dict, terms: Dict[str, str], sentences: List[str]) -> Optional[dict]:
+    wanted = {key for key in _sentence_keys(unit["objective"]) if key in terms}
+    # Distratores: frases sem nenhum termo-chave do objetivo (senão haveria mais de uma resposta)
+    others = [sentence for sentence in sentences if not wanted & _sentence_keys(sentence)]
+    if len(others) < len(OPTION_LETTERS) - 1:
+        return None
+    wrong = rng.sample(others, len(OPTION_LETTERS) - 1)
+    text = f"Qual trecho do resumo trata do objetivo \"{unit['objective']}\"?"
+    return _with_options(rng, text, unit["sentence"], wrong)
+
+
+def generate_questions(
+    summary_text: str, objectives: Sequence[str], known: Set[str]
+) -> Tuple[List[str], List[dict]]:
+    """
+    Hashes de todos os trechos atuais e as perguntas dos trechos fora de `known`.
+
+    Determinística: o sorteio de alternativas usa o hash do trecho como semente.
+    Roda nos processos do pool (só recebe e retorna tipos simples).
+    """
+    terms, units = plan_units(summary_text, objectives)
+    sentences = split_sentences(summary_text)
+    questions = []
+    for unit in units:
+        if unit["hash"] in known:
+            continue
+        rng = random.Random(unit["hash"])
+        if unit["kind"] == "cloze":
+            question = _cloze_question(rng, unit, terms)
+        else:
+            question = _objective_question(rng, unit, terms, sentences)
+        if question is not None:
+            question["source_hash"] = unit["hash"]
+            questions.append(question)
+    return [unit["hash"] for unit in units], questions
+
+
+class QuestionGenerationPool:
+    """Pool de processos da geração de perguntas, criado no primeiro uso"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def run(self, summary_text: str, objectives: List[str], known: Set[str]) -> Tuple[List[str], List[dict]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), generate_questions, summary_text, objectives, known)
+
+
+question_pool = QuestionGenerationPool(settings.QUESTION_WORKERS)
+
+
+async def _objectives(db: AsyncSession, summary_id: int) -> List[str]:
+    # Ordem estável: o hash do conteúdo depende dela
+    result = await db.execute(
+        select(SummaryObjective.objective_text)
+        .where(SummaryObjective.summary_id == summary_id)
+        .order_by(SummaryObjective.id)
+    )
+    return list(result.scalars())
+
+
+async def generate_summary_questions(db: AsyncSession, user_id: int, summary_id: int) -> Optional[dict]:
+    """
+    Gera (ou atualiza) as perguntas automáticas de um resumo e faz o commit.
+
+    Retorna None se o resumo não existir ou não pertencer ao usuário (ou for
+    apagado durante a geração); senão, as contagens `created`, `kept` e
+    `removed` e se o conteúdo já estava processado (`unchanged`, nada foi
+    gravado).
+    """
+    result = await db.execute(
+        select(Summary.summary_text, Summary.questions_hash)
+        .where(Summary.id == summary_id, Summary.user_id == user_id)
+    )
+    summary = result.first()
+    if summary is None:
+        return None
+
+    summary_text = summary.summary_text
+    objectives = await _objectives(db, summary_id)
+    digest = content_hash(summary_text, objectives)
+    result = await db.execute(
+        select(Question.id, Question.source_hash).where(
+            Question.summary_id == summary_id,
+            Question.source_hash.isnot(None)
+        )
+    )
+    existing = {source_hash: question_id for question_id, source_hash in result}
+    if summary.questions_hash == digest:
+        return {"created": 0, "kept": len(existing), "removed": 0, "unchanged": True}
+
+    hashes, questions = await question_pool.run(summary_text, objectives, set(existing))
+    current = set(hashes)
+    stale = [question_id for source_hash, question_id in existing.items() if source_hash not in current]
+    removed = 0
+    if stale:
+        # Perguntas já respondidas ficam: apagá-las levaria as respostas em
+        # cascata e os resultados gravados deixariam de bater com elas
+        result = await db.execute(
+            delete(Question)
+            .where(Question.id.in_(stale), ~exists().where(Answer.question_id == Question.id))
+            .returning(Question.id)
+            .execution_options(synchronize_session=False)
+        )
+        removed = len(result.all())
+
+    created = 0
+    if questions:
+        # Outra geração simultânea do mesmo resumo pode ter gravado o trecho antes
+        stmt = dialect_insert(db, Question).on_conflict_do_nothing(index_elements=["summary_id", "source_hash"])
+        result = await db.execute(
+            stmt.returning(Question.id),
+            [{"summary_id": summary_id, **question} for question in questions]
+        )
+        created = len(result.all())
+
+    # Só grava o hash se o resumo não mudou durante a geração (a linha fica
+    # bloqueada até o commit); o updated_at versiona a lista de perguntas
+    result = await db.execute(select(Summary.summary_text).where(Summary.id == summary_id).with_for_update())
+    locked_text = result.scalar_one_or_none()
+    if locked_text is None:
+        # Resumo apagado durante a geração: nada a gravar
+        await db.rollback()
+        return None
+    values = {"updated_at": func.now()}
+    if content_hash(locked_text, await _objectives(db, summary_id)) == digest:
+        values["questions_hash"] = digest
+    await db.execute(
+        update(Summary)
+        .where(Summary.id == summary_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+    return {"created": created, "kept": len(existing) - removed, "removed": removed, "unchanged": False}
@@ -0,0 +1,356 @@
+"""
+Cache de leitura das rotas GET, com namespace por usuário e invalidação por tags.
+
+As rotas guardam o corpo JSON já serializado sob uma chave com namespace por
+usuário e recurso (ex: `sb:u42:v7:summaries:list:50:None`). Cada chave embute
+a versão das suas tags (por padrão, `user:42`); as escritas incrementam a
+versão da tag do usuário e as chaves antigas deixam de ser encontradas, saindo
+do cache pelo LRU ou pelo TTL. Como a versão é lida antes da consulta ao
+banco, uma leitura concorrente com uma escrita nunca grava dados antigos sob a
+versão nova.
+
+Backends (CACHE_BACKEND):
+
+- `auto` (padrão): `memory` quando um único processo escreve no banco (uma API
+  com o worker embutido), senão `redis`;
+- `memory`: LRU em processo, limitado por itens e por bytes. As invalidações
+  não saem do processo: é recusado quando há mais de um processo escrevendo;
+- `redis`: compartilhado entre processos. Com CACHE_URL=memory:// o cliente
+  Redis é substituído por `InMemoryRedis` (testes e desenvolvimento);
+- `none`: desativa o cache.
+"""
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from fastapi import Response
+from app.config import settings
+from app.utils.responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Interface comum dos backends (chaves str, valores bytes)"""
+
+    name = "base"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    async def tag_versions(self, tags: Sequence[str]) -> Optional[List[int]]:
+        """Versão atual de cada tag (None se o backend estiver indisponível)"""
+
+    @abstractmethod
+    async def bump_tags(self, tags: Sequence[str]) -> None:
+        """Invalida todas as chaves associadas às tags"""
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class NullCache(CacheBackend):
+    """Backend que nunca armazena nada (cache desativado)"""
+
+    name = "none"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        pass
+
+    async def tag_versions(self, tags: Sequence[str]) -> Optional[List[int]]:
+        return None
+
+    async def bump_tags(self, tags: Sequence[str]) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """
+    LRU em processo limitado por quantidade de itens e por bytes.
+
+    As versões das tags também ficam em um LRU limitado a `max_items`. Uma tag
+    descartada volta com a maior versão já descartada (`_version_floor`), que
+    nunca é menor que a última versão dela: as chaves antigas continuam
+    inalcançáveis. Versões novas vêm de um relógio global crescente.
+
+    Não é thread-safe: deve ser usado apenas a partir do event loop.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_items: int, max_bytes: int):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._version_clock = 0
+        self._version_floor = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _discard(self, key: str) -> None:
+        value, _ = self._data.pop(key)
+        self.bytes -= len(key) + len(value)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        size = len(key) + len(value)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        if key in self._data:
+            self._discard(key)
+        self._data[key] = (value, time.monotonic() + ttl)
+        self.bytes += size
+        while len(self._data) > self.max_items or self.bytes > self.max_bytes:
+            self._discard(next(iter(self._data)))
+            self.evictions += 1
+
+    async def tag_versions(self, tags: Sequence[str]) -> Optional[List[int]]:
+        versions = []
+        for tag in tags:
+            version = self._versions.get(tag)
+            if version is None:
+                versions.append(self._version_floor)
+            else:
+                self._versions.move_to_end(tag)
+                versions.append(version)
+        return versions
+
+    async def bump_tags(self, tags: Sequence[str]) -> None:
+        for tag in tags:
+            self._version_clock += 1
+            self._versions[tag] = self._version_clock
+            self._versions.move_to_end(tag)
+        while len(self._versions) > self.max_items:
+            _, version = self._versions.popitem(last=False)
+            self._version_floor = max(self._version_floor, version)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "size": len(self._data),
+            "tags": len(self._versions),
+            "bytes": self.bytes,
+            "max_items": self.max_items,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class InMemoryRedis:
+    """Substituto local do cliente `redis.asyncio` (só os comandos usados pelo RedisCache)"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    def _read(self, name: str) -> Optional[bytes]:
+        entry = self._data.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[name]
+            return None
+        return value
+
+    async def get(self, name: str) -> Optional[bytes]:
+        return self._read(name)
+
+    async def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [self._read(name) for name in keys]
+
+    async def set(self, name: str, value: bytes, ex: Optional[int] = None) -> bool:
+        self._data[name] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    async def incr(self, name: str) -> int:
+        value = int(self._read(name) or 0) + 1
+        self._data[name] = (str(value).encode("ascii"), None)
+        return value
+
+
+class RedisCache(CacheBackend):
+    """
+    Backend compartilhado entre processos.
+
+    Falhas de rede não derrubam a requisição: a leitura vira miss e a resposta
+    é calculada normalmente.
+    """
+
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = await self.client.get(key)
+        except Exception:
+            self.errors += 1
+            logger.warning("Cache indisponível (get)", exc_info=True)
+            return None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        if ttl <= 0:
+            return
+        try:
+            await self.client.set(key, value, ex=ttl)
+        except Exception:
+            self.errors += 1
+            logger.warning("Cache indisponível (set)", exc_info=True)
+
+    async def tag_versions(self, tags: Sequence[str]) -> Optional[List[int]]:
+        try:
+            values = await self.client.mget([f"tag:{tag}" for tag in tags])
+        except Exception:
+            self.errors += 1
+            logger.warning("Cache indisponível (tags)", exc_info=True)
+            return None
+        return [int(value) if value else 0 for value in values]
+
+    async def bump_tags(self, tags: Sequence[str]) -> None:
+        try:
+            for tag in tags:
+                await self.client.incr(f"tag:{tag}")
+        except Exception:
+            # As chaves antigas continuam válidas até o TTL
+            self.errors += 1
+            logger.error("Falha ao invalidar tags do cache: %s", tags, exc_info=True)
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+def writer_processes() -> int:
+    """Processos que escrevem no banco: os da API e, sem o worker embutido, o worker separado"""
+    return settings.API_WORKERS + (0 if settings.JOB_WORKER_IN_APP else 1)
+
+
+def create_backend() -> CacheBackend:
+    """Cria o backend configurado em CACHE_BACKEND / CACHE_URL"""
+    backend = settings.CACHE_BACKEND
+    if backend == "none":
+        return NullCache()
+
+    if backend == "auto":
+        backend = "memory" if writer_processes() == 1 else "redis"
+    elif backend == "memory" and writer_processes() > 1:
+        # A invalidação feita por um processo não chegaria ao cache dos outros
+        raise RuntimeError(
+            "CACHE_BACKEND=memory com mais de um processo escrevendo (API_WORKERS > 1 ou "
+            "JOB_WORKER_IN_APP=False): use CACHE_BACKEND=redis"
+        )
+
+    if backend == "redis":
+        if settings.CACHE_URL.startswith("memory://"):
+            return RedisCache(InMemoryRedis())
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requer o pacote redis (pip install redis)")
+        return RedisCache(redis.from_url(settings.CACHE_URL))
+
+    return MemoryCache(max_items=settings.CACHE_MAX_ITEMS, max_bytes=settings.CACHE_MAX_BYTES)
+
+
+def user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+class CachedEntry:
+    """Resultado de `ReadCache.lookup`: a resposta em cache ou a chave onde gravá-la"""
+
+    def __init__(self, cache: "ReadCache", key: Optional[str], value: Optional[bytes]):
+        self.cache = cache
+        self.key = key
+        self.value = value
+
+    @property
+    def hit(self) -> bool:
+        return self.value is not None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        raw_headers, _, _ = self.value.partition(b"\n")
+        return json.loads(raw_headers)
+
+    def response(self) -> Response:
+        raw_headers, _, body = self.value.partition(b"\n")
+        return Response(content=body, media_type="application/json", headers=json.loads(raw_headers))
+
+    async def store(self, content, headers: Optional[Dict[str, str]] = None) -> Response:
+        """Serializa o conteúdo uma única vez, grava no cache e retorna a resposta"""
+        response = FastJSONResponse(content, headers=headers)
+        if self.key is not None:
+            raw_headers = json.dumps(headers or {}, separators=(",", ":")).encode("utf-8")
+            await self.cache.backend.set(self.key, raw_headers + b"\n" + response.body, self.cache.ttl)
+        return response
+
+
+class ReadCache:
+    """Fachada usada pelas rotas: chaves por usuário/recurso e invalidação por tags"""
+
+    def __init__(self, backend: CacheBackend, ttl: int, prefix: str = "sb"):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def lookup(self, user_id: int, resource: str, *parts) -> CachedEntry:
+        """Procura a resposta de `resource` (com os parâmetros `parts`) do usuário"""
+        versions = await self.backend.tag_versions([user_tag(user_id)])
+        if versions is None:
+            return CachedEntry(self, None, None)
+
+        version = ".".join(str(v) for v in versions)
+        key = ":".join([self.prefix, f"u{user_id}", f"v{version}", resource, *(str(part) for part in parts)])
+        return CachedEntry(self, key, await self.backend.get(key))
+
+    async def invalidate_user(self, user_id: int) -> None:
+        await self.backend.bump_tags([user_tag(user_id)])
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+read_cache = ReadCache(create_backend(), ttl=settings.CACHE_TTL_SECONDS)
+
+
+async def invalidate_user_reads(user_id: int) -> None:
+    """Descarta todas as leituras em cache do usuário (chamar após o commit das escritas)"""
+    await read_cache.invalidate_user(user_id)
@@ -0,0 +1,264 @@
+"""
+Lembretes diários de estudo para quem ainda não registrou um resumo no dia.
+
+Cada usuário com desafio tem uma linha em StudyReminder com o horário escolhido
+e o próximo envio (`next_at`, indexado). A cada REMINDER_INTERVAL_SECONDS o
+agendador lê os lembretes vencidos em lotes (`next_at <= agora`, em ordem, com
+FOR UPDATE SKIP LOCKED, de modo que vários processos dividem o trabalho), e
+para cada um verifica no índice uq_user_study_date se há resumo no dia. Cada
+linha é lida uma vez por dia e reagendada para o dia seguinte: o custo
+acompanha os lembretes vencidos, não o total de usuários.
+
+Os lembretes de um lote são entregues por um job (`deliver_reminders`),
+enfileirado na mesma transação que reagenda as linhas, para o destino
+configurado em REMINDER_SINK (`log` ou `file`; outros destinos são registrados
+em SINKS).
+
+Para criar os lembretes dos usuários que já têm desafios:
+
+    python -m app.utils.reminders --backfill
+
+Para processar os lembretes vencidos uma vez (o agendador contínuo roda junto
+com o worker da fila de jobs):
+
+    python -m app.utils.reminders
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Callable, Dict, List, Optional
+import anyio
+from sqlalchemy import exists, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import SessionLocal, dialect_insert
+from app.models import Challenge, StudyReminder, Summary, User
+from app.utils.jobs import enqueue
+
+logger = logging.getLogger(__name__)
+
+
+def parse_minute(value: str) -> int:
+    """Minutos desde a meia-noite ("19:30" -> 1170)"""
+    hours, _, minutes = value.partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def _local(value: datetime) -> datetime:
+    # SQLite devolve o horário sem fuso: é o horário local gravado
+    return value.astimezone()
+
+
+def occurrence(day: date, minute: int) -> datetime:
+    """Horário do lembrete no dia, no fuso do servidor"""
+    return datetime.combine(day, dt_time(minute // 60, minute % 60)).astimezone()
+
+
+def next_occurrence(minute: int, now: datetime, skip_day: Optional[date] = None) -> datetime:
+    """Primeiro horário do lembrete depois de `now` (pulando `skip_day`, se já enviado nele)"""
+    day = now.date()
+    while occurrence(day, minute) <= now or day == skip_day:
+        day += timedelta(days=1)
+    return occurrence(day, minute)
+
+
+async def ensure_reminder(db: AsyncSession, user_id: int) -> None:
+    """Cria o lembrete do usuário no horário padrão, se ainda não existir (sem commit)"""
+    minute = parse_minute(settings.REMINDER_DEFAULT_TIME)
+    next_at = next_occurrence(minute, datetime.now().astimezone())
+    await db.execute(
+        dialect_insert(db, StudyReminder)
+        .values(user_id=user_id, remind_minute=minute, enabled=True, next_at=next_at)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+
+
+async def backfill_reminders(db: AsyncSession) -> int:
+    """Cria, em um só comando, os lembretes dos usuários com desafio que ainda não têm"""
+    minute = parse_minute(settings.REMINDER_DEFAULT_TIME)
+    next_at = next_occurrence(minute, datetime.now().astimezone())
+    users = (
+        select(
+            Challenge.user_id,
+            literal(minute).label("remind_minute"),
+            literal(True).label("enabled"),
+            literal(next_at, StudyReminder.next_at.type).label("next_at"),
+        )
+        .group_by(Challenge.user_id)
+    )
+    result = await db.execute(
+        dialect_insert(db, StudyReminder)
+        .from_select(["user_id", "remind_minute", "enabled", "next_at"], users)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    await db.commit()
+    return result.rowcount
+
+
+class LogSink:
+    """Registra os lembretes no log (substituto de um serviço de notificação)"""
+
+    async def deliver(self, reminders: List[dict]) -> None:
+        logger.info("%s lembretes de estudo", len(reminders))
+        for reminder in reminders:
+            logger.debug("Lembrete para %s: meta de %s min", reminder["email"], reminder["daily_goal"])
+
+
+class FileSink:
+    """Acrescenta os lembretes a um arquivo NDJSON (útil em testes)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _append(self, data: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(data)
+
+    async def deliver(self, reminders: List[dict]) -> None:
+        data = "".join(json.dumps(reminder, ensure_ascii=False) + "\n" for reminder in reminders)
+        await anyio.to_thread.run_sync(self._append, data)
+
+
+# Nome (REMINDER_SINK) -> fábrica do destino dos lembretes
+SINKS: Dict[str, Callable[[], object]] = {
+    "log": LogSink,
+    "file": lambda: FileSink(settings.REMINDER_SINK_PATH),
+}
+
+
+def get_sink():
+    return SINKS[settings.REMINDER_SINK]()
+
+
+async def process_due_batch(db: AsyncSession, now: datetime, batch_size: int) -> Dict[str, int]:
+    """
+    Processa um lote de lembretes vencidos e faz o commit.
+
+    Retorna quantos lembretes foram lidos (`due`) e enviados (`sent`).
+    """
+    today = now.date()
+    studied = exists().where(Summary.user_id == StudyReminder.user_id, Summary.study_date == today)
+    daily_goal = (
+        select(func.sum(Challenge.daily_time))
+        .where(Challenge.user_id == StudyReminder.user_id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            StudyReminder.user_id,
+            StudyReminder.remind_minute,
+            StudyReminder.next_at,
+            StudyReminder.last_sent_on,
+            User.username,
+            User.email,
+            studied.label("studied"),
+            daily_goal.label("daily_goal"),
+        )
+        .join(User, User.id == StudyReminder.user_id)
+        .where(StudyReminder.next_at <= now)
+        .order_by(StudyReminder.next_at)
+        .limit(batch_size)
+        # Outro agendador já está processando essas linhas: pula, sem esperar
+        .with_for_update(of=StudyReminder, skip_locked=True)
+    )
+    rows = result.all()
+    if not rows:
+        await db.commit()
+        return {"due": 0, "sent": 0}
+
+    max_delay = timedelta(minutes=settings.REMINDER_MAX_DELAY_MINUTES)
+    reminders = []
+    schedule = []
+    for row in rows:
+        due_at = _local(row.next_at)
+        # Atrasado demais (agendador parado) ou de outro dia: só reagenda
+        on_time = due_at.date() == today and now - due_at <= max_delay
+        send = on_time and not row.studied and row.daily_goal is not None
+        if send:
+            reminders.append({
+                "user_id": row.user_id,
+                "username": row.username,
+                "email": row.email,
+                "daily_goal": row.daily_goal,
+                "date": today.isoformat(),
+            })
+        schedule.append({
+            "user_id": row.user_id,
+            "next_at": next_occurrence(row.remind_minute, now),
+            "last_sent_on": today if send else row.last_sent_on,
+        })
+
+    # UPDATE em lote pela chave primária
+    await db.execute(update(StudyReminder), schedule)
+    if reminders:
+        await enqueue(db, "deliver_reminders", {"reminders": reminders}, queue="reminders")
+    await db.commit()
+    return {"due": len(rows), "sent": len(reminders)}
+
+
+async def run_reminders(now: Optional[datetime] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Processa todos os lembretes vencidos até `now`, lote a lote"""
+    now = now or datetime.now().astimezone()
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    totals = {"due": 0, "sent": 0}
+    async with SessionLocal() as db:
+        while True:
+            counts = await process_due_batch(db, now, batch_size)
+            totals["due"] += counts["due"]
+            totals["sent"] += counts["sent"]
+            if counts["due"] < batch_size:
+                return totals
+
+
+class ReminderScheduler:
+    """Executa `run_reminders` periodicamente no event loop atual (junto com o worker)"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = settings.REMINDER_INTERVAL_SECONDS if interval is None else interval
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+
+    async def run(self) -> None:
+        while not self._stop.is_set():
+            started_at = time.perf_counter()
+            try:
+                totals = await run_reminders()
+                if totals["due"]:
+                    logger.info(
+                        "Lembretes: %s vencidos, %s enviados em %.1fs",
+                        totals["due"], totals["sent"], time.perf_counter() - started_at
+                    )
+            except Exception:
+                logger.error("Falha ao processar os lembretes", exc_info=True)
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _main(backfill: bool) -> None:
+    if backfill:
+        async with SessionLocal() as db:
+            count = await backfill_reminders(db)
+        print(f"StudyReminder: {count} lembretes criados")
+        return
+    totals = await run_reminders()
+    print(f"Lembretes: {totals['due']} vencidos, {totals['sent']} enviados")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lembretes diários de estudo")
+    parser.add_argument("--backfill", action="store_true", help="Criar os lembretes dos usuários que já têm desafios")
+    args = parser.parse_args()
+    asyncio.run(_main(args.backfill))
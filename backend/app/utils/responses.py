@@ -0,0 +1,78 @@
+"""
+Serialização rápida de respostas JSON.
+
+`FastJSONResponse` é a classe padrão da aplicação (ver `main.py`) e usa orjson
+quando instalado. Para listagens grandes, `row_dicts` / `load_children` montam
+o conteúdo direto das tuplas da consulta, sem instanciar objetos ORM nem
+revalidar com Pydantic; a rota retorna `FastJSONResponse(conteudo)` e o
+`response_model` continua valendo apenas para a documentação.
+"""
+import json
+from typing import Any, Dict, Iterable, List, Type
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada com orjson (com fallback para o json da stdlib)"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            # OPT_UTC_Z: datas em UTC saem com "Z", como no Pydantic
+            return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+def schema_columns(schema: Type[BaseModel], model, exclude: Iterable[str] = ()) -> List[Any]:
+    """Colunas do modelo correspondentes aos campos do schema de resposta"""
+    excluded = set(exclude)
+    return [getattr(model, name) for name in schema.model_fields if name not in excluded]
+
+
+def row_dicts(result: Result) -> List[Dict[str, Any]]:
+    """Converte as tuplas de uma consulta em dicts prontos para serializar"""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+async def load_children(
+    db: AsyncSession,
+    parents: List[Dict[str, Any]],
+    field: str,
+    schema: Type[BaseModel],
+    model,
+    parent_column,
+) -> None:
+    """
+    Carrega os filhos de todos os `parents` em uma única consulta (como o
+    selectinload) e os anexa como lista em `parent[field]`.
+    """
+    by_id = {}
+    for parent in parents:
+        parent[field] = []
+        by_id[parent["id"]] = parent
+    if not by_id:
+        return
+
+    result = await db.execute(
+        select(parent_column.label("parent_id"), *schema_columns(schema, model))
+        .where(parent_column.in_(by_id))
+        .order_by(model.id)
+    )
+    keys = list(result.keys())[1:]
+    for parent_id, *values in result:
+        by_id[parent_id][field].append(dict(zip(keys, values)))
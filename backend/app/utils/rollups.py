@@ -0,0 +1,179 @@
+"""
+Manutenção incremental da tabela StudyRollup.
+
+As rotas chamam `add_summary_stats` / `add_test_stats` antes do commit, de modo
+que os totais são atualizados na mesma transação da escrita. Para preencher a
+tabela a partir do histórico existente:
+
+    python -m app.utils.rollups [--user-id ID]
+"""
+import argparse
+import asyncio
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import SessionLocal, dialect_insert
+from app.models import StudyRollup, Summary, TestResult
+
+# Usuários processados por vez na reconstrução
+REBUILD_USER_BATCH = 500
+
+# Dia de um resultado de teste: a mesma expressão (data no banco) ao somar,
+# subtrair e reconstruir, para que os três caminhos usem o mesmo dia
+TEST_DAY = func.date(TestResult.created_at)
+
+
+def period_starts(day: date) -> List[Tuple[str, date]]:
+    """Retorna o início de cada período (dia, semana, mês) que contém `day`"""
+    return [
+        ("day", day),
+        ("week", day - timedelta(days=day.weekday())),
+        ("month", day.replace(day=1)),
+    ]
+
+
+async def _apply(db: AsyncSession, user_id: int, day: date, **deltas) -> None:
+    """Soma os deltas aos totais do dia, da semana e do mês em um único upsert"""
+    rows = [
+        {
+            "user_id": user_id,
+            "period": period,
+            "period_start": start,
+            "study_time": deltas.get("study_time", 0),
+            "study_sessions": deltas.get("study_sessions", 0),
+            "test_count": deltas.get("test_count", 0),
+            "score_total": deltas.get("score_total", 0),
+        }
+        for period, start in period_starts(day)
+    ]
+
+    stmt = dialect_insert(db, StudyRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "period", "period_start"],
+        set_={
+            "study_time": StudyRollup.study_time + stmt.excluded.study_time,
+            "study_sessions": StudyRollup.study_sessions + stmt.excluded.study_sessions,
+            "test_count": StudyRollup.test_count + stmt.excluded.test_count,
+            "score_total": StudyRollup.score_total + stmt.excluded.score_total,
+            "updated_at": func.now(),
+        }
+    )
+    await db.execute(stmt)
+
+
+async def add_summary_stats(db: AsyncSession, user_id: int, study_date: date, study_time: int, sign: int = 1) -> None:
+    """Adiciona (sign=1) ou remove (sign=-1) um resumo dos totais"""
+    await _apply(db, user_id, study_date, study_time=sign * study_time, study_sessions=sign)
+
+
+async def add_test_stats(db: AsyncSession, user_id: int, day, score: int, count: int = 1, sign: int = 1) -> None:
+    """
+    Adiciona (sign=1) ou remove (sign=-1) resultados de teste dos totais.
+
+    `day` é o valor de TEST_DAY do resultado (ex: retornado pelo INSERT).
+    """
+    await _apply(db, user_id, _as_date(day), test_count=sign * count, score_total=sign * score)
+
+
+async def remove_summary_tests(db: AsyncSession, user_id: int, summary_id: int) -> None:
+    """Remove dos totais os testes de um resumo (apagados em cascata junto com ele)"""
+    result = await db.execute(
+        select(TEST_DAY, func.count(), func.sum(TestResult.score))
+        .where(TestResult.summary_id == summary_id, TestResult.user_id == user_id)
+        .group_by(TEST_DAY)
+    )
+    for day, count, score_total in result.all():
+        await add_test_stats(db, user_id, day, score_total, count=count, sign=-1)
+
+
+def _as_date(value) -> date:
+    # func.date() retorna string no SQLite
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _accumulate(totals: Dict, user_id: int, day: date, **values) -> None:
+    for period, start in period_starts(day):
+        row = totals.setdefault((user_id, period, start), {
+            "study_time": 0, "study_sessions": 0, "test_count": 0, "score_total": 0
+        })
+        for column, value in values.items():
+            row[column] += value
+
+
+async def _rebuild_users(db: AsyncSession, user_ids: Iterable[int]) -> int:
+    user_ids = list(user_ids)
+    totals: Dict = {}
+
+    summaries = await db.execute(
+        select(Summary.user_id, Summary.study_date, func.sum(Summary.study_time), func.count())
+        .where(Summary.user_id.in_(user_ids))
+        .group_by(Summary.user_id, Summary.study_date)
+    )
+    for user_id, day, study_time, sessions in summaries.all():
+        _accumulate(totals, user_id, day, study_time=study_time, study_sessions=sessions)
+
+    tests = await db.execute(
+        select(TestResult.user_id, TEST_DAY, func.count(), func.sum(TestResult.score))
+        .where(TestResult.user_id.in_(user_ids))
+        .group_by(TestResult.user_id, TEST_DAY)
+    )
+    for user_id, day, count, score_total in tests.all():
+        _accumulate(totals, user_id, _as_date(day), test_count=count, score_total=score_total)
+
+    await db.execute(delete(StudyRollup).where(StudyRollup.user_id.in_(user_ids)))
+    if totals:
+        await db.execute(dialect_insert(db, StudyRollup), [
+            {"user_id": user_id, "period": period, "period_start": start, **values}
+            for (user_id, period, start), values in totals.items()
+        ])
+    return len(totals)
+
+
+async def rebuild_rollups(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """
+    Recalcula os totais a partir de Summary e TestResult (backfill).
+
+    Processa os usuários em lotes, com um commit por lote, para manter a
+    memória e o tamanho das transações limitados. Usuários que só têm linhas
+    em StudyRollup (histórico apagado) também entram, e ficam sem linhas.
+    Retorna o número de linhas.
+    """
+    if user_id is not None:
+        count = await _rebuild_users(db, [user_id])
+        await db.commit()
+        return count
+
+    total = 0
+    last_id = 0
+    while True:
+        # Usuários com histórico ou com totais, em ordem, a partir do último lote
+        result = await db.execute(
+            select(Summary.user_id).where(Summary.user_id > last_id)
+            .union(
+                select(TestResult.user_id).where(TestResult.user_id > last_id),
+                select(StudyRollup.user_id).where(StudyRollup.user_id > last_id)
+            )
+            .order_by("user_id")
+            .limit(REBUILD_USER_BATCH)
+        )
+        user_ids = result.scalars().all()
+        if not user_ids:
+            return total
+
+        total += await _rebuild_users(db, user_ids)
+        await db.commit()
+        last_id = user_ids[-1]
+
+
+async def _main(user_id: Optional[int]) -> None:
+    async with SessionLocal() as db:
+        count = await rebuild_rollups(db, user_id)
+    print(f"StudyRollup reconstruída: {count} linhas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstrói a tabela StudyRollup a partir do histórico")
+    parser.add_argument("--user-id", type=int, default=None, help="Reconstruir apenas um usuário")
+    args = parser.parse_args()
+    asyncio.run(_main(args.user_id))
@@ -0,0 +1,332 @@
+"""
+Busca textual nos resumos (texto do resumo e objetivos).
+
+Cada resumo tem uma linha em SummarySearch, mantida pelas rotas na mesma
+transação da escrita (`index_summary`). No PostgreSQL o documento é um
+tsvector (texto com peso A, objetivos com peso B) com índice GIN, e a busca
+usa `websearch_to_tsquery`, `ts_rank` e `ts_headline`. Nos demais bancos
+(SQLite, usado em testes locais) o documento guarda as palavras normalizadas,
+que servem de pré-filtro, e o ranking e os trechos são calculados em Python.
+
+Para preencher a tabela a partir do histórico:
+
+    python -m app.utils.search [--user-id ID]
+"""
+import argparse
+import asyncio
+import html
+import math
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, bindparam, delete, func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import SessionLocal, dialect_insert
+from app.models import Summary, SummaryObjective, SummarySearch
+
+# Usuários processados por vez na reconstrução
+REBUILD_USER_BATCH = 500
+
+# Marcadores do ts_headline, trocados por <mark> depois de escapar o HTML
+_START, _STOP = "\x02", "\x03"
+_SNIPPET_OPTIONS = f"StartSel={_START}, StopSel={_STOP}, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=\" … \""
+_OBJECTIVE_OPTIONS = f"StartSel={_START}, StopSel={_STOP}, HighlightAll=true"
+
+# Pesos do ts_rank para os rótulos A (texto) e B (objetivos)
+_TEXT_WEIGHT, _OBJECTIVE_WEIGHT = 1.0, 0.4
+_SNIPPET_WORDS = 30
+
+_WORD = re.compile(r"\w+")
+
+
+def fold(text: str) -> str:
+    """Minúsculas e sem acentos ("Célula" -> "celula")"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(fold(text))
+
+
+def _is_postgres(db: AsyncSession) -> bool:
+    return db.bind.dialect.name == "postgresql"
+
+
+def _weighted_vector(summary_text, objectives_text):
+    config = settings.SEARCH_TEXT_CONFIG
+    # Rótulos como literais: setweight espera "char", sem conversão implícita de varchar
+    return func.setweight(func.to_tsvector(config, summary_text), literal_column("'A'")).op("||")(
+        func.setweight(func.to_tsvector(config, objectives_text), literal_column("'B'"))
+    )
+
+
+def _upsert_statement(db: AsyncSession):
+    stmt = dialect_insert(db, SummarySearch)
+    if _is_postgres(db):
+        document = _weighted_vector(bindparam("summary_text"), bindparam("objectives_text"))
+    else:
+        document = bindparam("document")
+    stmt = stmt.values(summary_id=bindparam("summary_id"), user_id=bindparam("user_id"), document=document)
+    return stmt.on_conflict_do_update(
+        index_elements=["summary_id"],
+        set_={"user_id": stmt.excluded.user_id, "document": stmt.excluded.document}
+    )
+
+
+def _document_params(db: AsyncSession, summary_id: int, user_id: int, summary_text: str, objectives: Sequence[str]) -> dict:
+    params = {"summary_id": summary_id, "user_id": user_id}
+    if _is_postgres(db):
+        params.update(summary_text=summary_text, objectives_text=" ".join(objectives))
+    else:
+        params["document"] = " ".join(tokenize(summary_text) + tokenize(" ".join(objectives)))
+    return params
+
+
+async def index_summary(
+    db: AsyncSession, summary_id: int, user_id: int, summary_text: str, objectives: Sequence[str]
+) -> None:
+    """Cria ou atualiza o documento de busca do resumo (chamar antes do commit)"""
+    await index_summaries(db, [(summary_id, user_id, summary_text, objectives)])
+
+
+async def index_summaries(db: AsyncSession, documents: Sequence[Tuple[int, int, str, Sequence[str]]]) -> None:
+    """Versão em lote de `index_summary`: (summary_id, user_id, texto, objetivos) por resumo"""
+    if documents:
+        await db.execute(_upsert_statement(db), [_document_params(db, *document) for document in documents])
+
+
+async def unindex_summary(db: AsyncSession, summary_id: int) -> None:
+    """Remove o documento do resumo (o ON DELETE CASCADE não é garantido no SQLite)"""
+    await db.execute(delete(SummarySearch).where(SummarySearch.summary_id == summary_id))
+
+
+def _highlight(raw: str) -> str:
+    """Escapa o HTML do trecho e troca os marcadores por <mark>"""
+    return html.escape(raw).replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+async def _search_postgres(
+    db: AsyncSession, user_id: int, q: str, limit: int, after: Optional[Tuple[float, int]]
+) -> List[dict]:
+    config = settings.SEARCH_TEXT_CONFIG
+    query = func.websearch_to_tsquery(config, q)
+    # Normalização 1: divide pelo log do tamanho (resumos longos não dominam)
+    rank = func.ts_rank(SummarySearch.document, query, 1)
+    matches = (
+        select(SummarySearch.summary_id, rank.label("rank"))
+        .where(SummarySearch.user_id == user_id, SummarySearch.document.op("@@")(query))
+        .subquery()
+    )
+
+    page = select(matches.c.summary_id, matches.c.rank)
+    if after is not None:
+        last_rank, last_id = after
+        page = page.where(or_(
+            matches.c.rank < last_rank,
+            and_(matches.c.rank == last_rank, matches.c.summary_id < last_id)
+        ))
+    page = page.order_by(matches.c.rank.desc(), matches.c.summary_id.desc()).limit(limit).subquery()
+
+    # ts_headline é caro: calculado só para as linhas da página
+    result = await db.execute(
+        select(
+            Summary.id, Summary.challenge_id, Summary.study_date, Summary.difficulty, page.c.rank,
+            func.ts_headline(config, Summary.summary_text, query, _SNIPPET_OPTIONS).label("snippet"),
+        )
+        .join(page, page.c.summary_id == Summary.id)
+        .order_by(page.c.rank.desc(), Summary.id.desc())
+    )
+    hits = [{**row._asdict(), "objectives": []} for row in result]
+    for hit in hits:
+        hit["snippet"] = _highlight(hit["snippet"])
+
+    if hits:
+        by_id = {hit["id"]: hit for hit in hits}
+        objectives = await db.execute(
+            select(
+                SummaryObjective.summary_id,
+                func.ts_headline(config, SummaryObjective.objective_text, query, _OBJECTIVE_OPTIONS),
+            )
+            .where(
+                SummaryObjective.summary_id.in_(by_id),
+                func.to_tsvector(config, SummaryObjective.objective_text).op("@@")(query),
+            )
+            .order_by(SummaryObjective.id)
+        )
+        for summary_id, headline in objectives:
+            by_id[summary_id]["objectives"].append(_highlight(headline))
+    return hits
+
+
+def _count(tokens: Iterable[str], term: str) -> int:
+    # Prefixo no lugar do stemming do PostgreSQL ("celula" casa com "celulas")
+    return sum(1 for token in tokens if token.startswith(term))
+
+
+def _snippet(text: str, terms: Sequence[str]) -> str:
+    """Janela de palavras em torno do primeiro termo encontrado, com os termos em <mark>"""
+    words = list(_WORD.finditer(text))
+    matched = {i for i, word in enumerate(words) if fold(word.group()).startswith(tuple(terms))}
+    if not words:
+        return html.escape(text)
+
+    first = min(matched, default=0)
+    start = max(0, first - _SNIPPET_WORDS // 3)
+    end = min(len(words), start + _SNIPPET_WORDS)
+    parts = ["… "] if start > 0 else []
+    position = words[start].start()
+    for i in range(start, end):
+        word = words[i]
+        parts.append(html.escape(text[position:word.start()]))
+        if i in matched:
+            parts.append(f"<mark>{html.escape(word.group())}</mark>")
+        else:
+            parts.append(html.escape(word.group()))
+        position = word.end()
+    if end < len(words):
+        parts.append(" …")
+    else:
+        parts.append(html.escape(text[position:]))
+    return "".join(parts)
+
+
+async def _search_in_process(
+    db: AsyncSession, user_id: int, q: str, limit: int, after: Optional[Tuple[float, int]]
+) -> List[dict]:
+    terms = list(dict.fromkeys(tokenize(q)))
+    if not terms:
+        return []
+
+    # Pré-filtro no banco pelas palavras normalizadas; ranking e trechos aqui
+    candidates = select(SummarySearch.summary_id).where(SummarySearch.user_id == user_id)
+    for term in terms:
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        candidates = candidates.where(SummarySearch.document.like(f"%{escaped}%", escape="\\"))
+
+    result = await db.execute(
+        select(Summary.id, Summary.challenge_id, Summary.study_date, Summary.difficulty, Summary.summary_text)
+        .where(Summary.id.in_(candidates))
+    )
+    rows = result.all()
+    objectives: Dict[int, List[str]] = {}
+    if rows:
+        result = await db.execute(
+            select(SummaryObjective.summary_id, SummaryObjective.objective_text)
+            .where(SummaryObjective.summary_id.in_([row.id for row in rows]))
+            .order_by(SummaryObjective.id)
+        )
+        for summary_id, objective_text in result:
+            objectives.setdefault(summary_id, []).append(objective_text)
+
+    hits = []
+    for row in rows:
+        text_tokens = tokenize(row.summary_text)
+        objective_tokens = tokenize(" ".join(objectives.get(row.id, [])))
+        counts = [(_count(text_tokens, term), _count(objective_tokens, term)) for term in terms]
+        if not all(in_text or in_objectives for in_text, in_objectives in counts):
+            continue
+        score = sum(_TEXT_WEIGHT * in_text + _OBJECTIVE_WEIGHT * in_objectives for in_text, in_objectives in counts)
+        rank = score / (1 + math.log(len(text_tokens) + len(objective_tokens)))
+        if after is not None and (rank, row.id) >= after:
+            continue
+        hits.append((rank, row))
+
+    hits.sort(key=lambda hit: (hit[0], hit[1].id), reverse=True)
+    return [
+        {
+            "id": row.id,
+            "challenge_id": row.challenge_id,
+            "study_date": row.study_date,
+            "difficulty": row.difficulty,
+            "rank": rank,
+            "snippet": _snippet(row.summary_text, terms),
+            "objectives": [
+                _snippet(objective, terms) for objective in objectives.get(row.id, [])
+                if any(token.startswith(tuple(terms)) for token in tokenize(objective))
+            ],
+        }
+        for rank, row in hits[:limit]
+    ]
+
+
+async def search_summaries(
+    db: AsyncSession, user_id: int, q: str, limit: int, after: Optional[Tuple[float, int]] = None
+) -> List[dict]:
+    """
+    Resumos do usuário que contêm todos os termos de `q`, do mais relevante ao menos.
+
+    `after` é a chave (rank, id) da última linha da página anterior. Os trechos
+    vêm com o HTML escapado e os termos encontrados entre <mark> e </mark>.
+    """
+    if _is_postgres(db):
+        return await _search_postgres(db, user_id, q, limit, after)
+    return await _search_in_process(db, user_id, q, limit, after)
+
+
+async def _rebuild_users(db: AsyncSession, user_ids: Iterable[int]) -> int:
+    user_ids = list(user_ids)
+    summaries = (await db.execute(
+        select(Summary.id, Summary.user_id, Summary.summary_text).where(Summary.user_id.in_(user_ids))
+    )).all()
+
+    objectives: Dict[int, List[str]] = {}
+    result = await db.execute(
+        select(SummaryObjective.summary_id, SummaryObjective.objective_text)
+        .join(Summary, Summary.id == SummaryObjective.summary_id)
+        .where(Summary.user_id.in_(user_ids))
+        .order_by(SummaryObjective.id)
+    )
+    for summary_id, objective_text in result:
+        objectives.setdefault(summary_id, []).append(objective_text)
+
+    await db.execute(delete(SummarySearch).where(SummarySearch.user_id.in_(user_ids)))
+    await index_summaries(db, [
+        (summary_id, user_id, summary_text, objectives.get(summary_id, []))
+        for summary_id, user_id, summary_text in summaries
+    ])
+    return len(summaries)
+
+
+async def rebuild_search_index(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """
+    Recalcula SummarySearch a partir de Summary e SummaryObjective (backfill).
+
+    Processa os usuários em lotes, com um commit por lote. Retorna o número
+    de documentos.
+    """
+    if user_id is not None:
+        count = await _rebuild_users(db, [user_id])
+        await db.commit()
+        return count
+
+    total = 0
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(Summary.user_id).where(Summary.user_id > last_id)
+            .group_by(Summary.user_id)
+            .order_by(Summary.user_id)
+            .limit(REBUILD_USER_BATCH)
+        )
+        user_ids = result.scalars().all()
+        if not user_ids:
+            return total
+
+        total += await _rebuild_users(db, user_ids)
+        await db.commit()
+        last_id = user_ids[-1]
+
+
+async def _main(user_id: Optional[int]) -> None:
+    async with SessionLocal() as db:
+        count = await rebuild_search_index(db, user_id)
+    print(f"SummarySearch reconstruída: {count} documentos")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstrói o índice de busca textual dos resumos")
+    parser.add_argument("--user-id", type=int, default=None, help="Reconstruir apenas um usuário")
+    args = parser.parse_args()
+    asyncio.run(_main(args.user_id))
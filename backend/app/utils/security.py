@@ -1,11 +1,94 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from app.config import settings
+from app.metrics import PASSWORD_HASH_QUEUE_TIME
 
 # Contexto para hash de senha
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+
+class PasswordHashPoolFull(Exception):
+    """Fila do pool de hash de senha está cheia"""
+
+
+class PasswordHashPool:
+    """
+    Executa o bcrypt em um pool de threads limitado, fora do event loop.
+    
+    O bcrypt libera o GIL durante o cálculo, então as threads rodam em paralelo
+    de verdade. Quando há mais de `workers + max_queue` operações pendentes, a
+    chamada é rejeitada imediatamente com `PasswordHashPoolFull`.
+    """
+    
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+    
+    async def run(self, func, *args):
+        """Executa `func(*args)` no pool, respeitando o limite da fila"""
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHashPoolFull()
+        
+        submitted_at = time.perf_counter()
+        
+        def task():
+            queue_time = time.perf_counter() - submitted_at
+            return func(*args), queue_time
+        
+        # O contador só é alterado no event loop, não precisa de lock
+        self._pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, task)
+        future.add_done_callback(self._release)
+        # Se a requisição for cancelada, a thread continua ocupada até o bcrypt
+        # terminar: o shield mantém a operação contada em `_pending` até lá
+        result, queue_time = await asyncio.shield(future)
+        
+        self.completed += 1
+        self.queue_time_total += queue_time
+        self.queue_time_max = max(self.queue_time_max, queue_time)
+        PASSWORD_HASH_QUEUE_TIME.observe(queue_time)
+        return result
+    
+    def _release(self, future: asyncio.Future) -> None:
+        self._pending -= 1
+        # Evita o aviso de exceção não lida quando ninguém mais aguarda o resultado
+        if not future.cancelled():
+            future.exception()
+    
+    def stats(self) -> dict:
+        """Métricas da fila de hash de senha"""
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "queued": max(0, self._pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_time_avg": self.queue_time_total / self.completed if self.completed else 0.0,
+            "queue_time_max": self.queue_time_max,
+        }
+
+
+password_hash_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_SIZE
+)
 
 
 def hash_password(password: str) -> str:
@@ -46,6 +129,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """Cria um hash da senha no pool de bcrypt (não bloqueia o event loop)"""
+    return await password_hash_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifica a senha no pool de bcrypt (não bloqueia o event loop)"""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Cria um token JWT"""
     to_encode = data.copy()
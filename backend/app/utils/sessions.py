@@ -0,0 +1,250 @@
+"""
+Sessões de login: registro, revogação e limpeza das expiradas.
+
+Cada login/registro grava uma linha em Session e o JWT leva o identificador da
+sessão no claim `sid`. Verificar a tabela a cada requisição custaria uma
+consulta por chamada; em vez disso, cada processo da API mantém em memória o
+conjunto exato das sessões revogadas que ainda não expiraram
+(`revoked_sessions`), sincronizado com a tabela a cada
+SESSION_SYNC_INTERVAL_SECONDS. O caso comum (sessão não revogada) é uma consulta
+a um set, sem acesso ao banco.
+
+Como os tokens expiram em minutos, o conjunto só guarda as revogações recentes
+e continua pequeno. A revogação vale na hora no processo que a recebeu e, nos
+demais, em até SESSION_SYNC_INTERVAL_SECONDS.
+
+Para apagar as sessões expiradas uma vez (o `SessionMaintenance` já faz isso a
+cada SESSION_PURGE_INTERVAL_SECONDS junto com a API):
+
+    python -m app.utils.sessions --purge
+"""
+import argparse
+import asyncio
+import ipaddress
+import logging
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Session
+from app.utils.security import create_access_token
+
+logger = logging.getLogger(__name__)
+
+# Limite da coluna Session.user_agent
+MAX_USER_AGENT_LENGTH = 500
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _timestamp(value: datetime) -> float:
+    # SQLite devolve o horário sem fuso: é o horário UTC gravado
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RevocationList:
+    """
+    Sessões revogadas e ainda válidas (sid -> instante de expiração).
+
+    Revogações nunca são desfeitas: a sincronização só acrescenta sessões, e
+    elas saem do conjunto quando o token expira. Usado apenas a partir do event
+    loop, não precisa de lock.
+    """
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self.synced_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, sid: str) -> bool:
+        return sid in self._revoked
+
+    def add(self, sid: str, expires_at: datetime) -> None:
+        self._revoked[sid] = _timestamp(expires_at)
+
+    def merge(self, entries: Iterable[Tuple[str, datetime]]) -> None:
+        """Acrescenta as revogações lidas da tabela e descarta as já expiradas"""
+        for sid, expires_at in entries:
+            self.add(sid, expires_at)
+        now = time.time()
+        for sid in [sid for sid, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[sid]
+        self.synced_at = now
+
+    def stats(self) -> dict:
+        return {
+            "revoked": len(self._revoked),
+            "synced_at": self.synced_at,
+        }
+
+
+revoked_sessions = RevocationList()
+
+
+def _client_ip(request: Request) -> Optional[str]:
+    """IP do cliente, se for um endereço válido (a coluna é INET no PostgreSQL)"""
+    host = request.client.host if request.client else None
+    try:
+        return str(ipaddress.ip_address(host)) if host else None
+    except ValueError:
+        return None
+
+
+def create_session(db: AsyncSession, user_id: int, request: Request, expires_delta: timedelta) -> str:
+    """Registra a sessão na transação de `db` (sem commit) e retorna o JWT com o claim `sid`"""
+    sid = secrets.token_urlsafe(32)
+    user_agent = request.headers.get("user-agent")
+    db.add(Session(
+        user_id=user_id,
+        token=sid,
+        expires_at=_utcnow() + expires_delta,
+        ip_address=_client_ip(request),
+        user_agent=user_agent[:MAX_USER_AGENT_LENGTH] if user_agent else None
+    ))
+    return create_access_token(data={"sub": str(user_id), "sid": sid}, expires_delta=expires_delta)
+
+
+async def revoke_session(
+    db: AsyncSession,
+    user_id: int,
+    session_id: Optional[int] = None,
+    sid: Optional[str] = None
+) -> bool:
+    """
+    Revoga a sessão ativa do usuário pelo id da linha ou pelo `sid` (sem
+    nenhum dos dois, todas as sessões ativas dele) e faz o commit.
+
+    Retorna False se nenhuma sessão ativa foi encontrada.
+    """
+    query = (
+        update(Session)
+        .where(
+            Session.user_id == user_id,
+            Session.revoked_at.is_(None),
+            Session.expires_at > _utcnow()
+        )
+        .values(revoked_at=_utcnow())
+        .returning(Session.token, Session.expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    if session_id is not None:
+        query = query.where(Session.id == session_id)
+    if sid is not None:
+        query = query.where(Session.token == sid)
+    result = await db.execute(query)
+    revoked = result.all()
+    await db.commit()
+
+    # Vale na hora neste processo; os demais recebem na próxima sincronização
+    for token, expires_at in revoked:
+        revoked_sessions.add(token, expires_at)
+    return bool(revoked)
+
+
+async def sync_revocations(db: AsyncSession) -> int:
+    """Carrega na memória as sessões revogadas que ainda não expiraram (índice idx_session_revoked)"""
+    result = await db.execute(
+        select(Session.token, Session.expires_at)
+        .where(Session.revoked_at.isnot(None), Session.expires_at > _utcnow())
+    )
+    revoked_sessions.merge(result.all())
+    return len(revoked_sessions)
+
+
+async def purge_expired_sessions(db: AsyncSession, batch_size: Optional[int] = None) -> int:
+    """Apaga as sessões expiradas em lotes (um commit por lote) e retorna quantas foram apagadas"""
+    batch_size = batch_size or settings.SESSION_PURGE_BATCH_SIZE
+    total = 0
+    while True:
+        expired = (
+            select(Session.id)
+            .where(Session.expires_at < _utcnow())
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            delete(Session)
+            .where(Session.id.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+class SessionMaintenance:
+    """Sincroniza as revogações e apaga as sessões expiradas periodicamente (no event loop da API)"""
+
+    def __init__(self, interval: Optional[float] = None, purge_interval: Optional[float] = None):
+        self.interval = settings.SESSION_SYNC_INTERVAL_SECONDS if interval is None else interval
+        self.purge_interval = settings.SESSION_PURGE_INTERVAL_SECONDS if purge_interval is None else purge_interval
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Faz a primeira sincronização antes de a API atender e segue em segundo plano"""
+        await self._sync()
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+
+    async def _sync(self) -> None:
+        try:
+            async with SessionLocal() as db:
+                await sync_revocations(db)
+        except Exception:
+            logger.error("Falha ao sincronizar as sessões revogadas", exc_info=True)
+
+    async def _purge(self) -> None:
+        try:
+            async with SessionLocal() as db:
+                purged = await purge_expired_sessions(db)
+            if purged:
+                logger.info("%s sessões expiradas apagadas", purged)
+        except Exception:
+            logger.error("Falha ao apagar as sessões expiradas", exc_info=True)
+
+    async def run(self) -> None:
+        next_purge = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stop.is_set():
+                return
+            await self._sync()
+            if time.monotonic() >= next_purge:
+                await self._purge()
+                next_purge = time.monotonic() + self.purge_interval
+
+
+async def _main() -> None:
+    async with SessionLocal() as db:
+        purged = await purge_expired_sessions(db)
+    print(f"Session: {purged} sessões expiradas apagadas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manutenção das sessões de login")
+    parser.add_argument("--purge", action="store_true", help="Apagar as sessões expiradas, em lotes")
+    args = parser.parse_args()
+    if args.purge:
+        asyncio.run(_main())
+    else:
+        parser.print_help()
@@ -0,0 +1,183 @@
+"""
+Motor de streaks baseado em bitmaps anuais (tabela StudyCalendar).
+
+Cada usuário tem uma linha por ano com 1 bit por dia. As rotas de resumo
+chamam `mark_study_day` antes do commit; o streak atual, o maior streak e o
+calendário de um intervalo são calculados com operações de bits, sem
+consultar a tabela Summary. Para preencher a partir do histórico:
+
+    python -m app.utils.streaks [--user-id ID]
+"""
+import argparse
+import asyncio
+import base64
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import SessionLocal, dialect_insert
+from app.models import StudyCalendar, Summary
+from app.models.study_calendar import YEAR_BITMAP_BYTES
+
+# Usuários processados por vez na reconstrução
+REBUILD_USER_BATCH = 500
+
+
+def _bit_index(day: date) -> int:
+    return day.timetuple().tm_yday - 1
+
+
+async def mark_study_day(db: AsyncSession, user_id: int, day: date, studied: bool = True) -> None:
+    """Marca (ou desmarca) um dia de estudo no bitmap do ano"""
+    if studied:
+        # Garante que a linha do ano existe sem conflitar com escritas concorrentes
+        await db.execute(
+            dialect_insert(db, StudyCalendar)
+            .values(user_id=user_id, year=day.year, days=bytes(YEAR_BITMAP_BYTES))
+            .on_conflict_do_nothing(index_elements=["user_id", "year"])
+        )
+
+    result = await db.execute(
+        select(StudyCalendar)
+        .where(StudyCalendar.user_id == user_id, StudyCalendar.year == day.year)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    calendar = result.scalar_one_or_none()
+    if calendar is None:
+        return
+
+    bits = int.from_bytes(calendar.days, "little")
+    mask = 1 << _bit_index(day)
+    bits = bits | mask if studied else bits & ~mask
+    calendar.days = bits.to_bytes(YEAR_BITMAP_BYTES, "little")
+    # Sem autoflush: a próxima leitura com populate_existing (ex: mover o resumo
+    # para outro dia do mesmo ano) descartaria esta alteração pendente
+    await db.flush()
+
+
+async def load_study_days(db: AsyncSession, user_id: int) -> Tuple[date, int]:
+    """
+    Carrega todos os anos do usuário em um único inteiro.
+
+    Retorna `(base, bits)`, onde o bit `i` corresponde ao dia `base + i`.
+    """
+    result = await db.execute(
+        select(StudyCalendar.year, StudyCalendar.days)
+        .where(StudyCalendar.user_id == user_id)
+        .order_by(StudyCalendar.year)
+    )
+    rows = result.all()
+    if not rows:
+        return date(date.today().year, 1, 1), 0
+
+    base = date(rows[0].year, 1, 1)
+    bits = 0
+    for year, days in rows:
+        offset = (date(year, 1, 1) - base).days
+        bits |= int.from_bytes(days, "little") << offset
+    return base, bits
+
+
+def current_streak(base: date, bits: int, today: date) -> int:
+    """Dias seguidos até hoje (ou até ontem, se ainda não estudou hoje)"""
+    index = (today - base).days
+    if index < 0:
+        return 0
+    if not (bits >> index) & 1:
+        index -= 1
+
+    streak = 0
+    while index >= 0 and (bits >> index) & 1:
+        streak += 1
+        index -= 1
+    return streak
+
+
+def longest_streak(bits: int) -> int:
+    """Maior sequência de bits 1 (cada iteração encurta todas as sequências em 1)"""
+    longest = 0
+    while bits:
+        bits &= bits >> 1
+        longest += 1
+    return longest
+
+
+def pack_range(base: date, bits: int, start: date, end: date) -> str:
+    """Calendário de `start` a `end` como bits em base64 (bit i = dia start + i)"""
+    length = (end - start).days + 1
+    offset = (start - base).days
+    window = bits >> offset if offset >= 0 else bits << -offset
+    window &= (1 << length) - 1
+    packed = window.to_bytes((length + 7) // 8, "little")
+    return base64.b64encode(packed).decode("ascii")
+
+
+def iter_days(base: date, bits: int, start: date, end: date) -> Iterable[date]:
+    """Dias de estudo entre `start` e `end`, em ordem"""
+    offset = (start - base).days
+    window = bits >> offset if offset >= 0 else bits << -offset
+    length = (end - start).days + 1
+    window &= (1 << length) - 1
+    while window:
+        lowest = window & -window
+        yield start + timedelta(days=lowest.bit_length() - 1)
+        window ^= lowest
+
+
+async def _rebuild_users(db: AsyncSession, user_ids: Iterable[int]) -> int:
+    user_ids = list(user_ids)
+    calendars: Dict[Tuple[int, int], int] = {}
+
+    result = await db.execute(
+        select(Summary.user_id, Summary.study_date).where(Summary.user_id.in_(user_ids))
+    )
+    for user_id, day in result.all():
+        key = (user_id, day.year)
+        calendars[key] = calendars.get(key, 0) | (1 << _bit_index(day))
+
+    await db.execute(delete(StudyCalendar).where(StudyCalendar.user_id.in_(user_ids)))
+    if calendars:
+        await db.execute(dialect_insert(db, StudyCalendar), [
+            {"user_id": user_id, "year": year, "days": bits.to_bytes(YEAR_BITMAP_BYTES, "little")}
+            for (user_id, year), bits in calendars.items()
+        ])
+    return len(calendars)
+
+
+async def rebuild_calendars(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Recalcula os bitmaps a partir de Summary (backfill), em lotes de usuários"""
+    if user_id is not None:
+        count = await _rebuild_users(db, [user_id])
+        await db.commit()
+        return count
+
+    total = 0
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(Summary.user_id).where(Summary.user_id > last_id)
+            .distinct()
+            .order_by(Summary.user_id)
+            .limit(REBUILD_USER_BATCH)
+        )
+        user_ids = result.scalars().all()
+        if not user_ids:
+            return total
+
+        total += await _rebuild_users(db, user_ids)
+        await db.commit()
+        last_id = user_ids[-1]
+
+
+async def _main(user_id: Optional[int]) -> None:
+    async with SessionLocal() as db:
+        count = await rebuild_calendars(db, user_id)
+    print(f"StudyCalendar reconstruída: {count} linhas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstrói a tabela StudyCalendar a partir do histórico")
+    parser.add_argument("--user-id", type=int, default=None, help="Reconstruir apenas um usuário")
+    args = parser.parse_args()
+    asyncio.run(_main(args.user_id))
@@ -0,0 +1,341 @@
+"""
+Importação em lote de resumos (CSV ou NDJSON) em streaming.
+
+O corpo é lido em blocos e dividido em registros à medida que chega; cada
+registro é validado com as regras de `SummaryCreate` e acumulado até
+IMPORT_BATCH_SIZE linhas. Cada lote vira poucos comandos (upsert dos resumos
+com ON CONFLICT em uq_user_study_date, objetivos e índice de busca) e um
+commit, de modo que a memória não depende do tamanho do arquivo e um erro em
+uma linha não descarta as demais.
+
+CSV: cabeçalho obrigatório com as colunas de `SummaryCreate`; os objetivos vão
+em uma coluna `objectives`, separados por `|`.
+
+NDJSON: um objeto JSON por linha, no mesmo formato do corpo de POST /api/summaries.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import dialect_insert
+from app.models import Challenge, PhotoAsset, PhotoAssetUser, Summary, SummaryObjective
+from app.schemas.summary import SummaryCreate
+from app.utils.jobs import enqueue
+from app.utils.photos import photo_url
+from app.utils.rollups import rebuild_rollups
+from app.utils.search import index_summaries
+from app.utils.streaks import rebuild_calendars
+
+# Linhas validadas por lote (um commit por lote)
+IMPORT_BATCH_SIZE = 1000
+# Erros detalhados na resposta (os demais só entram na contagem)
+MAX_REPORTED_ERRORS = 1000
+# Tamanho máximo de um registro (linha do NDJSON ou registro do CSV)
+MAX_RECORD_BYTES = 1024 * 1024
+OBJECTIVE_SEPARATOR = "|"
+# Limites das colunas String(255) (no PostgreSQL, um valor maior abortaria o lote)
+MAX_FIELD_LENGTH = 255
+
+# Content-Type do corpo -> formato
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": "ndjson",
+}
+
+
+class ImportAborted(Exception):
+    """Registro inválido a ponto de não ser possível continuar a leitura"""
+
+
+async def _lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Linhas do corpo (UTF-8, com ou sem BOM), sem o terminador"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        lines = buffer.split("\n")
+        buffer = lines.pop()
+        if len(buffer) > MAX_RECORD_BYTES:
+            raise ImportAborted("linha maior que o tamanho máximo")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def _ndjson_records(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    number = 0
+    async for line in _lines(stream):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield number, None, "JSON inválido"
+            continue
+        if not isinstance(data, dict):
+            yield number, None, "cada linha deve ser um objeto JSON"
+            continue
+        yield number, data, None
+
+
+def _csv_row(header: List[str], values: List[str]) -> dict:
+    data = {}
+    for name, value in zip(header, values):
+        value = value.strip()
+        if name == "objectives":
+            data[name] = [item.strip() for item in value.split(OBJECTIVE_SEPARATOR) if item.strip()]
+        elif value:
+            data[name] = value
+    return data
+
+
+async def _csv_records(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    start = number = 0
+    async for line in _lines(stream):
+        number += 1
+        if not pending:
+            start = number
+        pending.append(line)
+        # Campo entre aspas com quebra de linha: o registro continua na próxima linha
+        record = "\n".join(pending)
+        if record.count('"') % 2:
+            if len(record) > MAX_RECORD_BYTES:
+                raise ImportAborted(f"registro iniciado na linha {start} maior que o tamanho máximo")
+            continue
+        pending.clear()
+        if not record.strip():
+            continue
+
+        values = next(csv.reader(io.StringIO(record)))
+        if header is None:
+            header = [name.strip() for name in values]
+            if "study_date" not in header:
+                raise ImportAborted("cabeçalho do CSV sem a coluna study_date")
+            continue
+        if len(values) != len(header):
+            yield start, None, f"esperadas {len(header)} colunas, encontradas {len(values)}"
+            continue
+        yield start, _csv_row(header, values), None
+
+    if pending:
+        yield start, None, "aspas não fechadas no fim do arquivo"
+
+
+def _validation_messages(exc: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in error['loc']) or 'linha'}: {error['msg']}"
+        for error in exc.errors()
+    ]
+
+
+class SummaryImporter:
+    """Estado de uma importação: lote atual, contadores e erros"""
+
+    def __init__(self, db: AsyncSession, user_id: int, on_conflict: str = "skip"):
+        self.db = db
+        self.user_id = user_id
+        self.on_conflict = on_conflict
+        self.batch: List[Tuple[int, SummaryCreate]] = []
+        # Datas já vistas no arquivo (uma por dia: limitado pelo histórico, não pelo arquivo)
+        self.seen_dates: Dict[date, int] = {}
+        self.challenge_ids: Optional[Set[int]] = None
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, line: int, messages: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": messages})
+
+    def _check(self, line: int, data: dict) -> Optional[SummaryCreate]:
+        try:
+            summary = SummaryCreate.model_validate(data)
+        except ValidationError as exc:
+            self.error(line, _validation_messages(exc))
+            return None
+
+        messages = []
+        if summary.challenge_id is not None and summary.challenge_id not in self.challenge_ids:
+            messages.append("challenge_id: desafio não encontrado")
+        if summary.photo_url and len(summary.photo_url) > MAX_FIELD_LENGTH:
+            messages.append(f"photo_url: máximo de {MAX_FIELD_LENGTH} caracteres")
+        if any(len(objective) > MAX_FIELD_LENGTH for objective in summary.objectives or []):
+            messages.append(f"objectives: máximo de {MAX_FIELD_LENGTH} caracteres por objetivo")
+        previous = self.seen_dates.get(summary.study_date)
+        if previous is not None:
+            messages.append(f"study_date: data repetida no arquivo (linha {previous})")
+        if messages:
+            self.error(line, messages)
+            return None
+
+        self.seen_dates[summary.study_date] = line
+        return summary
+
+    async def _resolve_photos(self) -> Dict[int, str]:
+        asset_ids = {summary.photo_asset_id for _, summary in self.batch if summary.photo_asset_id is not None}
+        if not asset_ids:
+            return {}
+        # Só as fotos enviadas pelo próprio usuário (as demais contam como não encontradas)
+        result = await self.db.execute(
+            select(PhotoAsset.id, PhotoAsset.sha256)
+            .join(PhotoAssetUser, PhotoAssetUser.asset_id == PhotoAsset.id)
+            .where(PhotoAsset.id.in_(asset_ids), PhotoAssetUser.user_id == self.user_id)
+        )
+        return {asset_id: photo_url(sha256) for asset_id, sha256 in result}
+
+    async def flush(self) -> None:
+        """Grava o lote atual em uma transação"""
+        if not self.batch:
+            return
+        db = self.db
+        photos = await self._resolve_photos()
+        rows = []
+        for line, summary in self.batch:
+            if summary.photo_asset_id is not None and summary.photo_asset_id not in photos:
+                self.error(line, ["photo_asset_id: foto não encontrada"])
+                continue
+            rows.append((line, summary))
+        self.batch = []
+        if not rows:
+            return
+
+        existing: Set[date] = set()
+        if self.on_conflict == "update":
+            result = await db.execute(
+                select(Summary.study_date).where(
+                    Summary.user_id == self.user_id,
+                    Summary.study_date.in_([summary.study_date for _, summary in rows])
+                )
+            )
+            existing = set(result.scalars())
+
+        stmt = dialect_insert(db, Summary)
+        if self.on_conflict == "update":
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "study_date"],
+                set_={
+                    "challenge_id": stmt.excluded.challenge_id,
+                    "study_time": stmt.excluded.study_time,
+                    "difficulty": stmt.excluded.difficulty,
+                    "summary_text": stmt.excluded.summary_text,
+                    "photo_url": stmt.excluded.photo_url,
+                    "photo_asset_id": stmt.excluded.photo_asset_id,
+                    "updated_at": func.now(),
+                }
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["user_id", "study_date"])
+
+        # Linhas ignoradas pelo ON CONFLICT não voltam no RETURNING: o mapeamento é pela data
+        result = await db.execute(stmt.returning(Summary.id, Summary.study_date, Summary.questions_hash), [
+            {
+                "user_id": self.user_id,
+                "challenge_id": summary.challenge_id,
+                "study_date": summary.study_date,
+                "study_time": summary.study_time,
+                "difficulty": summary.difficulty,
+                "summary_text": summary.summary_text,
+                "photo_url": photos.get(summary.photo_asset_id) or summary.photo_url,
+                "photo_asset_id": summary.photo_asset_id,
+            }
+            for _, summary in rows
+        ])
+        rows_written = result.all()
+        ids = {study_date: summary_id for summary_id, study_date, _ in rows_written}
+
+        written = [(ids[summary.study_date], summary) for _, summary in rows if summary.study_date in ids]
+        if existing:
+            await db.execute(delete(SummaryObjective).where(
+                SummaryObjective.summary_id.in_([summary_id for summary_id, summary in written if summary.study_date in existing])
+            ))
+        objectives = [
+            {"summary_id": summary_id, "objective_text": objective}
+            for summary_id, summary in written
+            for objective in summary.objectives or []
+        ]
+        if objectives:
+            await db.execute(insert(SummaryObjective), objectives)
+        await index_summaries(db, [
+            (summary_id, self.user_id, summary.summary_text, summary.objectives or [])
+            for summary_id, summary in written
+        ])
+        # Resumos substituídos que tinham perguntas geradas: atualizá-las em segundo plano
+        for summary_id, _, questions_hash in rows_written:
+            if questions_hash is not None:
+                await enqueue(
+                    db, "generate_questions", {"user_id": self.user_id, "summary_id": summary_id},
+                    key=f"generate_questions:{summary_id}"
+                )
+        await db.commit()
+
+        updated = sum(1 for _, summary in written if summary.study_date in existing)
+        self.updated += updated
+        self.inserted += len(written) - updated
+        self.skipped += len(rows) - len(written)
+
+    async def run(self, records: AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]) -> None:
+        result = await self.db.execute(select(Challenge.id).where(Challenge.user_id == self.user_id))
+        self.challenge_ids = set(result.scalars())
+
+        try:
+            async for line, data, problem in records:
+                if problem is not None:
+                    self.error(line, [problem])
+                    continue
+                summary = self._check(line, data)
+                if summary is None:
+                    continue
+                self.batch.append((line, summary))
+                if len(self.batch) >= IMPORT_BATCH_SIZE:
+                    await self.flush()
+        except ImportAborted as exc:
+            self.error(0, [f"importação interrompida: {exc}"])
+        await self.flush()
+
+    def report(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+async def import_summaries(
+    db: AsyncSession, user_id: int, stream: AsyncIterator[bytes], fmt: str, on_conflict: str = "skip"
+) -> dict:
+    """
+    Importa os resumos do corpo `stream` (`fmt`: csv ou ndjson) e retorna o relatório.
+
+    Resumos de datas já registradas são ignorados (`on_conflict="skip"`) ou
+    substituídos, com os objetivos (`on_conflict="update"`). No fim, os totais
+    agregados e o calendário de streak do usuário são reconstruídos uma vez,
+    em vez de um upsert por linha (também quando a leitura falha no meio,
+    já que os lotes anteriores foram gravados).
+    """
+    records = _csv_records(stream) if fmt == "csv" else _ndjson_records(stream)
+    importer = SummaryImporter(db, user_id, on_conflict)
+    try:
+        await importer.run(records)
+    finally:
+        if importer.inserted or importer.updated:
+            await db.rollback()
+            await rebuild_rollups(db, user_id)
+            await rebuild_calendars(db, user_id)
+    return importer.report()
@@ -0,0 +1,121 @@
+"""
+Worker da fila de jobs (ver app/utils/jobs.py) e registro das tarefas.
+
+Roda dentro da API (JOB_WORKER_IN_APP, padrão) ou em processos separados:
+
+    python -m app.worker [--queue default=4 --queue photos=2]
+
+Sem --queue, atende as filas de JOB_QUEUES. Com REMINDERS_ENABLED, o agendador
+dos lembretes de estudo (app/utils/reminders.py) roda no mesmo processo. O
+worker separado se recusa a iniciar com o cache de leitura em memória, cuja
+invalidação não chegaria aos processos da API: use CACHE_BACKEND=redis.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+from typing import Dict, List, Optional
+from app.config import settings
+from app.database import SessionLocal
+from app.utils.jobs import Worker, job_task
+from app.utils.photos import variant_pool
+from app.utils.question_generator import generate_summary_questions
+from app.utils.read_cache import invalidate_user_reads, read_cache
+from app.utils.reminders import ReminderScheduler, get_sink
+from app.utils.rollups import rebuild_rollups
+from app.utils.search import rebuild_search_index
+from app.utils.streaks import rebuild_calendars
+
+logger = logging.getLogger(__name__)
+
+
+@job_task("photo_variants")
+async def photo_variants(payload: dict) -> None:
+    """Miniaturas de uma foto enviada"""
+    await variant_pool.process(payload["asset_id"], payload["sha256"])
+
+
+@job_task("generate_questions")
+async def generate_questions(payload: dict) -> None:
+    """Atualiza as perguntas geradas de um resumo editado"""
+    async with SessionLocal() as db:
+        report = await generate_summary_questions(db, payload["user_id"], payload["summary_id"])
+    if report is not None and not report["unchanged"]:
+        await invalidate_user_reads(payload["user_id"])
+
+
+@job_task("deliver_reminders")
+async def deliver_reminders(payload: dict) -> None:
+    """Entrega um lote de lembretes de estudo ao destino configurado (REMINDER_SINK)"""
+    await get_sink().deliver(payload["reminders"])
+
+
+@job_task("rebuild_rollups")
+async def rebuild_rollups_task(payload: dict) -> None:
+    async with SessionLocal() as db:
+        await rebuild_rollups(db, payload.get("user_id"))
+
+
+@job_task("rebuild_calendars")
+async def rebuild_calendars_task(payload: dict) -> None:
+    async with SessionLocal() as db:
+        await rebuild_calendars(db, payload.get("user_id"))
+
+
+@job_task("rebuild_search_index")
+async def rebuild_search_index_task(payload: dict) -> None:
+    async with SessionLocal() as db:
+        await rebuild_search_index(db, payload.get("user_id"))
+
+
+def parse_queues(values: List[str]) -> Dict[str, int]:
+    """["default=4", "photos"] -> {"default": 4, "photos": 1}"""
+    queues = {}
+    for value in values:
+        name, _, limit = value.partition("=")
+        queues[name.strip()] = int(limit) if limit else 1
+    return queues
+
+
+def create_worker(queues: Optional[Dict[str, int]] = None) -> Worker:
+    """Worker com as tarefas deste módulo registradas (padrão: filas de JOB_QUEUES)"""
+    return Worker(queues or settings.JOB_QUEUES)
+
+
+def create_scheduler() -> Optional[ReminderScheduler]:
+    """Agendador dos lembretes de estudo, que roda junto com o worker (REMINDERS_ENABLED)"""
+    return ReminderScheduler() if settings.REMINDERS_ENABLED else None
+
+
+async def _main(queues: Optional[Dict[str, int]]) -> None:
+    worker = create_worker(queues)
+    scheduler = create_scheduler()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    worker.start()
+    if scheduler is not None:
+        scheduler.start()
+    await stop.wait()
+    logger.info("Encerrando: aguardando os jobs em execução")
+    if scheduler is not None:
+        await scheduler.stop()
+    await worker.stop(timeout=settings.JOB_TIMEOUT_SECONDS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa os jobs em segundo plano da StudyBuddy")
+    parser.add_argument(
+        "--queue", action="append", default=[],
+        help="Fila e jobs simultâneos, ex: photos=2 (repetível; padrão: JOB_QUEUES)"
+    )
+    args = parser.parse_args()
+    if read_cache.backend.name == "memory":
+        parser.error(
+            "o cache de leitura em memória não recebe as invalidações deste processo: "
+            "use CACHE_BACKEND=redis (ou JOB_WORKER_IN_APP=False com CACHE_BACKEND=auto)"
+        )
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_main(parse_queues(args.queue) or None))
@@ -0,0 +1,99 @@
+"""
+Benchmark de criação de perguntas: uma por requisição x POST /api/questions/bulk.
+
+Cria um resumo temporário, insere N perguntas pelos dois caminhos e apaga o
+resumo no final (as perguntas são removidas em cascata).
+
+Uso (com a API rodando):
+
+    python -m benchmarks.bulk_questions --email ana@example.com --password secret1 \\
+        --sizes 1000 10000
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from benchmarks.common import login
+
+
+def _question(summary_id: int, index: int) -> dict:
+    return {
+        "summary_id": summary_id,
+        "text": f"Pergunta de benchmark {index}",
+        "options": {"a": "Opção A", "b": "Opção B", "c": "Opção C", "d": "Opção D"},
+        "correct_answer": "a",
+    }
+
+
+async def _create_summary(client: httpx.AsyncClient, headers: dict) -> int:
+    # Data aleatória no passado distante para não colidir com resumos reais
+    study_date = date(1900, 1, 1) + timedelta(days=random.randint(0, 36000))
+    response = await client.post("/api/summaries", headers=headers, json={
+        "study_date": study_date.isoformat(),
+        "study_time": 1,
+        "difficulty": "Fácil",
+        "summary_text": "Resumo temporário do benchmark",
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def _one_by_one(client, headers, summary_id, size, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(index):
+        async with semaphore:
+            response = await client.post("/api/questions", headers=headers, json=_question(summary_id, index))
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[create(i) for i in range(size)])
+    return time.perf_counter() - start
+
+
+async def _bulk(client, headers, summary_id, size):
+    payload = {"questions": [_question(summary_id, i) for i in range(size)]}
+    start = time.perf_counter()
+    response = await client.post("/api/questions/bulk", headers=headers, json=payload)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run(url, email, password, sizes, concurrency, skip_single):
+    async with httpx.AsyncClient(base_url=url, timeout=600) as client:
+        headers = await login(client, email, password)
+
+        print(f"{'perguntas':>10} {'caminho':>12} {'tempo (s)':>10} {'perguntas/s':>12}")
+        for size in sizes:
+            paths = [("bulk", None)] if skip_single else [("uma a uma", concurrency), ("bulk", None)]
+            for name, path_concurrency in paths:
+                summary_id = await _create_summary(client, headers)
+                try:
+                    if path_concurrency is None:
+                        elapsed = await _bulk(client, headers, summary_id, size)
+                    else:
+                        elapsed = await _one_by_one(client, headers, summary_id, size, path_concurrency)
+                finally:
+                    await client.delete(f"/api/summaries/{summary_id}", headers=headers)
+                print(f"{size:>10} {name:>12} {elapsed:>10.2f} {size / elapsed:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de criação de perguntas em lote")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--concurrency", type=int, default=10, help="Requisições simultâneas no caminho uma a uma")
+    parser.add_argument("--skip-single", action="store_true", help="Medir apenas o endpoint bulk")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.email, args.password, args.sizes, args.concurrency, args.skip_single))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""Funções compartilhadas pelos benchmarks"""
+import httpx
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    """Faz login e retorna o header de autorização"""
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def percentile(values, pct):
+    """Percentil por ordenação simples (suficiente para relatórios de benchmark)"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
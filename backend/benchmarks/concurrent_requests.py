@@ -0,0 +1,95 @@
+"""
+Benchmark de vazão com requisições concorrentes.
+
+Mede quantas requisições autenticadas por segundo um worker do uvicorn
+consegue atender e, em paralelo, a latência do `/health` (que não acessa
+o banco). Com a camada de banco síncrona, cada consulta bloqueava o event
+loop e a latência do `/health` crescia junto com a carga; com a camada
+assíncrona ela deve permanecer estável.
+
+Uso (com a API rodando em um único worker):
+
+    python -m benchmarks.concurrent_requests --url http://localhost:8000 \\
+        --email ana@example.com --password secret1 --concurrency 50 --requests 2000
+
+Para comparar antes/depois, execute o mesmo comando no commit anterior e
+no atual contra o mesmo banco de dados.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from benchmarks.common import login, percentile
+
+
+async def _worker(client, path, headers, queue, latencies, errors):
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+
+
+async def _probe_health(client, stop, latencies):
+    """Mede a latência do /health enquanto a carga está em andamento"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+
+
+async def run(url, email, password, path, concurrency, total):
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        headers = await login(client, email, password)
+
+        queue = asyncio.Queue()
+        for _ in range(total):
+            queue.put_nowait(None)
+
+        latencies, errors, health = [], [], []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_health(client, stop, health))
+
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            _worker(client, path, headers, queue, latencies, errors)
+            for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+
+    print(f"endpoint:        GET {path}")
+    print(f"concorrência:    {concurrency}")
+    print(f"requisições:     {total} ({len(errors)} erros)")
+    print(f"vazão:           {total / elapsed:.1f} req/s")
+    print(f"latência p50:    {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"latência p99:    {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"/health p99:     {percentile(health, 99) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de requisições concorrentes")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--path", default="/api/summaries")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.email, args.password, args.path, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Gerador de dados sintéticos para testes de escala.
+
+Gera usuários, desafios, resumos (com objetivos), perguntas, resultados de
+teste e respostas com distribuições realistas:
+
+- dias de estudo em sequências (cadeia de Markov: quem estudou ontem tende a
+  estudar hoje);
+- quantidade de perguntas variável por resumo;
+- acerto das respostas conforme a habilidade de cada usuário, melhorando a
+  cada nova tentativa do mesmo teste.
+
+As linhas são geradas em streaming e gravadas em lotes com COPY (asyncpg) no
+PostgreSQL, ou com INSERT em lote em outros bancos (SQLite). Os ids são
+alocados pelo próprio gerador a partir do maior id existente, e as sequences
+são ajustadas no final. O resultado é determinístico para o mesmo --seed,
+--end-date e banco de partida.
+
+Exemplo (~10M respostas):
+
+    python -m benchmarks.dataset --users 20000 --days 365 --seed 42 --end-date 2025-12-31
+
+Depois da carga, StudyRollup, StudyCalendar e SummarySearch são reconstruídas a partir do
+histórico e os lembretes (StudyReminder) são criados (use --skip-rebuild para pular).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Dict, Iterator, List
+
+PASSWORD = "password"
+# Salt fixo: o hash (e portanto o dataset) é determinístico
+PASSWORD_SALT = b"$2b$12$StudyBuddySyntheticDa."
+OPTION_KEYS = ["a", "b", "c", "d"]
+OPTIONS = json.dumps({key: f"Opção {key.upper()}" for key in OPTION_KEYS})
+DIFFICULTIES = ["Fácil", "Médio", "Difícil"]
+DIFFICULTY_WEIGHTS = [0.4, 0.4, 0.2]
+SUBJECTS = ["Biologia", "Química", "Física", "Matemática", "História", "Geografia", "Português", "Inglês"]
+
+# Ordem de gravação (pais antes dos filhos) e colunas geradas de cada tabela
+TABLES: Dict[str, List[str]] = {
+    "User": ["id", "username", "email", "password_hash", "created_at", "updated_at"],
+    "Challenge": ["id", "user_id", "name", "subject", "description", "daily_time", "duration", "photo_url", "created_at", "updated_at"],
+    "Summary": ["id", "user_id", "challenge_id", "study_date", "study_time", "difficulty", "summary_text", "photo_url", "created_at", "updated_at"],
+    "SummaryObjective": ["id", "summary_id", "objective_text", "created_at"],
+    "Question": ["id", "summary_id", "text", "options", "correct_answer", "created_at"],
+    "TestResult": ["id", "user_id", "summary_id", "score", "correct_count", "total_count", "time_spent", "idempotency_key", "created_at"],
+    "Answer": ["id", "test_result_id", "question_id", "user_answer", "is_correct", "created_at"],
+}
+
+
+class IdAllocator:
+    """Próximos ids de cada tabela, a partir do maior id já existente"""
+
+    def __init__(self, start: Dict[str, int]):
+        self._next = {table: value + 1 for table, value in start.items()}
+
+    def __call__(self, table: str) -> int:
+        value = self._next[table]
+        self._next[table] = value + 1
+        return value
+
+
+def _at(day: date, rng: random.Random) -> datetime:
+    """Horário plausível de estudo no dia (UTC)"""
+    return datetime.combine(day, dt_time(rng.randint(7, 22), rng.randint(0, 59), rng.randint(0, 59)), timezone.utc)
+
+
+def _study_days(rng: random.Random, start: date, end: date) -> Iterator[date]:
+    """Dias de estudo com sequências (P(estuda | estudou ontem) alta)"""
+    persistence = rng.uniform(0.7, 0.95)
+    restart = rng.uniform(0.15, 0.5)
+    studied = rng.random() < 0.5
+    day = start
+    while day <= end:
+        studied = rng.random() < (persistence if studied else restart)
+        if studied:
+            yield day
+        day += timedelta(days=1)
+
+
+def generate_user(
+    rows: Dict[str, list],
+    next_id: IdAllocator,
+    index: int,
+    seed: int,
+    start: date,
+    end: date,
+    questions_mean: float,
+    password_hash: str,
+) -> None:
+    """Gera todas as linhas de um usuário em `rows` (RNG próprio por usuário)"""
+    rng = random.Random(f"{seed}:{index}")
+    user_id = next_id("User")
+    joined = _at(start, rng)
+    rows["User"].append((user_id, f"user{user_id}", f"user{user_id}@example.com", password_hash, joined, joined))
+
+    challenges = []
+    for _ in range(rng.randint(1, 3)):
+        challenge_id = next_id("Challenge")
+        challenges.append(challenge_id)
+        subject = rng.choice(SUBJECTS)
+        rows["Challenge"].append((
+            challenge_id, user_id, f"Desafio de {subject}", subject, None,
+            rng.choice([15, 30, 45, 60, 90, 120]), rng.choice([7, 14, 30, 60, 90]), None, joined, joined,
+        ))
+
+    skill = rng.betavariate(4, 2)
+    for day in _study_days(rng, start, end):
+        summary_id = next_id("Summary")
+        created_at = _at(day, rng)
+        study_time = min(600, max(5, int(rng.lognormvariate(3.8, 0.5))))
+        rows["Summary"].append((
+            summary_id, user_id, rng.choice(challenges) if rng.random() < 0.8 else None, day, study_time,
+            rng.choices(DIFFICULTIES, DIFFICULTY_WEIGHTS)[0],
+            f"Resumo de {day.isoformat()}: " + "conceitos revisados e exercícios resolvidos. " * rng.randint(2, 20),
+            None, created_at, created_at,
+        ))
+
+        for n in range(rng.randint(0, 3)):
+            rows["SummaryObjective"].append((next_id("SummaryObjective"), summary_id, f"Objetivo {n + 1}", created_at))
+
+        answer_key = []
+        for n in range(min(30, max(0, round(rng.gauss(questions_mean, questions_mean / 2))))):
+            question_id = next_id("Question")
+            correct = rng.choice(OPTION_KEYS)
+            answer_key.append((question_id, correct))
+            rows["Question"].append((question_id, summary_id, f"Pergunta {n + 1} de {day.isoformat()}", OPTIONS, correct, created_at))
+        if not answer_key:
+            continue
+
+        # Tentativas do teste: muitas vezes nenhuma, às vezes várias
+        attempt = 0
+        while rng.random() < (0.7 if attempt == 0 else 0.35):
+            result_id = next_id("TestResult")
+            taken_at = created_at + timedelta(days=attempt, hours=rng.randint(1, 12))
+            p_correct = min(0.98, skill + 0.08 * attempt)
+            correct_count = 0
+            for question_id, correct in answer_key:
+                is_correct = rng.random() < p_correct
+                if is_correct:
+                    correct_count += 1
+                    user_answer = correct
+                else:
+                    user_answer = rng.choice([key for key in OPTION_KEYS if key != correct])
+                rows["Answer"].append((next_id("Answer"), result_id, question_id, user_answer, is_correct, taken_at))
+            total_count = len(answer_key)
+            rows["TestResult"].append((
+                result_id, user_id, summary_id, int(correct_count / total_count * 100), correct_count, total_count,
+                rng.randint(1, 3 * total_count), None, taken_at,
+            ))
+            attempt += 1
+
+
+class CopyLoader:
+    """Grava lotes com COPY ... FROM STDIN (binário) pelo asyncpg"""
+
+    def __init__(self, driver_connection):
+        self.connection = driver_connection
+
+    async def write(self, table: str, columns: List[str], rows: List[tuple]) -> None:
+        await self.connection.copy_records_to_table(table, records=rows, columns=columns)
+
+
+class InsertLoader:
+    """Grava lotes com INSERT em lote (executemany), para bancos sem COPY"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @staticmethod
+    def _adapt(value):
+        # SQLite: datas como texto no formato que o SQLAlchemy lê
+        if isinstance(value, datetime):
+            return value.astimezone(timezone.utc).replace(tzinfo=None).isoformat(" ")
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
+    async def write(self, table: str, columns: List[str], rows: List[tuple]) -> None:
+        placeholders = ", ".join("?" for _ in columns)
+        statement = f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({placeholders})'
+        await self.connection.exec_driver_sql(statement, [tuple(map(self._adapt, row)) for row in rows])
+        await self.connection.commit()
+
+
+async def _flush(loader, rows: Dict[str, list], totals: Dict[str, int]) -> None:
+    for table, columns in TABLES.items():
+        if rows[table]:
+            await loader.write(table, columns, rows[table])
+            totals[table] += len(rows[table])
+            rows[table] = []
+
+
+async def generate(args) -> Dict[str, int]:
+    import bcrypt
+    from sqlalchemy import text
+    from app.database import Base, SessionLocal, engine
+    from app.utils.reminders import backfill_reminders
+    from app.utils.rollups import rebuild_rollups
+    from app.utils.search import rebuild_search_index
+    from app.utils.streaks import rebuild_calendars
+
+    is_postgres = engine.dialect.name == "postgresql"
+    if args.create_tables:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async with engine.connect() as conn:
+        start_ids = {}
+        for table in TABLES:
+            start_ids[table] = (await conn.execute(text(f'SELECT COALESCE(MAX(id), 0) FROM "{table}"'))).scalar_one()
+    next_id = IdAllocator(start_ids)
+
+    password_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), PASSWORD_SALT).decode("ascii")
+    end = args.end_date
+    start = end - timedelta(days=args.days - 1)
+    rows: Dict[str, list] = {table: [] for table in TABLES}
+    totals: Dict[str, int] = {table: 0 for table in TABLES}
+    started_at = time.perf_counter()
+
+    async with engine.connect() as conn:
+        if is_postgres:
+            raw = await conn.get_raw_connection()
+            loader = CopyLoader(raw.driver_connection)
+        else:
+            loader = InsertLoader(conn)
+
+        for index in range(args.users):
+            generate_user(rows, next_id, index, args.seed, start, end, args.questions_mean, password_hash)
+            if sum(len(batch) for batch in rows.values()) >= args.batch_size:
+                await _flush(loader, rows, totals)
+                elapsed = time.perf_counter() - started_at
+                print(
+                    f"\r{index + 1}/{args.users} usuários, {totals['Answer']} respostas "
+                    f"({sum(totals.values()) / elapsed:,.0f} linhas/s)",
+                    end="", file=sys.stderr, flush=True,
+                )
+        await _flush(loader, rows, totals)
+
+        if is_postgres:
+            # Os ids foram alocados aqui: as sequences precisam continuar do maior id
+            for table in TABLES:
+                await conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM \"{table}\"))"
+                ))
+            await conn.commit()
+
+    elapsed = time.perf_counter() - started_at
+    print(f"\nCarga concluída em {elapsed:.1f}s ({sum(totals.values()) / elapsed:,.0f} linhas/s)", file=sys.stderr)
+
+    if not args.skip_rebuild:
+        print("Reconstruindo StudyRollup, StudyCalendar, SummarySearch e StudyReminder...", file=sys.stderr)
+        async with SessionLocal() as db:
+            await rebuild_rollups(db)
+            await rebuild_calendars(db)
+            await rebuild_search_index(db)
+            await backfill_reminders(db)
+
+    await engine.dispose()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos determinísticos para testes de escala")
+    parser.add_argument("--database-url", default=None, help="Banco de destino (padrão: DATABASE_URL)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365, help="Dias de histórico por usuário")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date.today(), help="Último dia do histórico (YYYY-MM-DD)")
+    parser.add_argument("--questions-mean", type=float, default=8, help="Média de perguntas por resumo")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=100000, help="Linhas por lote de COPY")
+    parser.add_argument("--create-tables", action="store_true", help="Criar as tabelas pelos modelos antes da carga")
+    parser.add_argument("--skip-rebuild", action="store_true", help="Não reconstruir StudyRollup/StudyCalendar/SummarySearch/StudyReminder")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    totals = asyncio.run(generate(args))
+    for table, count in totals.items():
+        print(f"{table:<18} {count:>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Teste de carga reproduzível dos fluxos principais da API.
+
+Sobe `app.main:app` com o uvicorn contra um banco local (por padrão um SQLite
+temporário; use --database-url para um PostgreSQL local), popula usuários,
+desafios, resumos e perguntas, e executa cada fluxo com a concorrência
+escolhida:
+
+- login:      POST /api/auth/login
+- create:     POST /api/summaries
+- list:       GET  /api/summaries
+- overview:   GET  /api/dashboard/overview
+- submit:     POST /api/results/submit
+
+O relatório sai em JSON (vazão e p50/p95/p99 por endpoint), para que execuções
+em commits diferentes possam ser comparadas:
+
+    python -m benchmarks.load_test --concurrency 20 --requests 300 --output antes.json
+    git checkout outro-commit
+    python -m benchmarks.load_test --concurrency 20 --requests 300 --compare antes.json
+
+Com --url o teste usa uma API já em execução (o banco dela precisa ter sido
+populado por uma execução anterior com o mesmo --seed e --users).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import login, percentile
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+FLOWS = ["login", "create", "list", "overview", "submit"]
+PASSWORD = "benchmark-password"
+OPTIONS = {"a": "Opção A", "b": "Opção B", "c": "Opção C", "d": "Opção D"}
+DIFFICULTIES = ["Fácil", "Médio", "Difícil"]
+
+
+def _email(index: int) -> str:
+    return f"bench{index}@example.com"
+
+
+async def seed(database_url: str, users: int, days: int, questions: int, rng: random.Random) -> None:
+    """Cria as tabelas e popula o banco (dados determinísticos pelo seed)"""
+    os.environ["DATABASE_URL"] = database_url
+    from app.database import Base, SessionLocal, engine
+    from app.models import Challenge, Question, Summary, SummaryObjective, User
+    from app.utils.rollups import rebuild_rollups
+    from app.utils.search import rebuild_search_index
+    from app.utils.security import hash_password
+    from app.utils.streaks import rebuild_calendars
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    # Um único hash para todos: o custo do bcrypt fica para o fluxo de login
+    password_hash = hash_password(PASSWORD)
+    today = date.today()
+
+    async with SessionLocal() as db:
+        for index in range(users):
+            user = User(username=f"bench{index}", email=_email(index), password_hash=password_hash)
+            db.add(user)
+            await db.flush()
+
+            challenge = Challenge(
+                user_id=user.id, name="Desafio de benchmark", subject="Biologia",
+                daily_time=60, duration=90
+            )
+            db.add(challenge)
+            await db.flush()
+
+            # Histórico com sequências de estudo e dias sem estudo
+            day = today - timedelta(days=days)
+            while day <= today:
+                if rng.random() < 0.75:
+                    summary = Summary(
+                        user_id=user.id,
+                        challenge_id=challenge.id,
+                        study_date=day,
+                        study_time=rng.randint(15, 180),
+                        difficulty=rng.choice(DIFFICULTIES),
+                        summary_text=f"Resumo de {day.isoformat()} " + "conteúdo estudado " * rng.randint(5, 40),
+                    )
+                    summary.objectives = [
+                        SummaryObjective(objective_text=f"Objetivo {n + 1}") for n in range(rng.randint(1, 3))
+                    ]
+                    db.add(summary)
+                    await db.flush()
+                    db.add_all([
+                        Question(
+                            summary_id=summary.id,
+                            text=f"Pergunta {n + 1} de {day.isoformat()}",
+                            options=OPTIONS,
+                            correct_answer=rng.choice(list(OPTIONS)),
+                        )
+                        for n in range(questions)
+                    ])
+                day += timedelta(days=1)
+            await db.commit()
+
+        await rebuild_rollups(db)
+        await rebuild_calendars(db)
+        await rebuild_search_index(db)
+
+    await engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, workers: int, extra_env: dict):
+    """Sobe o uvicorn em um subprocesso e retorna (processo, url)"""
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, DEBUG="False", API_WORKERS=str(workers), **extra_env)
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_until_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"API não respondeu em {timeout:.0f}s")
+
+
+async def _prepare(client, users: int):
+    """Obtém tokens e os resumos com perguntas de cada usuário"""
+    sessions = []
+    for index in range(users):
+        headers = await login(client, _email(index), PASSWORD)
+        summaries = []
+        # Alguns resumos recentes com perguntas, para o fluxo de submissão
+        response = await client.get("/api/summaries", headers=headers, params={"limit": 20})
+        response.raise_for_status()
+        for summary in response.json()["items"]:
+            questions = await client.get(f"/api/questions/summary/{summary['id']}", headers=headers)
+            if questions.status_code == 200 and questions.json():
+                summaries.append((summary["id"], [q["id"] for q in questions.json()]))
+        sessions.append({"index": index, "headers": headers, "summaries": summaries, "next_day": 0})
+    return sessions
+
+
+def _request_for(flow: str, session: dict, rng: random.Random, earliest: date):
+    """Retorna (método, caminho, kwargs) da próxima requisição do fluxo"""
+    headers = session["headers"]
+    if flow == "login":
+        return "POST", "/api/auth/login", {"json": {"email": _email(session["index"]), "password": PASSWORD}}
+    if flow == "create":
+        # Datas anteriores ao histórico populado: nunca colidem com uq_user_study_date
+        session["next_day"] += 1
+        study_date = earliest - timedelta(days=session["next_day"])
+        return "POST", "/api/summaries", {"headers": headers, "json": {
+            "study_date": study_date.isoformat(),
+            "study_time": rng.randint(15, 180),
+            "difficulty": rng.choice(DIFFICULTIES),
+            "summary_text": "Resumo criado pelo teste de carga " + "texto " * rng.randint(5, 40),
+            "objectives": ["Objetivo 1", "Objetivo 2"],
+        }}
+    if flow == "list":
+        return "GET", "/api/summaries", {"headers": headers}
+    if flow == "overview":
+        return "GET", "/api/dashboard/overview", {"headers": headers}
+    summary_id, question_ids = rng.choice(session["summaries"])
+    return "POST", "/api/results/submit", {"headers": headers, "json": {
+        "summary_id": summary_id,
+        "answers": {f"q{question_id}": rng.choice(list(OPTIONS)) for question_id in question_ids},
+        "time_spent": rng.randint(1, 30),
+    }}
+
+
+async def run_flow(client, flow, sessions, concurrency, total, rng, earliest):
+    """Executa `total` requisições do fluxo com `concurrency` clientes simultâneos"""
+    latencies, errors = [], 0
+    remaining = total
+    endpoint = None
+
+    async def worker(worker_index):
+        nonlocal remaining, errors, endpoint
+        session_index = worker_index
+        while remaining > 0:
+            remaining -= 1
+            session = sessions[session_index % len(sessions)]
+            session_index += concurrency
+            method, path, kwargs = _request_for(flow, session, rng, earliest)
+            endpoint = f"{method} {path}"
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    return endpoint, {
+        "flow": flow,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    """Tabela legível (stderr); com baseline, mostra a variação de vazão e p95"""
+    print(f"\n{'endpoint':<32} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6}", file=sys.stderr)
+    for endpoint, stats in report["results"].items():
+        line = (
+            f"{endpoint:<32} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+            f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['errors']:>6}"
+        )
+        old = (baseline or {}).get("results", {}).get(endpoint)
+        if old:
+            rps_delta = (stats["throughput_rps"] / old["throughput_rps"] - 1) * 100
+            p95_delta = (stats["p95_ms"] / old["p95_ms"] - 1) * 100 if old["p95_ms"] else 0.0
+            line += f"   vazão {rps_delta:+.1f}%  p95 {p95_delta:+.1f}%"
+        print(line, file=sys.stderr)
+
+
+async def main_async(args) -> dict:
+    rng = random.Random(args.seed)
+    process = None
+    tmpdir = None
+
+    if args.url:
+        url = args.url
+    else:
+        database_url = args.database_url
+        if database_url is None:
+            tmpdir = tempfile.mkdtemp(prefix="studybuddy-bench-")
+            database_url = f"sqlite:///{tmpdir}/bench.db"
+        print(f"Populando {database_url} ...", file=sys.stderr)
+        await seed(database_url, args.users, args.days, args.questions, rng)
+        process, url = start_server(database_url, args.workers, {"CACHE_BACKEND": args.cache})
+
+    try:
+        await wait_until_ready(url)
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+            sessions = await _prepare(client, args.users)
+            earliest = date.today() - timedelta(days=args.days)
+            results = {}
+            for flow in args.flows:
+                print(f"Fluxo {flow} ...", file=sys.stderr)
+                endpoint, stats = await run_flow(client, flow, sessions, args.concurrency, args.requests, rng, earliest)
+                results[endpoint] = stats
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "database": "externo" if args.url else (args.database_url or "sqlite temporário").split("@")[-1],
+            "workers": args.workers,
+            "cache": args.cache,
+            "concurrency": args.concurrency,
+            "requests_per_flow": args.requests,
+            "users": args.users,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga dos fluxos principais da API")
+    parser.add_argument("--url", default=None, help="Usar uma API já em execução (não sobe servidor nem popula)")
+    parser.add_argument("--database-url", default=None, help="Banco local (padrão: SQLite temporário)")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn")
+    parser.add_argument(
+        "--cache", default="auto", choices=["auto", "memory", "redis", "none"],
+        help="CACHE_BACKEND do servidor (memory só com --workers 1)"
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--days", type=int, default=90, help="Dias de histórico por usuário")
+    parser.add_argument("--questions", type=int, default=5, help="Perguntas por resumo")
+    parser.add_argument("--flows", nargs="+", default=FLOWS, choices=FLOWS)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=300, help="Requisições por fluxo")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Arquivo JSON do relatório (padrão: stdout)")
+    parser.add_argument("--compare", default=None, help="Relatório JSON anterior para comparação")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(report, baseline)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark do agendador de lembretes de estudo no pior caso: todos os
+lembretes vencendo no mesmo minuto.
+
+Cria os lembretes que faltam (backfill), marca todos como vencidos agora e
+mede `run_reminders` (leitura dos vencidos, verificação do resumo do dia,
+reagendamento e enfileiramento dos lotes de entrega). Os jobs de entrega
+criados são apagados no final (use --keep-jobs para mantê-los).
+
+Altera StudyReminder: use em um banco de testes, por exemplo depois de
+
+    python -m benchmarks.dataset --users 1000000 --days 30
+
+    python -m benchmarks.reminders --database-url postgresql://... --batch-size 5000
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+
+async def run(args) -> None:
+    from sqlalchemy import delete, func, select, update
+    from app.database import SessionLocal, engine
+    from app.models import Job, StudyReminder
+    from app.utils.reminders import backfill_reminders, run_reminders
+
+    started_at = datetime.now().astimezone()
+    async with SessionLocal() as db:
+        created = await backfill_reminders(db)
+        await db.execute(
+            update(StudyReminder)
+            .where(StudyReminder.enabled.is_(True))
+            .values(next_at=started_at - timedelta(minutes=1))
+        )
+        await db.commit()
+        total = (await db.execute(select(func.count()).select_from(StudyReminder))).scalar_one()
+    print(f"{total:,} lembretes ({created:,} criados agora), todos vencidos")
+
+    start = time.perf_counter()
+    totals = await run_reminders(now=started_at, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+    rate = totals["due"] / elapsed if elapsed else 0
+    print(f"{totals['due']:,} processados, {totals['sent']:,} a enviar em {elapsed:.1f}s ({rate:,.0f} lembretes/s)")
+    if rate:
+        print(f"1M lembretes no mesmo minuto: ~{1_000_000 / rate:.0f}s")
+
+    if not args.keep_jobs:
+        async with SessionLocal() as db:
+            await db.execute(delete(Job).where(Job.task == "deliver_reminders", Job.status == "queued"))
+            await db.commit()
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o agendador de lembretes com todos vencendo juntos")
+    parser.add_argument("--database-url", default=None, help="Banco de testes (padrão: DATABASE_URL)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Lembretes por lote (padrão: REMINDER_BATCH_SIZE)")
+    parser.add_argument("--keep-jobs", action="store_true", help="Manter os jobs de entrega enfileirados")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Microbenchmark de serialização de listagens (sem banco e sem servidor).
+
+Compara, para N linhas:
+
+- orm+pydantic+json: objetos ORM validados pelo response_model e
+  serializados com JSONResponse (caminho padrão do FastAPI);
+- orm+pydantic+orjson: o mesmo, mas com FastJSONResponse;
+- tuplas+orjson: dicts montados das tuplas da consulta e FastJSONResponse
+  (caminho usado nas listagens).
+
+Uso:
+
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.models import Answer, Challenge, TestResult
+from app.schemas.challenge import ChallengeResponse
+from app.schemas.test_result import AnswerResponse, TestResultResponse
+from app.utils.responses import FastJSONResponse, schema_columns
+
+ANSWERS_PER_RESULT = 5
+
+
+def _columns(schema, model, exclude=()) -> List[str]:
+    return [column.key for column in schema_columns(schema, model, exclude)]
+
+
+def _challenge_rows(rows: int) -> List[tuple]:
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        (i, 1, f"Desafio {i}", "Biologia", "Descrição do desafio", 60, 30, None, now, now + timedelta(seconds=i))
+        for i in range(rows)
+    ]
+
+
+def _result_rows(rows: int):
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    results = [(i, 1, i % 100, 80, 4, 5, 120, now) for i in range(rows)]
+    answers = [
+        (i * ANSWERS_PER_RESULT + j, i, j, "a", j % 2 == 0, now)
+        for i in range(rows)
+        for j in range(ANSWERS_PER_RESULT)
+    ]
+    return results, answers
+
+
+def _orm_path(schema, objects, response_class) -> bytes:
+    # Equivalente ao que o FastAPI faz com response_model + objetos ORM
+    adapter = TypeAdapter(List[schema])
+    content = adapter.dump_python(adapter.validate_python(objects), mode="json")
+    return response_class(content).body
+
+
+def _tuple_path(dicts) -> bytes:
+    return FastJSONResponse(dicts).body
+
+
+def _time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_challenges(rows: int, repeat: int):
+    keys = _columns(ChallengeResponse, Challenge)
+    tuples = _challenge_rows(rows)
+
+    def orm_objects():
+        return [Challenge(**dict(zip(keys, row))) for row in tuples]
+
+    def tuple_dicts():
+        return [dict(zip(keys, row)) for row in tuples]
+
+    return {
+        "orm+pydantic+json": _time(lambda: _orm_path(ChallengeResponse, orm_objects(), JSONResponse), repeat),
+        "orm+pydantic+orjson": _time(lambda: _orm_path(ChallengeResponse, orm_objects(), FastJSONResponse), repeat),
+        "tuplas+orjson": _time(lambda: _tuple_path(tuple_dicts()), repeat),
+    }
+
+
+def bench_results(rows: int, repeat: int):
+    result_keys = _columns(TestResultResponse, TestResult, exclude=["answers"])
+    answer_keys = _columns(AnswerResponse, Answer)
+    results, answers = _result_rows(rows)
+
+    def orm_objects():
+        objects = [TestResult(**dict(zip(result_keys, row))) for row in results]
+        for answer in answers:
+            objects[answer[1]].answers.append(Answer(**dict(zip(answer_keys, answer))))
+        return objects
+
+    def tuple_dicts():
+        dicts = [dict(zip(result_keys, row)) for row in results]
+        for item in dicts:
+            item["answers"] = []
+        for answer in answers:
+            dicts[answer[1]]["answers"].append(dict(zip(answer_keys, answer)))
+        return dicts
+
+    return {
+        "orm+pydantic+json": _time(lambda: _orm_path(TestResultResponse, orm_objects(), JSONResponse), repeat),
+        "orm+pydantic+orjson": _time(lambda: _orm_path(TestResultResponse, orm_objects(), FastJSONResponse), repeat),
+        "tuplas+orjson": _time(lambda: _tuple_path(tuple_dicts()), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark de serialização de listagens")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições (vale o melhor tempo)")
+    args = parser.parse_args()
+
+    print(f"{'payload':>28} {'caminho':>20} {'tempo (ms)':>11} {'linhas/s':>11} {'ganho':>7}")
+    payloads = [
+        ("desafios", bench_challenges),
+        (f"resultados+{ANSWERS_PER_RESULT} respostas", bench_results),
+    ]
+    for name, bench in payloads:
+        timings = bench(args.rows, args.repeat)
+        baseline = timings["orm+pydantic+json"]
+        for path, elapsed in timings.items():
+            print(f"{name:>28} {path:>20} {elapsed * 1000:>11.1f} {args.rows / elapsed:>11.0f} {baseline / elapsed:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Fixtures dos testes: API em um SQLite temporário, com as tabelas recriadas e os
+caches em memória zerados a cada teste.
+
+Os testes são assíncronos (plugin do anyio) e chamam a aplicação pelo
+transporte ASGI do httpx, sem servidor (o lifespan não roda: o worker de jobs
+e os agendadores não sobem). As configurações abaixo precisam ser
+definidas antes de importar `app`, pois `settings` é lido na importação.
+"""
+import os
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="studybuddy-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TMP_DIR}/studybuddy.db",
+    "SECRET_KEY": "test-secret-key",
+    "BCRYPT_ROUNDS": "4",
+    "DEBUG": "True",
+    "CACHE_BACKEND": "memory",
+    "REMINDERS_ENABLED": "False",
+    "PHOTO_STORAGE_DIR": f"{_TMP_DIR}/photos",
+    "REMINDER_SINK_PATH": f"{_TMP_DIR}/reminders.ndjson",
+})
+
+import httpx
+import pytest
+from app.config import settings
+from app.database import Base, engine
+from app.main import app
+from app.utils.auth import token_cache, user_cache
+from app.utils.read_cache import MemoryCache, NullCache, read_cache
+from app.utils.sessions import revoked_sessions
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def database():
+    """Tabelas vazias e caches em processo zerados"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    token_cache.clear()
+    user_cache.clear()
+    revoked_sessions._revoked.clear()
+    read_cache.backend = MemoryCache(max_items=settings.CACHE_MAX_ITEMS, max_bytes=settings.CACHE_MAX_BYTES)
+    yield
+    # As conexões do pool pertencem ao event loop deste teste
+    await engine.dispose()
+
+
+@pytest.fixture
+def no_read_cache(database):
+    """Desativa o cache de leitura (cada GET vai ao banco)"""
+    read_cache.backend = NullCache()
+
+
+@pytest.fixture
+async def client(database):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(client):
+    """Registra um usuário e retorna os headers de autenticação"""
+    async def make(username: str = "ana", password: str = "secret1") -> dict:
+        response = await client.post("/api/auth/register", json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": password,
+        })
+        assert response.status_code == 201, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return make
+
+
+@pytest.fixture
+async def auth(make_user) -> dict:
+    """Headers de um usuário já registrado"""
+    return await make_user()
@@ -0,0 +1,49 @@
+"""Funções para montar dados de teste pela própria API"""
+
+
+async def create_challenge(client, headers, name: str = "Cálculo", daily_time: int = 30) -> int:
+    response = await client.post("/api/challenges", headers=headers, json={
+        "name": name, "subject": "Matemática", "daily_time": daily_time, "duration": 10
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def create_summary(client, headers, study_date: str, text: str = "Resumo", objectives=None, **fields) -> dict:
+    payload = {
+        "study_date": study_date,
+        "study_time": 30,
+        "difficulty": "Médio",
+        "summary_text": text,
+        "objectives": objectives or [],
+        **fields,
+    }
+    response = await client.post("/api/summaries", headers=headers, json=payload)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def create_question(client, headers, summary_id: int, text: str = "Pergunta", correct: str = "a") -> int:
+    response = await client.post("/api/questions", headers=headers, json={
+        "summary_id": summary_id,
+        "text": text,
+        "options": {"a": "A", "b": "B"},
+        "correct_answer": correct,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def submit_answers(client, headers, summary_id: int, answers: dict) -> dict:
+    response = await client.post("/api/results/submit", headers=headers, json={
+        "summary_id": summary_id,
+        "answers": {f"q{question_id}": answer for question_id, answer in answers.items()},
+        "time_spent": 5,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def user_id(client, headers) -> int:
+    response = await client.get("/api/auth/me", headers=headers)
+    return response.json()["id"]
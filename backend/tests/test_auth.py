@@ -0,0 +1,129 @@
+"""Registro e login (bcrypt no pool de threads limitado) e cache do usuário autenticado"""
+import asyncio
+import threading
+import time
+from datetime import timedelta
+import pytest
+from app.utils import security
+from app.utils.auth import token_cache, user_cache
+from app.utils.lru_cache import LRUCache
+from app.utils.security import (
+    PasswordHashPool, PasswordHashPoolFull, create_access_token, hash_password, verify_password
+)
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_pool_rejects_immediately_when_the_queue_is_full():
+    pool = PasswordHashPool(workers=1, max_queue=1)
+    release = threading.Event()
+    running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(PasswordHashPoolFull):
+        await pool.run(lambda: None)
+    assert pool.stats()["queued"] == 1
+
+    release.set()
+    assert await asyncio.gather(*running) == [True, True]
+    stats = pool.stats()
+    assert (stats["pending"], stats["completed"], stats["rejected"]) == (0, 2, 1)
+    assert await pool.run(lambda: "livre") == "livre"
+
+
+async def test_cancelled_caller_keeps_its_slot_until_the_thread_finishes():
+    pool = PasswordHashPool(workers=1, max_queue=0)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        return release.wait()
+
+    running = asyncio.ensure_future(pool.run(slow))
+    await asyncio.to_thread(started.wait)
+    running.cancel()
+    try:
+        with pytest.raises(asyncio.CancelledError):
+            await running
+
+        # O bcrypt ainda ocupa a única thread: o limite continua valendo
+        assert pool.stats()["pending"] == 1
+        with pytest.raises(PasswordHashPoolFull):
+            await pool.run(lambda: None)
+    finally:
+        release.set()
+    while pool.stats()["pending"]:
+        await asyncio.sleep(0.01)
+    assert await pool.run(lambda: "livre") == "livre"
+
+
+def test_long_passwords_are_truncated_on_a_character_boundary():
+    password = "senha-" + "é" * 40
+    hashed = hash_password(password)
+
+    assert verify_password(password, hashed)
+    # Só os primeiros 72 bytes contam, como no bcrypt
+    assert verify_password(password + "extra", hashed)
+    assert not verify_password("senha-", hashed)
+    with pytest.raises(ValueError):
+        hash_password("curta")
+
+
+async def test_login(client, auth):
+    wrong = await client.post("/api/auth/login", json={"email": "ana@example.com", "password": "errada"})
+    unknown = await client.post("/api/auth/login", json={"email": "ze@example.com", "password": "secret1"})
+    assert wrong.status_code == unknown.status_code == 401
+
+    response = await client.post("/api/auth/login", json={"email": "ana@example.com", "password": "secret1"})
+    assert response.status_code == 200
+    assert response.json()["user"]["username"] == "ana"
+
+
+async def test_register_validates_duplicates_and_password(client, auth):
+    duplicate = await client.post("/api/auth/register", json={
+        "username": "ana", "email": "outra@example.com", "password": "secret1"
+    })
+    short = await client.post("/api/auth/register", json={
+        "username": "bia", "email": "bia@example.com", "password": "123"
+    })
+    assert duplicate.status_code == 400
+    assert short.status_code == 422
+
+
+async def test_saturated_pool_answers_503_without_waiting(client, auth, monkeypatch):
+    async def full(*args):
+        raise PasswordHashPoolFull()
+
+    monkeypatch.setattr(security.password_hash_pool, "run", full)
+    response = await client.post("/api/auth/login", json={"email": "ana@example.com", "password": "secret1"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_lru_cache_bounds_items_and_caps_the_ttl(monkeypatch):
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+    # O TTL do item nunca passa do TTL do cache; expirado ou negativo não é guardado
+    cache.set("d", 4, ttl=3600)
+    cache.set("e", 5, ttl=-1)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert (cache.get("d"), cache.get("e")) == (None, None)
+
+
+async def test_tokens_are_verified_once_and_never_cached_when_invalid(client, auth):
+    assert (await client.get("/api/auth/me", headers=auth)).status_code == 200
+    assert len(token_cache) == 1 and len(user_cache) == 1
+
+    tampered = {"Authorization": auth["Authorization"][:-2] + "xx"}
+    expired = {"Authorization": "Bearer " + create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-1))}
+    for headers in (tampered, expired):
+        response = await client.get("/api/auth/me", headers=headers)
+        assert response.status_code == 401
+    assert len(token_cache) == 1
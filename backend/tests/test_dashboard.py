@@ -0,0 +1,47 @@
+"""Visão geral do dashboard montada em uma consulta"""
+from datetime import date, timedelta
+import pytest
+from tests.helpers import create_challenge, create_question, create_summary, submit_answers
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_empty_overview(client, auth):
+    overview = (await client.get("/api/dashboard/overview", headers=auth)).json()
+
+    assert overview == {
+        "activeChallenges": 0, "weeklyStudyTime": "0h 0m", "totalStudyDays": 0,
+        "challenges": [], "recentSummaries": [], "recentResults": [],
+    }
+
+
+async def test_overview_sections_of_the_user_only(client, auth, make_user, no_read_cache):
+    other = await make_user("bia")
+    await create_challenge(client, other, name="Alheio")
+    await create_summary(client, other, date.today().isoformat())
+    first = await create_challenge(client, auth, name="Cálculo")
+    second = await create_challenge(client, auth, name="Física")
+
+    today = date.today()
+    summaries = []
+    for offset in (0, 1, 3, 10, 20, 30):
+        summaries.append(await create_summary(
+            client, auth, (today - timedelta(days=offset)).isoformat(), text="x" * 150, study_time=50
+        ))
+    question_id = await create_question(client, auth, summaries[0]["id"])
+    for answer in "abababa":
+        await submit_answers(client, auth, summaries[0]["id"], {question_id: answer})
+
+    response = await client.get("/api/dashboard/overview", headers=auth)
+    overview = response.json()
+
+    # O usuário já está no cache de autenticação: só a consulta do dashboard
+    assert int(response.headers["X-Query-Count"]) == 1
+    assert overview["activeChallenges"] == 2
+    assert [challenge["id"] for challenge in overview["challenges"]] == [first, second]
+    # Três dias com estudo na última semana, 50 minutos cada
+    assert (overview["weeklyStudyTime"], overview["totalStudyDays"]) == ("2h 30m", 3)
+    assert [item["id"] for item in overview["recentSummaries"]] == [summary["id"] for summary in summaries[:5]]
+    assert overview["recentSummaries"][0]["summary"] == "x" * 100 + "..."
+    assert len(overview["recentResults"]) == 5
+    assert {result["score"] for result in overview["recentResults"]} == {0, 100}
@@ -0,0 +1,58 @@
+"""Gerador de dados sintéticos (benchmarks/dataset.py)"""
+from argparse import Namespace
+from collections import Counter
+from datetime import date
+import pytest
+from sqlalchemy import func, select
+from app.database import SessionLocal
+from app.models import StudyRollup, Summary
+from app.utils.streaks import load_study_days, longest_streak
+from benchmarks.dataset import TABLES, IdAllocator, generate, generate_user
+
+pytestmark = pytest.mark.anyio
+
+END = date(2026, 3, 31)
+
+
+def user_rows(seed: int, index: int) -> dict:
+    rows = {table: [] for table in TABLES}
+    generate_user(rows, IdAllocator({table: 0 for table in TABLES}), index, seed, date(2026, 1, 1), END, 6, "hash")
+    return rows
+
+
+def test_users_are_deterministic_and_consistent():
+    assert user_rows(42, 3) == user_rows(42, 3)
+    assert user_rows(42, 3) != user_rows(43, 3)
+
+    rows = user_rows(7, 0)
+    answers = Counter(row[1] for row in rows["Answer"])
+    for result_id, _, _, score, correct_count, total_count, *_ in rows["TestResult"]:
+        assert answers[result_id] == total_count
+        assert score == int(correct_count / total_count * 100)
+    assert len({row[3] for row in rows["Summary"]}) == len(rows["Summary"])
+
+
+async def test_generated_data_loads_and_is_served_by_the_api(client, database):
+    args = Namespace(
+        users=3, days=60, end_date=END, questions_mean=4, seed=1, batch_size=200,
+        create_tables=False, skip_rebuild=False,
+    )
+    totals = await generate(args)
+
+    async with SessionLocal() as db:
+        assert await db.scalar(select(func.count()).select_from(Summary)) == totals["Summary"] > 0
+        user_id, study_time = (await db.execute(
+            select(Summary.user_id, func.sum(Summary.study_time)).group_by(Summary.user_id).limit(1)
+        )).one()
+        rollup = await db.scalar(select(func.sum(StudyRollup.study_time)).where(
+            StudyRollup.user_id == user_id, StudyRollup.period == "month"
+        ))
+        _, bits = await load_study_days(db, user_id)
+    assert rollup == study_time
+    assert longest_streak(bits) > 0
+
+    login = await client.post("/api/auth/login", json={"email": f"user{user_id}@example.com", "password": "password"})
+    assert login.status_code == 200
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert (await client.get("/api/summaries", headers=headers)).json()["items"]
+    assert (await client.get("/api/reminders", headers=headers)).status_code == 200
@@ -0,0 +1,52 @@
+"""Exportação da conta em streaming"""
+import csv
+import io
+import json
+import pytest
+from app.config import settings
+from app.utils import export
+from tests.helpers import create_question, create_summary, submit_answers, user_id
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed(client, headers) -> None:
+    summary = await create_summary(client, headers, "2026-05-01", objectives=["ler", "resumir"])
+    question_id = await create_question(client, headers, summary["id"])
+    await submit_answers(client, headers, summary["id"], {question_id: "a"})
+
+
+async def test_ndjson_export_has_every_record_of_the_user_only(client, auth, make_user):
+    await seed(client, auth)
+    await seed(client, await make_user("bia"))
+
+    response = await client.get("/api/export", headers=auth)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    types = [record["type"] for record in records]
+    assert types == ["user", "summary", "summary_objective", "summary_objective", "question", "test_result", "answer"]
+    assert "password_hash" not in records[0]
+    owner_id = await user_id(client, auth)
+    assert {record["user_id"] for record in records if "user_id" in record} == {owner_id}
+
+
+async def test_csv_export_starts_each_table_with_its_header(client, auth):
+    await seed(client, auth)
+
+    response = await client.get("/api/export", params={"format": "csv"}, headers=auth)
+
+    rows = list(csv.reader(io.StringIO(response.text)))
+    headers = [row for row in rows if row[0] == "type"]
+    assert [row[1] for row in headers] == ["id"] * 7
+    assert sum(1 for row in rows if row[0] == "answer") == 1
+
+
+async def test_export_stops_after_the_time_limit(client, auth, monkeypatch):
+    await seed(client, auth)
+    monkeypatch.setattr(settings, "EXPORT_MAX_SECONDS", -1)
+
+    with pytest.raises(TimeoutError):
+        async for _ in export.export_user(await user_id(client, auth), "ndjson"):
+            pass
@@ -0,0 +1,122 @@
+"""Importação em lote de resumos (CSV e NDJSON)"""
+import json
+from datetime import date
+import pytest
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models import StudyRollup
+from app.utils import summary_import
+from tests.helpers import create_challenge, create_summary, user_id
+
+pytestmark = pytest.mark.anyio
+
+CSV = (
+    "study_date,study_time,difficulty,summary_text,objectives\r\n"
+    "2026-03-01,30,Fácil,Derivadas,limites|regra da cadeia\r\n"
+    '2026-03-02,45,Médio,"Integrais\npor partes",\r\n'
+    "2026-03-03,20,Impossível,Séries,\r\n"
+    "2026-03-01,10,Fácil,Repetida,\r\n"
+    "2026-03-04,15,Difícil\r\n"
+)
+
+
+async def run_import(client, headers, body: str, content_type: str, **params) -> dict:
+    response = await client.post(
+        "/api/summaries/import", headers={**headers, "Content-Type": content_type},
+        params=params, content=body.encode("utf-8")
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def ndjson(*records) -> str:
+    return "\n".join(record if isinstance(record, str) else json.dumps(record) for record in records)
+
+
+def summary(study_date: str, text: str = "Resumo", **fields) -> dict:
+    return {"study_date": study_date, "study_time": 30, "difficulty": "Médio", "summary_text": text, **fields}
+
+
+async def list_summaries(client, headers) -> dict:
+    page = (await client.get("/api/summaries", headers=headers)).json()
+    return {item["study_date"]: item for item in page["items"]}
+
+
+async def test_csv_import_reports_bad_rows_and_keeps_the_rest(client, auth):
+    report = await run_import(client, auth, "﻿" + CSV, "text/csv")
+
+    assert (report["inserted"], report["failed"]) == (2, 3)
+    assert [error["line"] for error in report["errors"]] == [5, 6, 7]
+    assert "linha 2" in report["errors"][1]["errors"][0]
+
+    stored = await list_summaries(client, auth)
+    assert stored["2026-03-02"]["summary_text"] == "Integrais\npor partes"
+    first = (await client.get(f"/api/summaries/{stored['2026-03-01']['id']}", headers=auth)).json()
+    assert [objective["objective_text"] for objective in first["objectives"]] == ["limites", "regra da cadeia"]
+
+
+async def test_import_rebuilds_streaks_and_totals(client, auth, monkeypatch):
+    monkeypatch.setattr(summary_import, "IMPORT_BATCH_SIZE", 2)
+    # Lido antes da importação: o cache precisa ser invalidado por ela
+    await client.get("/api/streak-days", headers=auth, params={"start": "2026-03-01", "end": "2026-03-31"})
+
+    body = ndjson(*(summary(f"2026-03-0{day}") for day in range(1, 6)))
+    report = await run_import(client, auth, body, "application/x-ndjson")
+
+    assert report["inserted"] == 5
+    days = (await client.get("/api/streak-days", headers=auth, params={"start": "2026-03-01", "end": "2026-03-31"})).json()
+    assert days["dates"] == [f"2026-03-0{day}" for day in range(1, 6)]
+    owner_id = await user_id(client, auth)
+    async with SessionLocal() as db:
+        month = await db.scalar(select(StudyRollup.study_time).where(
+            StudyRollup.user_id == owner_id, StudyRollup.period == "month", StudyRollup.period_start == date(2026, 3, 1)
+        ))
+    assert month == 150
+
+
+async def test_existing_dates_are_skipped_or_replaced(client, auth):
+    existing = await create_summary(client, auth, "2026-03-01", text="Original", objectives=["antigo"])
+    body = ndjson(summary("2026-03-01", "Importado", objectives=["novo"]), summary("2026-03-02"))
+
+    skipped = await run_import(client, auth, body, "application/x-ndjson")
+    assert (skipped["inserted"], skipped["skipped"]) == (1, 1)
+    assert (await list_summaries(client, auth))["2026-03-01"]["summary_text"] == "Original"
+
+    updated = await run_import(client, auth, body, "application/x-ndjson", on_conflict="update")
+    assert (updated["updated"], updated["inserted"]) == (2, 0)
+    replaced = (await client.get(f"/api/summaries/{existing['id']}", headers=auth)).json()
+    assert replaced["summary_text"] == "Importado"
+    assert [objective["objective_text"] for objective in replaced["objectives"]] == ["novo"]
+
+
+async def test_ndjson_lines_are_validated_one_by_one(client, auth, make_user):
+    own_challenge = await create_challenge(client, auth)
+    other_challenge = await create_challenge(client, await make_user("bia"))
+    body = ndjson(
+        summary("2026-03-01", challenge_id=own_challenge),
+        "{não é json",
+        "[1, 2]",
+        summary("2026-03-02", challenge_id=other_challenge),
+        summary("2026-03-03", objectives=["x" * 300]),
+        "",
+        summary("2026-03-04"),
+    )
+
+    report = await run_import(client, auth, body, "application/json")
+
+    assert (report["inserted"], report["failed"]) == (2, 4)
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4, 5]
+    assert sorted(await list_summaries(client, auth)) == ["2026-03-01", "2026-03-04"]
+
+
+async def test_unknown_content_type_is_rejected(client, auth):
+    response = await client.post(
+        "/api/summaries/import", headers={**auth, "Content-Type": "text/plain"}, content=b"2026-03-01"
+    )
+    assert response.status_code == 415
+
+
+async def test_csv_without_study_date_column_aborts(client, auth):
+    report = await run_import(client, auth, "data,texto\n2026-03-01,x\n", "text/plain", format="csv")
+    assert report["inserted"] == 0
+    assert report["errors"][0]["line"] == 0
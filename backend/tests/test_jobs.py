@@ -0,0 +1,137 @@
+"""Fila de tarefas em segundo plano (tabela Job)"""
+import asyncio
+from datetime import timedelta
+import pytest
+from sqlalchemy import select
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Job
+from app.utils import jobs
+from app.utils.jobs import Worker, claim_jobs, enqueue, recover_stale_jobs
+
+pytestmark = pytest.mark.anyio
+
+
+async def all_jobs() -> list:
+    async with SessionLocal() as db:
+        result = await db.execute(select(Job).order_by(Job.id))
+        return result.scalars().all()
+
+
+async def add_stale(key, attempts: int = 1) -> None:
+    locked_at = jobs._utcnow() - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS * 3)
+    async with SessionLocal() as db:
+        db.add(Job(queue="default", task="noop", payload={}, key=key, status="running",
+                   attempts=attempts, max_attempts=3, locked_at=locked_at, locked_by="morto"))
+        await db.commit()
+
+
+async def test_enqueue_with_the_same_key_keeps_one_queued_job(database):
+    async with SessionLocal() as db:
+        await enqueue(db, "noop", {"n": 1}, key="resumo:1")
+        await enqueue(db, "noop", {"n": 2}, key="resumo:1")
+        await enqueue(db, "noop", {"n": 3})
+        await db.commit()
+
+    assert [job.payload["n"] for job in await all_jobs()] == [1, 3]
+
+
+async def test_claim_takes_the_highest_priority_first_and_marks_it_running(database):
+    async with SessionLocal() as db:
+        await enqueue(db, "noop", {"n": 1})
+        await enqueue(db, "noop", {"n": 2}, priority=5)
+        await enqueue(db, "noop", {"n": 3}, queue="photos")
+        await db.commit()
+        claimed = await claim_jobs(db, "default", 1, "teste")
+
+    assert [job.payload["n"] for job in claimed] == [2]
+    statuses = {job.payload["n"]: (job.status, job.attempts) for job in await all_jobs()}
+    assert statuses == {1: ("queued", 0), 2: ("running", 1), 3: ("queued", 0)}
+
+
+async def test_stale_jobs_sharing_a_key_are_requeued_once(database):
+    await add_stale("resumo:1")
+    await add_stale("resumo:1")
+    await add_stale(None)
+    await add_stale(None)
+
+    async with SessionLocal() as db:
+        assert await recover_stale_jobs(db) == 3
+
+    remaining = await all_jobs()
+    assert [(job.key, job.status) for job in remaining] == [
+        ("resumo:1", "queued"), (None, "queued"), (None, "queued")
+    ]
+
+
+async def test_stale_job_is_dropped_when_its_key_is_already_queued(database):
+    await add_stale("resumo:1")
+    await add_stale("resumo:2", attempts=3)
+    async with SessionLocal() as db:
+        await enqueue(db, "noop", {"novo": True}, key="resumo:1")
+        await db.commit()
+        await recover_stale_jobs(db)
+
+    remaining = await all_jobs()
+    assert [(job.key, job.status, job.payload) for job in remaining] == [
+        ("resumo:2", "failed", {}), ("resumo:1", "queued", {"novo": True})
+    ]
+
+
+async def test_worker_runs_retries_and_gives_up(database, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 0)
+    calls = []
+
+    async def fail(payload: dict) -> None:
+        calls.append(payload)
+        raise ValueError("falhou")
+
+    async def succeed(payload: dict) -> None:
+        calls.append(payload)
+
+    monkeypatch.setitem(jobs.TASKS, "teste_falha", fail)
+    monkeypatch.setitem(jobs.TASKS, "teste_ok", succeed)
+
+    async with SessionLocal() as db:
+        await enqueue(db, "teste_falha", {"n": 1}, max_attempts=2)
+        await enqueue(db, "teste_ok", {"n": 2})
+        await db.commit()
+
+    worker = Worker({"default": 2}, poll_interval=0.05)
+    worker.start()
+    try:
+        for _ in range(200):
+            remaining = await all_jobs()
+            if [job.status for job in remaining] == ["failed"] and len(calls) == 3:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await worker.stop(timeout=5)
+
+    assert sorted(call["n"] for call in calls) == [1, 1, 2]
+    [failed] = await all_jobs()
+    assert failed.task == "teste_falha" and failed.attempts == 2
+    assert "ValueError: falhou" in failed.last_error
+
+
+async def test_a_failing_recovery_does_not_stop_the_worker(database, monkeypatch):
+    done = asyncio.Event()
+
+    async def broken_recovery(db):
+        raise RuntimeError("índice único violado")
+
+    async def signal(payload: dict) -> None:
+        done.set()
+
+    monkeypatch.setitem(jobs.TASKS, "teste_evento", signal)
+    monkeypatch.setattr(jobs, "recover_stale_jobs", broken_recovery)
+    async with SessionLocal() as db:
+        await enqueue(db, "teste_evento")
+        await db.commit()
+
+    worker = Worker({"default": 1}, poll_interval=0.05)
+    worker.start()
+    try:
+        await asyncio.wait_for(done.wait(), 5)
+    finally:
+        await worker.stop(timeout=5)
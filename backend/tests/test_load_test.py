@@ -0,0 +1,28 @@
+"""Fluxos do teste de carga (benchmarks/load_test.py) contra a aplicação em processo"""
+import os
+import random
+from datetime import date, timedelta
+import pytest
+from benchmarks.common import percentile
+from benchmarks.load_test import FLOWS, _prepare, run_flow, seed
+
+pytestmark = pytest.mark.anyio
+
+
+def test_percentile():
+    assert percentile([], 95) == 0.0
+    assert percentile([3, 1, 2, 4, 5], 50) == 3
+    assert percentile(list(range(101)), 99) == 99
+
+
+async def test_every_flow_runs_without_errors(client, database):
+    days = 10
+    await seed(os.environ["DATABASE_URL"], users=2, days=days, questions=3, rng=random.Random(1))
+    sessions = await _prepare(client, users=2)
+    assert all(session["summaries"] for session in sessions)
+
+    earliest = date.today() - timedelta(days=days)
+    for flow in FLOWS:
+        endpoint, stats = await run_flow(client, flow, sessions, concurrency=2, total=6, rng=random.Random(2), earliest=earliest)
+        assert (stats["requests"], stats["errors"]) == (6, 0), endpoint
+        assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
@@ -0,0 +1,53 @@
+"""Métricas no formato de exposição do Prometheus"""
+import pytest
+from app.metrics import Counter, Histogram, Registry
+
+pytestmark = pytest.mark.anyio
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.register(Histogram("latencia", "Latência", ["rota"], buckets=(0.1, 1.0)))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "/x")
+
+    lines = registry.render().decode().splitlines()
+
+    assert lines[:2] == ["# HELP latencia Latência", "# TYPE latencia histogram"]
+    assert lines[2:] == [
+        'latencia_bucket{rota="/x",le="0.1"} 2',
+        'latencia_bucket{rota="/x",le="1.0"} 3',
+        'latencia_bucket{rota="/x",le="+Inf"} 4',
+        'latencia_sum{rota="/x"} 3.65',
+        'latencia_count{rota="/x"} 4',
+    ]
+
+
+def test_label_values_are_escaped_and_collectors_run_on_render():
+    registry = Registry()
+    errors = registry.register(Counter("erros_total", "Erros", ["detalhe"]))
+    registry.on_collect(lambda: errors.set(7, 'aspas " e \\ barra\nlinha'))
+
+    assert 'erros_total{detalhe="aspas \\" e \\\\ barra\\nlinha"} 7' in registry.render().decode()
+
+
+async def test_requests_are_counted_by_route_template(client, auth):
+    summary = (await client.post("/api/summaries", headers=auth, json={
+        "study_date": "2026-02-01", "study_time": 30, "difficulty": "Médio", "summary_text": "Resumo"
+    })).json()
+    await client.get(f"/api/summaries/{summary['id']}", headers=auth)
+    await client.get("/api/summaries/99999", headers=auth)
+    await client.get("/nao-existe")
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    route = 'route="/api/summaries/{summary_id}"'
+    assert f'studybuddy_http_requests_total{{method="GET",{route},status="200"}}' in body
+    assert f'studybuddy_http_requests_total{{method="GET",{route},status="404"}}' in body
+    assert 'route="unmatched",status="404"' in body
+    assert "/api/summaries/99999" not in body
+    assert "studybuddy_db_pool_checked_out" in body
+    assert 'studybuddy_read_cache_events_total{event="misses"}' in body
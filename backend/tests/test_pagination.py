@@ -0,0 +1,62 @@
+"""Paginação por cursor (keyset) das listagens"""
+import pytest
+from tests.helpers import create_challenge, create_question, create_summary, submit_answers
+
+pytestmark = pytest.mark.anyio
+
+
+async def all_pages(client, headers, url: str, limit: int) -> list:
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(url, headers=headers, params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert page["limit"] == limit
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+async def test_summary_pages_follow_the_date_without_gaps(client, auth):
+    days = [f"2026-02-{day:02d}" for day in range(1, 8)]
+    for day in days:
+        await create_summary(client, auth, day)
+
+    pages = await all_pages(client, auth, "/api/summaries", limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [item["study_date"] for page in pages for item in page] == days[::-1]
+
+
+async def test_result_pages_break_ties_on_the_same_instant(client, auth):
+    summary = await create_summary(client, auth, "2026-02-01")
+    question_id = await create_question(client, auth, summary["id"])
+    # Vários resultados no mesmo segundo (mesmo created_at no SQLite)
+    submitted = [(await submit_answers(client, auth, summary["id"], {question_id: "a"}))["id"] for _ in range(5)]
+
+    for url in ("/api/results", f"/api/results/summary/{summary['id']}"):
+        pages = await all_pages(client, auth, url, limit=2)
+        assert sorted(item["id"] for page in pages for item in page) == sorted(submitted)
+        assert [len(page) for page in pages] == [2, 2, 1]
+
+
+async def test_exact_multiple_of_the_limit_has_no_empty_last_page(client, auth):
+    for name in ("A", "B", "C", "D"):
+        await create_challenge(client, auth, name=name)
+
+    pages = await all_pages(client, auth, "/api/challenges", limit=2)
+
+    assert [len(page) for page in pages] == [2, 2]
+    assert len({item["id"] for page in pages for item in page}) == 4
+
+
+async def test_invalid_cursor_and_limit(client, auth):
+    for cursor in ("nao-e-cursor", "WzEsMiwzXQ"):
+        response = await client.get("/api/summaries", headers=auth, params={"cursor": cursor})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Cursor de paginação inválido"
+    assert (await client.get("/api/summaries", headers=auth, params={"limit": 1000})).status_code == 422
+    assert (await client.get("/api/summaries", headers=auth, params={"limit": 0})).status_code == 422
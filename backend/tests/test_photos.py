@@ -0,0 +1,136 @@
+"""Upload de fotos endereçado por conteúdo e download com Range"""
+import hashlib
+import json
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models import Job
+from app.utils.photos import parse_range
+from tests.helpers import create_challenge, create_summary
+
+pytestmark = pytest.mark.anyio
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+async def upload(client, headers, content: bytes = PNG, name: str = "foto.png"):
+    return await client.post("/api/photos", headers=headers, files={"file": (name, content, "image/png")})
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=95-200", 100) == (95, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    # Vários intervalos ou unidade desconhecida: arquivo inteiro
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    for header in ("bytes=100-", "bytes=10-5", "bytes=-0"):
+        with pytest.raises(HTTPException) as error:
+            parse_range(header, 100)
+        assert error.value.status_code == 416
+        assert error.value.headers["Content-Range"] == "bytes */100"
+
+
+async def test_upload_is_stored_once_by_content(client, auth, make_user):
+    first = await upload(client, auth)
+    again = await upload(client, await make_user("bia"), name="outra.png")
+
+    assert first.status_code == 201
+    assert again.status_code == 200
+    sha256 = hashlib.sha256(PNG).hexdigest()
+    assert first.json()["sha256"] == again.json()["sha256"] == sha256
+    assert (first.json()["size"], first.json()["content_type"]) == (len(PNG), "image/png")
+    async with SessionLocal() as db:
+        jobs = (await db.execute(select(Job.queue, Job.task))).all()
+    assert jobs == [("photos", "photo_variants")]
+
+
+async def test_upload_rejects_other_formats(client, auth):
+    response = await upload(client, auth, b"<html>" + b"x" * 64, "pagina.png")
+    assert response.status_code == 415
+    response = await client.post("/api/photos", headers=auth, json={"file": "x"})
+    assert response.status_code == 400
+
+
+async def test_download_supports_ranges_and_validators(client, auth):
+    url = (await upload(client, auth)).json()["url"]
+
+    full = await client.get(url)
+    assert full.status_code == 200
+    assert full.content == PNG
+    assert full.headers["accept-ranges"] == "bytes"
+    assert "immutable" in full.headers["cache-control"]
+    etag = full.headers["etag"]
+
+    part = await client.get(url, headers={"Range": "bytes=8-15"})
+    assert part.status_code == 206
+    assert part.content == PNG[8:16]
+    assert part.headers["content-range"] == f"bytes 8-15/{len(PNG)}"
+    assert part.headers["content-length"] == "8"
+
+    tail = await client.get(url, headers={"Range": "bytes=-4"})
+    assert tail.content == PNG[-4:]
+
+    unsatisfiable = await client.get(url, headers={"Range": f"bytes={len(PNG)}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(PNG)}"
+
+    # If-Range com outro validador: o arquivo mudou para o cliente, vai inteiro
+    stale = await client.get(url, headers={"Range": "bytes=0-3", "If-Range": '"outro"'})
+    assert (stale.status_code, stale.content) == (200, PNG)
+    fresh = await client.get(url, headers={"Range": "bytes=0-3", "If-Range": etag})
+    assert (fresh.status_code, fresh.content) == (206, PNG[:4])
+
+    assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+
+async def test_unknown_photos_and_variants_are_not_found(client, auth):
+    sha256 = (await upload(client, auth)).json()["sha256"]
+
+    assert (await client.get(f"/api/photos/{'0' * 64}")).status_code == 404
+    assert (await client.get("/api/photos/nao-e-hash")).status_code == 404
+    assert (await client.get(f"/api/photos/{sha256}/gigante")).status_code == 404
+    # Versão ainda não gerada pelo job
+    assert (await client.get(f"/api/photos/{sha256}/thumb")).status_code == 404
+
+
+async def test_summary_references_the_uploaded_photo(client, auth):
+    asset = (await upload(client, auth)).json()
+
+    summary = await create_summary(client, auth, "2026-04-01", photo_asset_id=asset["id"])
+
+    assert summary["photo_url"] == asset["url"]
+    response = await client.post("/api/summaries", headers=auth, json={
+        "study_date": "2026-04-02", "study_time": 30, "difficulty": "Médio",
+        "summary_text": "Resumo", "photo_asset_id": asset["id"] + 100
+    })
+    assert response.status_code == 400
+
+
+async def test_photos_of_other_users_cannot_be_referenced(client, auth, make_user):
+    asset = (await upload(client, auth)).json()
+    bia = await make_user("bia")
+    summary = {"study_date": "2026-04-01", "study_time": 30, "difficulty": "Médio", "summary_text": "Resumo"}
+
+    response = await client.post("/api/summaries", headers=bia, json={**summary, "photo_asset_id": asset["id"]})
+    assert response.status_code == 400
+    response = await client.post("/api/challenges", headers=bia, json={
+        "name": "Cálculo", "subject": "Matemática", "daily_time": 30, "duration": 30, "photo_asset_id": asset["id"]
+    })
+    assert response.status_code == 400
+    challenge_id = await create_challenge(client, bia)
+    response = await client.put(f"/api/challenges/{challenge_id}", headers=bia, json={"photo_asset_id": asset["id"]})
+    assert response.status_code == 400
+    response = await client.post(
+        "/api/summaries/import", headers={**bia, "Content-Type": "application/x-ndjson"},
+        content=json.dumps({**summary, "photo_asset_id": asset["id"]}).encode("utf-8")
+    )
+    assert response.json()["errors"][0]["errors"] == ["photo_asset_id: foto não encontrada"]
+
+    # Enviar o mesmo conteúdo dá acesso à foto já armazenada
+    assert (await upload(client, bia)).json()["id"] == asset["id"]
+    assert (await create_summary(client, bia, "2026-04-01", photo_asset_id=asset["id"]))["photo_url"] == asset["url"]
@@ -0,0 +1,108 @@
+"""Quantidade de consultas SQL por endpoint: constante, não cresce com as linhas"""
+import pytest
+from app.query_profiler import profile_queries
+
+pytestmark = pytest.mark.anyio
+
+LIST_ENDPOINTS = [
+    "/api/challenges",
+    "/api/summaries",
+    "/api/results",
+    "/api/streak-days",
+    "/api/dashboard/overview",
+]
+
+
+async def seed_day(client, headers, challenge_id: int, day: int) -> int:
+    """Um resumo com objetivos, duas perguntas e um resultado com respostas"""
+    response = await client.post("/api/summaries", headers=headers, json={
+        "challenge_id": challenge_id,
+        "study_date": f"2026-03-{day:02d}",
+        "study_time": 30,
+        "difficulty": "Médio",
+        "summary_text": f"Resumo do dia {day}",
+        "objectives": ["revisar", "praticar", "fixar"],
+    })
+    assert response.status_code == 201, response.text
+    summary_id = response.json()["id"]
+
+    question_ids = []
+    for number in range(2):
+        response = await client.post("/api/questions", headers=headers, json={
+            "summary_id": summary_id,
+            "text": f"Pergunta {number}",
+            "options": {"a": "A", "b": "B"},
+            "correct_answer": "a",
+        })
+        assert response.status_code == 201, response.text
+        question_ids.append(response.json()["id"])
+
+    response = await client.post("/api/results/submit", headers=headers, json={
+        "summary_id": summary_id,
+        "answers": {f"q{question_id}": "a" for question_id in question_ids},
+        "time_spent": 60,
+    })
+    assert response.status_code == 201, response.text
+    return summary_id
+
+
+async def query_counts(client, headers, urls) -> dict:
+    counts = {}
+    for url in urls:
+        response = await client.get(url, headers=headers)
+        assert response.status_code == 200, response.text
+        counts[url] = int(response.headers["X-Query-Count"])
+    return counts
+
+
+async def test_list_endpoints_query_count_is_constant(client, auth, no_read_cache):
+    response = await client.post("/api/challenges", headers=auth, json={
+        "name": "Cálculo", "subject": "Matemática", "daily_time": 30, "duration": 10
+    })
+    challenge_id = response.json()["id"]
+    first_summary = await seed_day(client, auth, challenge_id, 1)
+    urls = LIST_ENDPOINTS + [f"/api/questions/summary/{first_summary}", f"/api/results/summary/{first_summary}"]
+
+    # O usuário autenticado fica no cache depois da primeira requisição
+    await client.get("/api/auth/me", headers=auth)
+    with_one_day = await query_counts(client, auth, urls)
+
+    for day in range(2, 8):
+        await seed_day(client, auth, challenge_id, day)
+    with_seven_days = await query_counts(client, auth, urls)
+
+    assert with_seven_days == with_one_day
+    # Listas com filhos (objetivos, respostas) usam no máximo uma consulta extra por nível
+    assert with_one_day["/api/summaries"] <= 2
+    assert with_one_day["/api/results"] <= 2
+    assert with_one_day["/api/challenges"] == 1
+
+
+async def test_detail_endpoints_query_count(client, auth, no_read_cache):
+    response = await client.post("/api/challenges", headers=auth, json={
+        "name": "Física", "subject": "Física", "daily_time": 20, "duration": 5
+    })
+    summary_id = await seed_day(client, auth, response.json()["id"], 1)
+    await client.get("/api/auth/me", headers=auth)
+
+    counts = await query_counts(client, auth, [
+        f"/api/summaries/{summary_id}",
+        "/api/summaries/by-date/2026-03-01",
+    ])
+    assert all(count <= 2 for count in counts.values()), counts
+
+
+async def test_profile_queries_counts_requests_and_nests(client, auth):
+    await client.get("/api/auth/me", headers=auth)
+    with profile_queries() as outer:
+        with profile_queries() as inner:
+            response = await client.get("/api/challenges", headers=auth)
+    assert response.status_code == 200
+    assert inner.count == outer.count == int(response.headers["X-Query-Count"]) == 1
+
+
+async def test_cached_principal_skips_user_query(client, auth):
+    first = await client.get("/api/auth/me", headers=auth)
+    second = await client.get("/api/auth/me", headers=auth)
+    assert int(first.headers["X-Query-Count"]) == 1
+    assert int(second.headers["X-Query-Count"]) == 0
@@ -0,0 +1,59 @@
+"""Perfil das consultas SQL por requisição (impressão digital, SQL lento e X-Query-Stats)"""
+import logging
+import pytest
+from app.config import settings
+from app.query_profiler import fingerprint, profile_queries
+from tests.helpers import create_summary
+
+pytestmark = pytest.mark.anyio
+
+
+def test_literals_and_parameter_lists_share_a_fingerprint():
+    assert fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'it''s'") == fingerprint(
+        "SELECT *\n  FROM t WHERE id = 42 AND name = 'x'"
+    ) == "SELECT * FROM t WHERE id = ? AND name = ?"
+    assert fingerprint("SELECT * FROM t WHERE id IN (?)") == fingerprint(
+        "SELECT * FROM t WHERE id IN (?, ?, ?)"
+    ) == "SELECT * FROM t WHERE id IN (...)"
+    assert fingerprint("SELECT * FROM t WHERE id IN ($1::INTEGER, $2::INTEGER)") == "SELECT * FROM t WHERE id IN (...)"
+    assert fingerprint("INSERT INTO t (a, b) VALUES (?, ?)") == fingerprint(
+        "INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)"
+    ) == "INSERT INTO t (a, b) VALUES (...)"
+
+
+async def test_slow_queries_are_logged_with_the_route(client, auth, monkeypatch, caplog):
+    summary = await create_summary(client, auth, "2026-02-01")
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+
+    with caplog.at_level(logging.WARNING, logger="app.sql"):
+        with profile_queries() as profile:
+            response = await client.get(f"/api/summaries/{summary['id']}", headers=auth)
+
+    assert response.status_code == 200
+    messages = [record.getMessage() for record in caplog.records if record.name == "app.sql"]
+    assert profile.count > 0 and len(messages) >= profile.count
+    assert all("SQL lento" in message for message in messages)
+    assert any("rota GET /api/summaries/{summary_id}" in message for message in messages)
+
+
+async def test_fast_queries_are_not_logged(client, auth, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 60_000)
+
+    with caplog.at_level(logging.WARNING, logger="app.sql"):
+        await client.get("/api/summaries", headers=auth)
+
+    assert not [record for record in caplog.records if record.name == "app.sql"]
+
+
+async def test_stats_header_is_not_sent_in_production(client, auth, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_STATS_HEADER", True)
+
+    response = await client.get("/api/summaries", headers=auth)
+    stats = dict(item.split("=") for item in response.headers["X-Query-Stats"].split("; "))
+    assert int(stats["count"]) > 0
+    assert set(stats) == {"count", "distinct", "max_repeat", "rows", "time_ms", "slowest_avg_ms"}
+
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    response = await client.get("/api/summaries", headers=auth)
+    assert response.status_code == 200
+    assert "X-Query-Stats" not in response.headers
@@ -0,0 +1,92 @@
+"""Geração local de perguntas a partir dos resumos"""
+import pytest
+from sqlalchemy import delete
+from app.database import SessionLocal
+from app.models import Summary
+from app.utils import question_generator
+from app.utils.question_generator import generate_summary_questions
+from tests.helpers import create_summary, submit_answers, user_id
+
+pytestmark = pytest.mark.anyio
+
+TEXT = (
+    "A fotossíntese converte energia luminosa em energia química nos cloroplastos. "
+    "A clorofila absorve a luz vermelha e azul do espectro visível. "
+    "O ciclo de Calvin fixa o dióxido de carbono em açúcares no estroma. "
+    "A respiração celular libera a energia armazenada na glicose pelas mitocôndrias."
+)
+OTHER_TEXT = (
+    "A mitose divide o núcleo celular em dois núcleos idênticos. "
+    "Durante a metáfase os cromossomos se alinham no equador da célula. "
+    "Na anáfase as cromátides irmãs migram para polos opostos do fuso. "
+    "A citocinese separa o citoplasma e completa a divisão celular."
+)
+
+
+async def generate(client, headers, summary_id: int) -> dict:
+    response = await client.post(f"/api/questions/generate/{summary_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_generation_is_cached_until_the_summary_changes(client, auth):
+    summary = await create_summary(client, auth, "2026-06-01", text=TEXT, objectives=["clorofila"])
+
+    first = await generate(client, auth, summary["id"])
+    again = await generate(client, auth, summary["id"])
+
+    assert first["created"] > 0
+    assert again["created"] == again["removed"] == 0
+    assert again["kept"] == first["created"]
+    assert all(len(question["options"]) == 4 for question in first["questions"])
+
+
+async def test_regeneration_keeps_questions_that_were_answered(client, auth):
+    summary = await create_summary(client, auth, "2026-06-01", text=TEXT)
+    questions = (await generate(client, auth, summary["id"]))["questions"]
+    result = await submit_answers(client, auth, summary["id"], {q["id"]: q["correct_answer"] for q in questions})
+
+    response = await client.put(f"/api/summaries/{summary['id']}", headers=auth, json={
+        "study_date": "2026-06-01", "study_time": 30, "difficulty": "Médio",
+        "summary_text": OTHER_TEXT, "objectives": []
+    })
+    assert response.status_code == 200
+    report = await generate(client, auth, summary["id"])
+
+    assert report["removed"] == 0
+    assert {q["id"] for q in questions} <= {q["id"] for q in report["questions"]}
+    stored = (await client.get(f"/api/results/{result['id']}", headers=auth)).json()
+    assert len(stored["answers"]) == stored["total_count"] == len(questions)
+    assert stored["score"] == 100
+
+
+async def test_unanswered_questions_of_removed_passages_are_deleted(client, auth):
+    summary = await create_summary(client, auth, "2026-06-01", text=TEXT)
+    first = await generate(client, auth, summary["id"])
+
+    await client.put(f"/api/summaries/{summary['id']}", headers=auth, json={
+        "study_date": "2026-06-01", "study_time": 30, "difficulty": "Médio",
+        "summary_text": OTHER_TEXT, "objectives": []
+    })
+    report = await generate(client, auth, summary["id"])
+
+    assert report["removed"] == first["created"]
+    # O SQLite reaproveita os ids apagados: compara pelo enunciado
+    assert not {q["text"] for q in first["questions"]} & {q["text"] for q in report["questions"]}
+
+
+async def test_summary_deleted_during_generation_is_a_no_op(client, auth, monkeypatch):
+    summary = await create_summary(client, auth, "2026-06-01", text=TEXT)
+    owner_id = await user_id(client, auth)
+    run = question_generator.question_pool.run
+
+    async def run_and_delete(*args):
+        generated = await run(*args)
+        async with SessionLocal() as db:
+            await db.execute(delete(Summary).where(Summary.id == summary["id"]))
+            await db.commit()
+        return generated
+
+    monkeypatch.setattr(question_generator.question_pool, "run", run_and_delete)
+    async with SessionLocal() as db:
+        assert await generate_summary_questions(db, owner_id, summary["id"]) is None
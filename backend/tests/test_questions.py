@@ -0,0 +1,120 @@
+"""Perguntas: posse dos resumos, criação em lote e GET condicional da lista por resumo"""
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import func, select, update
+from app.database import SessionLocal, engine
+from app.models import Question, Summary
+from tests.helpers import create_question, create_summary
+
+pytestmark = pytest.mark.anyio
+
+OLD = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+async def age_summary(summary_id: int) -> None:
+    """Volta o updated_at do resumo, para que qualquer escrita mude o ETag"""
+    async with SessionLocal() as db:
+        await db.execute(update(Summary).where(Summary.id == summary_id).values(updated_at=OLD))
+        await db.commit()
+
+
+async def summary_updated_at(summary_id: int):
+    async with SessionLocal() as db:
+        return (await db.execute(select(Summary.updated_at).where(Summary.id == summary_id))).scalar_one()
+
+
+async def test_update_cannot_move_question_into_another_users_summary(client, auth, make_user):
+    own = await create_summary(client, auth, "2026-02-01")
+    question_id = await create_question(client, auth, own["id"])
+    other_headers = await make_user("bia")
+    foreign = await create_summary(client, other_headers, "2026-02-01")
+    await age_summary(foreign["id"])
+
+    response = await client.put(f"/api/questions/{question_id}", headers=auth, json={
+        "summary_id": foreign["id"], "text": "Movida", "options": {"a": "A"}, "correct_answer": "a"
+    })
+
+    assert response.status_code == 404
+    async with SessionLocal() as db:
+        question = (await db.execute(select(Question).where(Question.id == question_id))).scalar_one()
+    assert question.summary_id == own["id"] and question.text == "Pergunta"
+    assert (await summary_updated_at(foreign["id"])).replace(tzinfo=timezone.utc) == OLD
+
+
+async def test_update_moves_question_between_own_summaries(client, auth):
+    first = await create_summary(client, auth, "2026-02-01")
+    second = await create_summary(client, auth, "2026-02-02")
+    question_id = await create_question(client, auth, first["id"])
+
+    response = await client.put(f"/api/questions/{question_id}", headers=auth, json={
+        "summary_id": second["id"], "text": "Movida", "options": {"a": "A"}, "correct_answer": "a"
+    })
+
+    assert response.status_code == 200
+    listed = await client.get(f"/api/questions/summary/{second['id']}", headers=auth)
+    assert [question["id"] for question in listed.json()] == [question_id]
+
+
+async def test_question_list_conditional_get(client, auth):
+    summary = await create_summary(client, auth, "2026-02-01")
+    await create_question(client, auth, summary["id"])
+    await age_summary(summary["id"])
+    url = f"/api/questions/summary/{summary['id']}"
+
+    first = await client.get(url, headers=auth)
+    etag = first.headers["ETag"]
+    cached = await client.get(url, headers={**auth, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    await create_question(client, auth, summary["id"], text="Outra")
+    changed = await client.get(url, headers={**auth, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 2
+
+
+async def test_summary_detail_conditional_get(client, auth):
+    summary = await create_summary(client, auth, "2026-02-01", objectives=["ler"])
+    url = f"/api/summaries/{summary['id']}"
+
+    first = await client.get(url, headers=auth)
+    response = await client.get(url, headers={**auth, "If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 304
+    response = await client.get(url, headers={**auth, "If-Modified-Since": first.headers["Last-Modified"]})
+    assert response.status_code == 304
+
+
+def bulk_payload(*summary_ids: int) -> dict:
+    return {"questions": [
+        {"summary_id": summary_id, "text": f"Pergunta {index}", "options": {"a": "A", "b": "B"}, "correct_answer": "a"}
+        for index, summary_id in enumerate(summary_ids)
+    ]}
+
+
+async def test_bulk_create_keeps_the_request_order(client, auth, no_read_cache):
+    first = await create_summary(client, auth, "2026-01-10")
+    second = await create_summary(client, auth, "2026-01-11")
+
+    small = await client.post("/api/questions/bulk", headers=auth, json=bulk_payload(first["id"], second["id"]))
+    large = await client.post("/api/questions/bulk", headers=auth, json=bulk_payload(*[first["id"], second["id"]] * 50))
+
+    assert small.status_code == large.status_code == 201
+    assert [question["text"] for question in large.json()] == [f"Pergunta {index}" for index in range(100)]
+    assert [question["summary_id"] for question in large.json()[:2]] == [first["id"], second["id"]]
+    # Posse, INSERT e updated_at dos resumos: não cresce com o tamanho do lote. No
+    # SQLite o RETURNING ordenado não tem sentinela e o SQLAlchemy insere linha a linha
+    if engine.dialect.name == "postgresql":
+        assert small.headers["X-Query-Count"] == large.headers["X-Query-Count"]
+
+
+async def test_bulk_create_is_all_or_nothing(client, auth, make_user):
+    own = await create_summary(client, auth, "2026-01-10")
+    foreign = await create_summary(client, await make_user("bia"), "2026-01-10")
+
+    response = await client.post("/api/questions/bulk", headers=auth, json=bulk_payload(own["id"], foreign["id"], 9999))
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == f"Resumo não encontrado: {foreign['id']}, 9999"
+    async with SessionLocal() as db:
+        assert await db.scalar(select(func.count()).select_from(Question)) == 0
+    assert (await client.post("/api/questions/bulk", headers=auth, json={"questions": []})).status_code == 422
@@ -0,0 +1,161 @@
+"""Cache de leitura: invalidação por usuário, backends memory e redis e escolha do backend"""
+import os
+import subprocess
+import sys
+import pytest
+from app.config import settings
+from app.utils.jobs import TASKS
+from app.utils.read_cache import CacheBackend, InMemoryRedis, MemoryCache, NullCache, ReadCache, RedisCache, create_backend
+from tests.helpers import create_question, create_summary, submit_answers, user_id
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_write_invalidates_only_the_writers_cached_lists(client, auth, make_user):
+    other = await make_user("bia")
+    await create_summary(client, auth, "2026-04-01")
+    await create_summary(client, other, "2026-04-01")
+    await client.get("/api/summaries", headers=other)
+
+    first = await client.get("/api/summaries", headers=auth)
+    cached = await client.get("/api/summaries", headers=auth)
+    assert int(cached.headers["X-Query-Count"]) == 0
+    assert cached.json() == first.json()
+
+    await create_summary(client, auth, "2026-04-02")
+    fresh = await client.get("/api/summaries", headers=auth)
+    assert len(fresh.json()["items"]) == 2
+    # A lista do outro usuário continua em cache
+    assert int((await client.get("/api/summaries", headers=other)).headers["X-Query-Count"]) == 0
+
+
+async def test_submitting_a_test_refreshes_the_cached_results(client, auth):
+    summary = await create_summary(client, auth, "2026-04-01")
+    question_id = await create_question(client, auth, summary["id"])
+    url = f"/api/results/summary/{summary['id']}"
+    assert (await client.get(url, headers=auth)).json()["items"] == []
+    assert int((await client.get(url, headers=auth)).headers["X-Query-Count"]) == 0
+
+    await submit_answers(client, auth, summary["id"], {question_id: "a"})
+
+    after = await client.get(url, headers=auth)
+    assert int(after.headers["X-Query-Count"]) > 0
+    assert [result["score"] for result in after.json()["items"]] == [100]
+
+
+async def test_background_job_invalidates_the_owners_reads(client, auth):
+    import app.worker  # noqa: F401 (registra as tarefas)
+    summary = await create_summary(client, auth, "2026-04-01", text=(
+        "A fotossíntese converte energia luminosa em energia química nos cloroplastos. "
+        "O ciclo de Calvin fixa o dióxido de carbono em açúcares no estroma."
+    ))
+    url = f"/api/questions/summary/{summary['id']}"
+    assert (await client.get(url, headers=auth)).json() == []
+
+    await TASKS["generate_questions"]({"user_id": await user_id(client, auth), "summary_id": summary["id"]})
+
+    assert len((await client.get(url, headers=auth)).json()) > 0
+
+
+async def test_shared_backend_invalidation_and_outage():
+    cache = ReadCache(RedisCache(InMemoryRedis()), ttl=60)
+    entry = await cache.lookup(1, "summaries", "list")
+    await entry.store({"items": []})
+    assert (await cache.lookup(1, "summaries", "list")).hit
+
+    await cache.invalidate_user(1)
+    assert not (await cache.lookup(1, "summaries", "list")).hit
+
+    class Down:
+        async def mget(self, keys):
+            raise ConnectionError("redis fora do ar")
+
+    # Sem o Redis, a leitura vira miss e a resposta é calculada normalmente
+    cache.backend.client = Down()
+    entry = await cache.lookup(1, "summaries", "list")
+    assert not entry.hit
+    assert (await entry.store({"items": []})).status_code == 200
+    assert cache.stats()["errors"] == 1
+
+
+async def test_memory_cache_evicts_by_size_and_expires():
+    cache = MemoryCache(max_items=10, max_bytes=100)
+    await cache.set("a", b"x" * 40, ttl=60)
+    await cache.set("b", b"x" * 40, ttl=60)
+    await cache.get("a")
+    await cache.set("c", b"x" * 40, ttl=60)
+
+    # "b" era o menos usado
+    assert await cache.get("b") is None
+    assert await cache.get("a") is not None
+    await cache.set("grande", b"x" * 200, ttl=60)
+    await cache.set("expirado", b"x", ttl=0)
+    assert await cache.get("grande") is None
+    assert await cache.get("expirado") is None
+    assert cache.stats()["bytes"] <= 100
+
+
+async def test_memory_cache_bounds_tag_versions():
+    cache = MemoryCache(max_items=3, max_bytes=1024)
+    for user in range(10):
+        await cache.bump_tags([f"user:{user}"])
+    assert len(cache._versions) == 3
+
+
+async def test_evicted_tag_never_returns_to_an_old_version():
+    cache = MemoryCache(max_items=2, max_bytes=1024)
+    (before,) = await cache.tag_versions(["user:1"])
+    await cache.set(f"u1:v{before}", b"antigo", ttl=60)
+    await cache.bump_tags(["user:1"])
+    (current,) = await cache.tag_versions(["user:1"])
+
+    # Outras tags empurram user:1 para fora do LRU de versões
+    await cache.bump_tags(["user:2", "user:3", "user:4"])
+    assert "user:1" not in cache._versions
+    (after,) = await cache.tag_versions(["user:1"])
+    assert after >= current > before
+    assert await cache.get(f"u1:v{after}") is None
+
+
+def test_backends_implement_the_whole_interface():
+    class Partial(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+    for backend in (NullCache(), MemoryCache(10, 1024), RedisCache(InMemoryRedis())):
+        assert backend.stats()["backend"] == backend.name
+
+
+def test_auto_backend_is_memory_only_with_a_single_writer(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "auto")
+    monkeypatch.setattr(settings, "CACHE_URL", "memory://")
+    monkeypatch.setattr(settings, "JOB_WORKER_IN_APP", True)
+    monkeypatch.setattr(settings, "API_WORKERS", 1)
+    assert isinstance(create_backend(), MemoryCache)
+
+    monkeypatch.setattr(settings, "API_WORKERS", 4)
+    assert isinstance(create_backend(), RedisCache)
+
+    monkeypatch.setattr(settings, "API_WORKERS", 1)
+    monkeypatch.setattr(settings, "JOB_WORKER_IN_APP", False)
+    assert isinstance(create_backend(), RedisCache)
+
+
+def test_memory_backend_is_refused_with_several_writers(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "memory")
+    monkeypatch.setattr(settings, "API_WORKERS", 2)
+    with pytest.raises(RuntimeError):
+        create_backend()
+
+
+def test_standalone_worker_refuses_memory_cache():
+    env = dict(os.environ, CACHE_BACKEND="memory", JOB_WORKER_IN_APP="True", API_WORKERS="1")
+    result = subprocess.run(
+        [sys.executable, "-m", "app.worker"],
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 2
+    assert "CACHE_BACKEND=redis" in result.stderr
@@ -0,0 +1,130 @@
+"""Lembretes diários de estudo: agendamento, envio e reagendamento"""
+import json
+from datetime import date, datetime, timedelta
+import pytest
+from sqlalchemy import select, update
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Job, StudyReminder
+from app.utils import reminders
+from app.utils.jobs import TASKS
+from app.utils.reminders import backfill_reminders, next_occurrence, occurrence, run_reminders
+from tests.helpers import create_challenge, create_summary, user_id
+
+pytestmark = pytest.mark.anyio
+
+TODAY = date.today()
+EIGHT = occurrence(TODAY, 8 * 60)
+
+
+async def reminder_rows() -> dict:
+    async with SessionLocal() as db:
+        result = await db.execute(select(StudyReminder))
+        return {row.user_id: row for row in result.scalars()}
+
+
+async def set_due(owner_id: int, when: datetime) -> None:
+    async with SessionLocal() as db:
+        await db.execute(update(StudyReminder).where(StudyReminder.user_id == owner_id).values(
+            remind_minute=when.hour * 60 + when.minute, next_at=when
+        ))
+        await db.commit()
+
+
+async def queued_reminders() -> list:
+    async with SessionLocal() as db:
+        payloads = (await db.execute(select(Job.payload).where(Job.task == "deliver_reminders"))).scalars().all()
+    return [reminder for payload in payloads for reminder in payload["reminders"]]
+
+
+async def user_with_challenge(client, make_user, name: str, daily_time: int = 30) -> tuple:
+    headers = await make_user(name)
+    await create_challenge(client, headers, daily_time=daily_time)
+    return headers, await user_id(client, headers)
+
+
+def test_next_occurrence():
+    assert next_occurrence(8 * 60, EIGHT - timedelta(minutes=1)) == EIGHT
+    assert next_occurrence(8 * 60, EIGHT) == occurrence(TODAY + timedelta(days=1), 8 * 60)
+    assert next_occurrence(8 * 60, EIGHT - timedelta(hours=1), skip_day=TODAY) == occurrence(TODAY + timedelta(days=1), 8 * 60)
+
+
+async def test_first_challenge_creates_the_default_reminder(client, auth, make_user):
+    assert (await client.get("/api/reminders", headers=auth)).status_code == 404
+    await create_challenge(client, auth)
+    await create_challenge(client, auth, name="Física")
+
+    reminder = (await client.get("/api/reminders", headers=auth)).json()
+
+    assert reminder["time"] == settings.REMINDER_DEFAULT_TIME + ":00"
+    assert reminder["enabled"] and reminder["next_at"] is not None
+    assert len(await reminder_rows()) == 1
+
+
+async def test_only_users_who_did_not_study_today_are_reminded(client, make_user):
+    _, lazy = await user_with_challenge(client, make_user, "ana", daily_time=45)
+    studious_headers, studious = await user_with_challenge(client, make_user, "bia")
+    _, later = await user_with_challenge(client, make_user, "caio")
+    await create_summary(client, studious_headers, TODAY.isoformat())
+    await set_due(lazy, EIGHT)
+    await set_due(studious, EIGHT)
+    await set_due(later, EIGHT + timedelta(hours=2))
+
+    totals = await run_reminders(now=EIGHT + timedelta(minutes=1), batch_size=1)
+
+    assert totals == {"due": 2, "sent": 1}
+    [sent] = await queued_reminders()
+    assert (sent["user_id"], sent["daily_goal"], sent["date"]) == (lazy, 45, TODAY.isoformat())
+    rows = await reminder_rows()
+    tomorrow = occurrence(TODAY + timedelta(days=1), 8 * 60)
+    assert {reminders._local(rows[user].next_at) for user in (lazy, studious)} == {tomorrow}
+    assert (rows[lazy].last_sent_on, rows[studious].last_sent_on) == (TODAY, None)
+    # Já reagendados: uma nova rodada não envia de novo
+    assert await run_reminders(now=EIGHT + timedelta(minutes=2)) == {"due": 0, "sent": 0}
+
+
+async def test_overdue_reminders_are_rescheduled_without_sending(client, make_user):
+    _, owner = await user_with_challenge(client, make_user, "ana")
+    await set_due(owner, EIGHT)
+
+    late = EIGHT + timedelta(minutes=settings.REMINDER_MAX_DELAY_MINUTES + 1)
+    assert await run_reminders(now=late) == {"due": 1, "sent": 0}
+    assert reminders._local((await reminder_rows())[owner].next_at) > late
+
+
+async def test_changing_the_time_after_todays_reminder_waits_until_tomorrow(client, make_user):
+    headers, owner = await user_with_challenge(client, make_user, "ana")
+    async with SessionLocal() as db:
+        await db.execute(update(StudyReminder).values(last_sent_on=TODAY))
+        await db.commit()
+
+    reminder = (await client.put("/api/reminders", headers=headers, json={"time": "23:59"})).json()
+    assert datetime.fromisoformat(reminder["next_at"]).date() > TODAY
+
+    disabled = (await client.put("/api/reminders", headers=headers, json={"time": "23:59", "enabled": False})).json()
+    assert (disabled["enabled"], disabled["next_at"]) == (False, None)
+
+
+async def test_backfill_creates_missing_reminders_once(client, make_user):
+    _, first = await user_with_challenge(client, make_user, "ana")
+    _, second = await user_with_challenge(client, make_user, "bia")
+    await make_user("caio")
+    async with SessionLocal() as db:
+        await db.execute(StudyReminder.__table__.delete().where(StudyReminder.user_id == second))
+        await db.commit()
+        assert await backfill_reminders(db) == 1
+        assert await backfill_reminders(db) == 0
+
+    assert set(await reminder_rows()) == {first, second}
+
+
+async def test_file_sink_appends_ndjson(database, monkeypatch):
+    import app.worker  # noqa: F401 (registra as tarefas)
+    monkeypatch.setattr(settings, "REMINDER_SINK", "file")
+    batch = [{"user_id": 1, "username": "ana", "email": "ana@example.com", "daily_goal": 30, "date": "2026-01-01"}]
+
+    await TASKS["deliver_reminders"]({"reminders": batch})
+    await TASKS["deliver_reminders"]({"reminders": batch})
+
+    with open(settings.REMINDER_SINK_PATH, encoding="utf-8") as file:
+        assert [json.loads(line) for line in file] == batch * 2
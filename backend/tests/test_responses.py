@@ -0,0 +1,45 @@
+"""Listagens montadas das tuplas da consulta e serialização com orjson"""
+import json
+from datetime import date, datetime
+import pytest
+from app.utils import responses
+from app.utils.responses import FastJSONResponse
+from tests.helpers import create_challenge, create_question, create_summary, submit_answers
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_list_items_match_the_detail_responses(client, auth):
+    challenge_id = await create_challenge(client, auth)
+    summary = await create_summary(client, auth, "2026-02-01", objectives=["ler"], challenge_id=challenge_id)
+    question_id = await create_question(client, auth, summary["id"])
+    result = await submit_answers(client, auth, summary["id"], {question_id: "a"})
+
+    [listed_summary] = (await client.get("/api/summaries", headers=auth)).json()["items"]
+    detail = (await client.get(f"/api/summaries/{summary['id']}", headers=auth)).json()
+    assert listed_summary == {key: value for key, value in detail.items() if key in listed_summary}
+
+    [listed_question] = (await client.get(f"/api/questions/summary/{summary['id']}", headers=auth)).json()
+    assert listed_question == (await client.get(f"/api/questions/{question_id}", headers=auth)).json()
+
+    [listed_result] = (await client.get("/api/results", headers=auth)).json()["items"]
+    assert listed_result == (await client.get(f"/api/results/{result['id']}", headers=auth)).json()
+
+    [listed_challenge] = (await client.get("/api/challenges", headers=auth)).json()["items"]
+    assert listed_challenge == (await client.get(f"/api/challenges/{challenge_id}", headers=auth)).json()
+
+
+def test_stdlib_fallback_renders_the_same_json(monkeypatch):
+    content = {
+        "data": date(2026, 2, 1),
+        "criado": datetime(2026, 2, 1, 12, 30, 5, 250000),
+        "opcoes": {1: "Opção A", "b": None},
+        "itens": [1, 2.5, True],
+    }
+    fast = FastJSONResponse(content).body
+
+    monkeypatch.setattr(responses, "orjson", None)
+    fallback = FastJSONResponse(content).body
+
+    assert json.loads(fast) == json.loads(fallback)
+    assert "Opção".encode("utf-8") in fallback
@@ -0,0 +1,81 @@
+"""Correção das respostas e submissões idempotentes"""
+import asyncio
+import pytest
+from sqlalchemy import func, select
+from app.database import SessionLocal
+from app import models
+from tests.helpers import create_question, create_summary
+
+pytestmark = pytest.mark.anyio
+
+
+async def submit(client, headers, summary_id: int, answers: dict, key: str = None):
+    return await client.post(
+        "/api/results/submit",
+        headers={**headers, **({"Idempotency-Key": key} if key else {})},
+        json={"summary_id": summary_id, "answers": answers, "time_spent": 5},
+    )
+
+
+async def count_results() -> int:
+    async with SessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(models.TestResult))
+
+
+async def test_answers_are_graded_and_stored(client, auth):
+    summary = await create_summary(client, auth, "2026-02-01")
+    questions = [await create_question(client, auth, summary["id"], correct=correct) for correct in "aab"]
+
+    response = await submit(client, auth, summary["id"], {f"q{qid}": "a" for qid in questions})
+
+    assert response.status_code == 201
+    result = response.json()
+    assert (result["score"], result["correct_count"], result["total_count"]) == (66, 2, 3)
+    assert [answer["is_correct"] for answer in result["answers"]] == [True, True, False]
+    stored = (await client.get(f"/api/results/{result['id']}", headers=auth)).json()
+    assert stored["answers"] == result["answers"]
+
+
+async def test_invalid_submissions(client, auth, make_user):
+    empty = await create_summary(client, auth, "2026-02-01")
+    summary = await create_summary(client, auth, "2026-02-02")
+    question_id = await create_question(client, auth, summary["id"])
+    other = await make_user("bia")
+
+    assert (await submit(client, auth, empty["id"], {})).status_code == 400
+    missing = await submit(client, auth, summary["id"], {})
+    assert (missing.status_code, missing.json()["detail"]) == (400, f"Resposta faltando para a pergunta {question_id}")
+    assert (await submit(client, other, summary["id"], {f"q{question_id}": "a"})).status_code == 404
+    assert await count_results() == 0
+
+
+async def test_retry_with_the_same_key_returns_the_first_result(client, auth, make_user):
+    summary = await create_summary(client, auth, "2026-02-01")
+    question_id = await create_question(client, auth, summary["id"])
+
+    first = (await submit(client, auth, summary["id"], {f"q{question_id}": "a"}, key="tentativa-1")).json()
+    # A nova tentativa não é corrigida de novo, mesmo com outras respostas
+    retry = (await submit(client, auth, summary["id"], {f"q{question_id}": "b"}, key="tentativa-1")).json()
+    other = (await submit(client, auth, summary["id"], {f"q{question_id}": "b"}, key="tentativa-2")).json()
+
+    assert retry == first
+    assert other["id"] != first["id"] and other["score"] == 0
+    # A chave vale por usuário
+    other_user = await make_user("bia")
+    other_summary = await create_summary(client, other_user, "2026-02-01")
+    other_question = await create_question(client, other_user, other_summary["id"])
+    assert (await submit(client, other_user, other_summary["id"], {f"q{other_question}": "a"}, key="tentativa-1")).status_code == 201
+    assert await count_results() == 3
+
+
+async def test_concurrent_retries_record_one_result(client, auth):
+    summary = await create_summary(client, auth, "2026-02-01")
+    question_id = await create_question(client, auth, summary["id"])
+
+    responses = await asyncio.gather(*(
+        submit(client, auth, summary["id"], {f"q{question_id}": "a"}, key="mesma") for _ in range(4)
+    ))
+
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert await count_results() == 1
@@ -0,0 +1,73 @@
+"""Totais por período (StudyRollup): incrementais, remoção e reconstrução"""
+import pytest
+from sqlalchemy import insert, select
+from app.database import SessionLocal
+from app import models
+from app.models import StudyRollup
+from app.utils.rollups import TEST_DAY, _as_date, rebuild_rollups
+from tests.helpers import create_question, create_summary, submit_answers, user_id
+
+pytestmark = pytest.mark.anyio
+
+
+async def rollup_rows(owner_id: int) -> dict:
+    async with SessionLocal() as db:
+        result = await db.execute(
+            select(
+                StudyRollup.period, StudyRollup.period_start, StudyRollup.study_time,
+                StudyRollup.study_sessions, StudyRollup.test_count, StudyRollup.score_total
+            ).where(StudyRollup.user_id == owner_id)
+        )
+        return {(row[0], row[1]): tuple(row[2:]) for row in result.all()}
+
+
+async def test_test_stats_use_the_result_day_from_the_database(client, auth):
+    owner_id = await user_id(client, auth)
+    summary = await create_summary(client, auth, "2026-01-10")
+    question_id = await create_question(client, auth, summary["id"])
+    await submit_answers(client, auth, summary["id"], {question_id: "a"})
+
+    async with SessionLocal() as db:
+        test_day = _as_date((await db.execute(select(TEST_DAY).select_from(models.TestResult))).scalar_one())
+    rows = await rollup_rows(owner_id)
+    assert rows[("day", test_day)][2:] == (1, 100)
+
+
+async def test_incremental_totals_match_rebuild_and_return_to_zero(client, auth):
+    owner_id = await user_id(client, auth)
+    summaries = []
+    for day in ("2026-01-10", "2026-01-11"):
+        summary = await create_summary(client, auth, day)
+        question_id = await create_question(client, auth, summary["id"])
+        await submit_answers(client, auth, summary["id"], {question_id: "a"})
+        await submit_answers(client, auth, summary["id"], {question_id: "b"})
+        summaries.append(summary["id"])
+
+    incremental = await rollup_rows(owner_id)
+    async with SessionLocal() as db:
+        await rebuild_rollups(db, owner_id)
+    assert await rollup_rows(owner_id) == incremental
+
+    for summary_id in summaries:
+        response = await client.delete(f"/api/summaries/{summary_id}", headers=auth)
+        assert response.status_code == 204
+    assert all(values == (0, 0, 0, 0) for values in (await rollup_rows(owner_id)).values())
+
+
+async def test_full_rebuild_removes_rows_of_users_without_history(client, auth, make_user):
+    owner_id = await user_id(client, auth)
+    await create_summary(client, auth, "2026-01-10")
+    other_headers = await make_user("bia")
+    other_id = await user_id(client, other_headers)
+
+    # Totais que sobraram de um histórico já apagado
+    async with SessionLocal() as db:
+        await db.execute(insert(StudyRollup).values(
+            user_id=other_id, period="day", period_start=_as_date("2026-01-05"),
+            study_time=90, study_sessions=1, test_count=0, score_total=0
+        ))
+        await db.commit()
+        await rebuild_rollups(db)
+
+    assert await rollup_rows(other_id) == {}
+    assert (await rollup_rows(owner_id))[("day", _as_date("2026-01-10"))] == (30, 1, 0, 0)
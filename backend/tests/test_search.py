@@ -0,0 +1,76 @@
+"""Busca textual nos resumos e objetivos"""
+import pytest
+from sqlalchemy import delete
+from app.database import SessionLocal
+from app.models import SummarySearch
+from app.utils.search import fold, rebuild_search_index
+from tests.helpers import create_summary
+
+pytestmark = pytest.mark.anyio
+
+
+async def search(client, headers, q: str, **params) -> dict:
+    response = await client.get("/api/summaries/search", headers=headers, params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_fold_removes_case_and_accents():
+    assert fold("Célula Ação") == "celula acao"
+
+
+async def test_all_terms_must_match_ignoring_accents(client, auth, make_user):
+    cell = await create_summary(client, auth, "2026-02-01", text="A célula <animal> tem núcleo e mitocôndrias.")
+    await create_summary(client, auth, "2026-02-02", text="A célula vegetal tem parede celular.")
+    await create_summary(client, await make_user("bia"), "2026-02-01", text="Célula e núcleo.")
+
+    page = await search(client, auth, "CELULA nucleo")
+
+    assert [hit["id"] for hit in page["items"]] == [cell["id"]]
+    snippet = page["items"][0]["snippet"]
+    assert "<mark>célula</mark>" in snippet and "<mark>núcleo</mark>" in snippet
+    assert "&lt;animal&gt;" in snippet
+    assert (await search(client, auth, "célula ribossomo"))["items"] == []
+
+
+async def test_objectives_match_and_rank_below_the_text(client, auth):
+    in_objectives = await create_summary(client, auth, "2026-02-01", text="Revisão geral da semana", objectives=["Estudar fotossíntese"])
+    in_text = await create_summary(client, auth, "2026-02-02", text="Fotossíntese na folha da semana")
+
+    hits = (await search(client, auth, "fotossintese"))["items"]
+
+    assert [hit["id"] for hit in hits] == [in_text["id"], in_objectives["id"]]
+    assert hits[1]["objectives"] == ["Estudar <mark>fotossíntese</mark>"]
+
+
+async def test_results_page_by_rank(client, auth):
+    for day, repeats in enumerate((1, 3, 2, 3), start=1):
+        await create_summary(client, auth, f"2026-02-0{day}", text=" ".join(["enzima"] * repeats + ["texto"] * 3))
+
+    first = await search(client, auth, "enzima", limit=2)
+    second = await search(client, auth, "enzima", limit=2, cursor=first["next_cursor"])
+
+    ranks = [hit["rank"] for hit in first["items"] + second["items"]]
+    assert ranks == sorted(ranks, reverse=True)
+    assert len({hit["id"] for hit in first["items"] + second["items"]}) == 4
+    assert second["next_cursor"] is None
+
+
+async def test_index_follows_edits_and_rebuild(client, auth):
+    summary = await create_summary(client, auth, "2026-02-01", text="Revolução Francesa")
+    await client.put(f"/api/summaries/{summary['id']}", headers=auth, json={
+        "study_date": "2026-02-01", "study_time": 30, "difficulty": "Médio",
+        "summary_text": "Revolução Industrial", "objectives": []
+    })
+    assert (await search(client, auth, "francesa"))["items"] == []
+    assert len((await search(client, auth, "industrial"))["items"]) == 1
+
+    async with SessionLocal() as db:
+        await db.execute(delete(SummarySearch))
+        await db.commit()
+        assert await rebuild_search_index(db) == 1
+    # Outro `limit`: a alteração direta no banco não invalidou a busca em cache
+    assert len((await search(client, auth, "industrial", limit=5))["items"]) == 1
+
+    await client.delete(f"/api/summaries/{summary['id']}", headers=auth)
+    assert (await search(client, auth, "industrial", limit=10))["items"] == []
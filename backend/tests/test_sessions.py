@@ -0,0 +1,83 @@
+"""Sessões de login: logout, revogação e sincronização entre processos"""
+from datetime import timedelta
+import pytest
+from sqlalchemy import func, select, update
+from app.database import SessionLocal
+from app.models import Session
+from app.utils import sessions
+from app.utils.sessions import purge_expired_sessions, revoked_sessions, sync_revocations
+
+pytestmark = pytest.mark.anyio
+
+
+async def login(client, username: str = "ana") -> dict:
+    response = await client.post("/api/auth/login", json={
+        "email": f"{username}@example.com",
+        "password": "secret1",
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def test_logout_rejects_only_the_current_token(client, auth):
+    other = await login(client)
+
+    assert (await client.post("/api/auth/logout", headers=auth)).status_code == 204
+
+    response = await client.get("/api/auth/me", headers=auth)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Sessão encerrada"
+    assert (await client.get("/api/auth/me", headers=other)).status_code == 200
+
+
+async def test_revoking_another_device(client, auth, make_user):
+    other = await login(client)
+    intruder = await make_user("bia")
+
+    listed = (await client.get("/api/auth/sessions", headers=auth)).json()
+    assert len(listed) == 2
+    [target] = [session for session in listed if not session["current"]]
+
+    assert (await client.delete(f"/api/auth/sessions/{target['id']}", headers=intruder)).status_code == 404
+    assert (await client.delete(f"/api/auth/sessions/{target['id']}", headers=auth)).status_code == 204
+    assert (await client.delete(f"/api/auth/sessions/{target['id']}", headers=auth)).status_code == 404
+
+    assert (await client.get("/api/auth/me", headers=other)).status_code == 401
+    assert [session["current"] for session in (await client.get("/api/auth/sessions", headers=auth)).json()] == [True]
+
+
+async def test_revocation_from_another_process_arrives_on_sync(client, auth):
+    async with SessionLocal() as db:
+        await db.execute(update(Session).values(revoked_at=func.now()))
+        await db.commit()
+        # Ainda não sincronizado: o token continua aceito
+        assert (await client.get("/api/auth/me", headers=auth)).status_code == 200
+        assert await sync_revocations(db) == 1
+
+    assert (await client.get("/api/auth/me", headers=auth)).status_code == 401
+
+
+async def test_expired_revocations_leave_the_list(database):
+    now = sessions._utcnow()
+    revoked_sessions.merge([("velha", now - timedelta(seconds=1)), ("nova", now + timedelta(minutes=5))])
+
+    assert not revoked_sessions.is_revoked("velha")
+    assert revoked_sessions.is_revoked("nova")
+    assert revoked_sessions.stats()["revoked"] == 1
+
+
+async def test_purge_deletes_expired_sessions_in_batches(client, auth):
+    for _ in range(4):
+        await login(client)
+    async with SessionLocal() as db:
+        expired = select(Session.id).order_by(Session.id).limit(3).scalar_subquery()
+        await db.execute(
+            update(Session)
+            .where(Session.id.in_(expired))
+            .values(expires_at=sessions._utcnow() - timedelta(minutes=1))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+        assert await purge_expired_sessions(db, batch_size=2) == 3
+        assert await db.scalar(select(func.count()).select_from(Session)) == 2
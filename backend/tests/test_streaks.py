@@ -0,0 +1,85 @@
+"""Streaks calculados pelos bitmaps anuais (StudyCalendar)"""
+import base64
+from datetime import date, timedelta
+import pytest
+from app.database import SessionLocal
+from app.utils.streaks import (
+    current_streak, iter_days, load_study_days, longest_streak, pack_range, rebuild_calendars
+)
+from tests.helpers import create_summary, user_id
+
+pytestmark = pytest.mark.anyio
+
+
+def bits_for(base: date, days) -> int:
+    return sum(1 << (day - base).days for day in days)
+
+
+def test_streaks_from_bits():
+    base = date(2025, 1, 1)
+    studied = [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3), date(2025, 1, 6), date(2025, 1, 7)]
+    bits = bits_for(base, studied)
+
+    assert longest_streak(bits) == 3
+    assert current_streak(base, bits, date(2025, 1, 7)) == 2
+    # Ainda não estudou hoje: conta até ontem
+    assert current_streak(base, bits, date(2025, 1, 8)) == 2
+    assert current_streak(base, bits, date(2025, 1, 9)) == 0
+    assert current_streak(base, bits, date(2024, 12, 31)) == 0
+    assert list(iter_days(base, bits, date(2025, 1, 3), date(2025, 1, 6))) == [date(2025, 1, 3), date(2025, 1, 6)]
+
+
+def test_packed_calendar_starts_at_the_requested_day():
+    base = date(2025, 1, 1)
+    bits = bits_for(base, [date(2025, 1, 1), date(2025, 1, 3), date(2025, 1, 10)])
+
+    packed = base64.b64decode(pack_range(base, bits, date(2025, 1, 3), date(2025, 1, 12)))
+
+    assert int.from_bytes(packed, "little") == 0b10000001
+    # Intervalo anterior ao primeiro ano registrado
+    early = base64.b64decode(pack_range(base, bits, date(2024, 12, 30), date(2025, 1, 2)))
+    assert int.from_bytes(early, "little") == 0b0100
+
+
+async def test_streak_follows_summary_create_move_and_delete(client, auth):
+    today = date.today()
+    summaries = [await create_summary(client, auth, (today - timedelta(days=offset)).isoformat()) for offset in range(3)]
+    await create_summary(client, auth, (today - timedelta(days=5)).isoformat())
+
+    streak = (await client.get("/api/streak", headers=auth)).json()
+    assert (streak["currentStreak"], streak["longestStreak"]) == (3, 3)
+
+    # Mover o resumo de ontem para dez dias atrás quebra a sequência
+    moved = summaries[1]
+    response = await client.put(f"/api/summaries/{moved['id']}", headers=auth, json={
+        "study_date": (today - timedelta(days=10)).isoformat(), "study_time": 30,
+        "difficulty": "Médio", "summary_text": "Resumo", "objectives": []
+    })
+    assert response.status_code == 200
+    await client.delete(f"/api/summaries/{summaries[0]['id']}", headers=auth)
+
+    streak = (await client.get("/api/streak", headers=auth)).json()
+    assert (streak["currentStreak"], streak["longestStreak"]) == (0, 1)
+    days = (await client.get("/api/streak-days", headers=auth)).json()["dates"]
+    assert days == [(today - timedelta(days=offset)).isoformat() for offset in (10, 5, 2)]
+
+
+async def test_calendar_range_is_limited(client, auth):
+    response = await client.get("/api/streak", headers=auth, params={"start": "2025-01-01", "end": "2026-01-02"})
+    assert response.status_code == 400
+    response = await client.get("/api/streak-days", headers=auth, params={"start": "2025-02-01", "end": "2025-01-01"})
+    assert response.status_code == 400
+
+
+async def test_rebuild_matches_the_incremental_bitmaps(client, auth):
+    for day in ("2024-12-30", "2024-12-31", "2025-01-01", "2025-03-01"):
+        await create_summary(client, auth, day)
+    owner_id = await user_id(client, auth)
+
+    async with SessionLocal() as db:
+        incremental = await load_study_days(db, owner_id)
+        assert await rebuild_calendars(db) == 2
+        assert await load_study_days(db, owner_id) == incremental
+
+    base, bits = incremental
+    assert current_streak(base, bits, date(2025, 1, 1)) == 3
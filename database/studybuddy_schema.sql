@@ -86,7 +86,13 @@ CREATE TABLE "TestResult" (
     correct_count INTEGER NOT NULL,
     total_count INTEGER NOT NULL,
     time_spent INTEGER, -- Tempo gasto no teste em minutos
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    idempotency_key VARCHAR(64), -- Header Idempotency-Key (evita gravar a mesma submissão duas vezes)
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    
+    -- Bancos existentes:
+    -- ALTER TABLE "TestResult" ADD COLUMN idempotency_key VARCHAR(64);
+    -- ALTER TABLE "TestResult" ADD CONSTRAINT uq_user_idempotency_key UNIQUE (user_id, idempotency_key);
+    CONSTRAINT uq_user_idempotency_key UNIQUE (user_id, idempotency_key)
 );
 
 -- 11. Tabela Answer (Respostas individuais do usuário)
@@ -107,6 +113,7 @@ CREATE INDEX idx_summary_user_date ON "Summary" (user_id, study_date);
 CREATE INDEX idx_challenge_user ON "Challenge" (user_id);
 CREATE INDEX idx_question_summary ON "Question" (summary_id);
 CREATE INDEX idx_testresult_user_summary ON "TestResult" (user_id, summary_id);
+CREATE INDEX idx_testresult_user_id ON "TestResult" (user_id, id); -- Paginação por cursor de GET /api/results
 
 -- 13. Função para atualizar automaticamente o campo updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -120,4 +127,124 @@ $$ language 'plpgsql';
 -- 14. Triggers para as tabelas que possuem updated_at
 CREATE TRIGGER update_user_updated_at BEFORE UPDATE ON "User" FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_challenge_updated_at BEFORE UPDATE ON "Challenge" FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
-CREATE TRIGGER update_summary_updated_at BEFORE UPDATE ON "Summary" FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
\ No newline at end of file
+CREATE TRIGGER update_summary_updated_at BEFORE UPDATE ON "Summary" FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+-- 15. Tabela StudyRollup (totais pré-agregados por usuário e período)
+-- Atualizada na mesma transação das escritas em Summary e TestResult.
+-- Para preencher a partir do histórico: python -m app.utils.rollups
+CREATE TABLE "StudyRollup" (
+    user_id INTEGER REFERENCES "User"(id) ON DELETE CASCADE,
+    period VARCHAR(5) NOT NULL, -- 'day', 'week' ou 'month'
+    period_start DATE NOT NULL,
+    study_time INTEGER NOT NULL DEFAULT 0, -- Tempo em minutos
+    study_sessions INTEGER NOT NULL DEFAULT 0,
+    test_count INTEGER NOT NULL DEFAULT 0,
+    score_total INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, period, period_start)
+);
+
+-- 16. Tabela StudyCalendar (dias de estudo por ano, 1 bit por dia)
+-- Bit 0 do byte 0 = 1º de janeiro. Para preencher a partir do histórico: python -m app.utils.streaks
+CREATE TABLE "StudyCalendar" (
+    user_id INTEGER REFERENCES "User"(id) ON DELETE CASCADE,
+    year INTEGER NOT NULL,
+    days BYTEA NOT NULL, -- 46 bytes (366 bits)
+    PRIMARY KEY (user_id, year)
+);
+
+-- 17. Tabela SummarySearch (documento de busca textual de cada resumo)
+-- Texto do resumo com peso A e objetivos com peso B. Atualizada na mesma transação das escritas em Summary.
+-- Para preencher a partir do histórico: python -m app.utils.search
+CREATE TABLE "SummarySearch" (
+    summary_id INTEGER PRIMARY KEY REFERENCES "Summary"(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES "User"(id) ON DELETE CASCADE,
+    document TSVECTOR NOT NULL
+);
+CREATE INDEX "ix_SummarySearch_user_id" ON "SummarySearch" (user_id);
+CREATE INDEX idx_summarysearch_document ON "SummarySearch" USING GIN (document);
+
+-- 18. Tabela PhotoAsset (fotos armazenadas pelo conteúdo, uma linha por SHA-256)
+-- O arquivo fica em PHOTO_STORAGE_DIR/<2 primeiros caracteres>/<sha256>/ (original, thumb.jpg, medium.jpg)
+CREATE TABLE "PhotoAsset" (
+    id SERIAL PRIMARY KEY,
+    sha256 CHAR(64) NOT NULL UNIQUE,
+    content_type VARCHAR(50) NOT NULL,
+    size INTEGER NOT NULL, -- Bytes do original
+    width INTEGER,
+    height INTEGER,
+    variants JSONB, -- Versões geradas, ex: ["thumb", "medium"]
+    created_by INTEGER REFERENCES "User"(id) ON DELETE SET NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE "Challenge" ADD COLUMN photo_asset_id INTEGER REFERENCES "PhotoAsset"(id) ON DELETE SET NULL;
+ALTER TABLE "Summary" ADD COLUMN photo_asset_id INTEGER REFERENCES "PhotoAsset"(id) ON DELETE SET NULL;
+
+-- 19. Perguntas geradas automaticamente a partir dos resumos (POST /api/questions/generate/{summary_id})
+-- source_hash identifica o trecho do resumo que originou a pergunta (NULL = criada manualmente);
+-- questions_hash é o hash do conteúdo do resumo na última geração.
+ALTER TABLE "Question" ADD COLUMN source_hash VARCHAR(64);
+ALTER TABLE "Question" ADD CONSTRAINT uq_summary_question_source UNIQUE (summary_id, source_hash);
+ALTER TABLE "Summary" ADD COLUMN questions_hash VARCHAR(64);
+
+-- 20. Tabela Job (fila durável de tarefas em segundo plano; worker: python -m app.worker)
+-- Os workers reservam os jobs com SELECT ... FOR UPDATE SKIP LOCKED. Jobs concluídos são apagados.
+CREATE TABLE "Job" (
+    id SERIAL PRIMARY KEY,
+    queue VARCHAR(50) NOT NULL,
+    task VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    key VARCHAR(255), -- Deduplicação opcional entre jobs aguardando
+    priority INTEGER NOT NULL DEFAULT 0, -- Maior = executa antes
+    status VARCHAR(20) NOT NULL DEFAULT 'queued', -- 'queued', 'running' ou 'failed'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP, -- Não executa antes disso (espera entre tentativas)
+    locked_at TIMESTAMP WITH TIME ZONE,
+    locked_by VARCHAR(100),
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_job_claim ON "Job" (queue, priority DESC, run_at) WHERE status = 'queued';
+CREATE UNIQUE INDEX uq_job_queued_key ON "Job" (key) WHERE status = 'queued';
+
+-- 21. Tabela StudyReminder (lembrete diário de estudo, um por usuário com desafio)
+-- O agendador lê só as linhas vencidas (next_at <= agora) e as reagenda para o dia seguinte.
+-- Para criar os lembretes dos usuários existentes: python -m app.utils.reminders --backfill
+CREATE TABLE "StudyReminder" (
+    user_id INTEGER PRIMARY KEY REFERENCES "User"(id) ON DELETE CASCADE,
+    remind_minute INTEGER NOT NULL, -- Minutos desde a meia-noite (horário do servidor)
+    enabled BOOLEAN NOT NULL DEFAULT TRUE,
+    next_at TIMESTAMP WITH TIME ZONE, -- Próximo envio (NULL = desativado)
+    last_sent_on DATE
+);
+CREATE INDEX idx_studyreminder_next_at ON "StudyReminder" (next_at);
+
+-- 22. Revogação de sessões (POST /api/auth/logout, DELETE /api/auth/sessions/{session_id})
+-- Cada login/registro grava uma linha em Session; token guarda o identificador da sessão (claim sid do JWT).
+-- As sessões revogadas e ainda não expiradas são sincronizadas na memória de cada processo da API;
+-- as expiradas são apagadas em lotes.
+ALTER TABLE "Session" ADD COLUMN revoked_at TIMESTAMP WITH TIME ZONE;
+CREATE INDEX idx_session_user ON "Session" (user_id);
+CREATE INDEX idx_session_expires_at ON "Session" (expires_at);
+CREATE INDEX idx_session_revoked ON "Session" (expires_at) WHERE revoked_at IS NOT NULL;
+
+-- 23. Tabela PhotoAssetUser (usuários que enviaram cada foto)
+-- PhotoAsset é compartilhada entre usuários que enviam o mesmo conteúdo; só quem enviou pode usar
+-- o photo_asset_id em desafios e resumos. O backfill vincula as fotos já enviadas a quem as criou
+-- e a quem já as referencia.
+CREATE TABLE "PhotoAssetUser" (
+    asset_id INTEGER NOT NULL REFERENCES "PhotoAsset"(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL REFERENCES "User"(id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (asset_id, user_id)
+);
+CREATE INDEX idx_photoassetuser_user ON "PhotoAssetUser" (user_id);
+
+INSERT INTO "PhotoAssetUser" (asset_id, user_id)
+SELECT id, created_by FROM "PhotoAsset" WHERE created_by IS NOT NULL
+UNION
+SELECT photo_asset_id, user_id FROM "Challenge" WHERE photo_asset_id IS NOT NULL
+UNION
+SELECT photo_asset_id, user_id FROM "Summary" WHERE photo_asset_id IS NOT NULL
+ON CONFLICT DO NOTHING;
@@ -61,6 +61,31 @@ class StudyBuddyAPI {
     }
   }
 
+  /**
+   * Busca todas as páginas de uma listagem paginada por cursor
+   * @param {string} endpoint - Endpoint da listagem (ex: '/summaries')
+   * @returns {Promise} Array com os itens de todas as páginas
+   */
+  async requestAllPages(endpoint) {
+    const items = [];
+    let cursor = null;
+
+    do {
+      const separator = endpoint.includes('?') ? '&' : '?';
+      const url = cursor ? `${endpoint}${separator}cursor=${encodeURIComponent(cursor)}` : endpoint;
+      const page = await this.request(url, { method: 'GET' });
+
+      if (!page) {
+        return null;
+      }
+
+      items.push(...page.items);
+      cursor = page.next_cursor;
+    } while (cursor);
+
+    return items;
+  }
+
   // ==========================================
   // AUTENTICAÇÃO
   // ==========================================
@@ -156,9 +181,7 @@ class StudyBuddyAPI {
    * @returns {Promise} Array de desafios
    */
   async getChallenges() {
-    return this.request('/challenges', {
-      method: 'GET'
-    });
+    return this.requestAllPages('/challenges');
   }
 
   /**
@@ -231,9 +254,7 @@ class StudyBuddyAPI {
    * @returns {Promise} Array de resumos
    */
   async getSummaries() {
-    return this.request('/summaries', {
-      method: 'GET'
-    });
+    return this.requestAllPages('/summaries');
   }
 
   /**
@@ -377,9 +398,7 @@ class StudyBuddyAPI {
    * @returns {Promise} Array de resultados
    */
   async getResults() {
-    return this.request('/results', {
-      method: 'GET'
-    });
+    return this.requestAllPages('/results');
   }
 
   /**
@@ -418,6 +437,23 @@ class StudyBuddyAPI {
     });
   }
 
+  /**
+   * Obter streak atual, maior streak e calendário compactado
+   * @param {string} start - Primeiro dia do calendário (YYYY-MM-DD, opcional)
+   * @param {string} end - Último dia do calendário (YYYY-MM-DD, opcional)
+   * @returns {Promise} currentStreak, longestStreak e calendar (bits em base64)
+   */
+  async getStreak(start = null, end = null) {
+    const params = new URLSearchParams();
+    if (start) params.append('start', start);
+    if (end) params.append('end', end);
+    const query = params.toString() ? `?${params}` : '';
+
+    return this.request(`/streak${query}`, {
+      method: 'GET'
+    });
+  }
+
   /**
    * Obter dados de um dia específico
    * @param {string} date - Data (YYYY-MM-DD)